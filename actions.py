@@ -15,8 +15,19 @@
 MSG0 = "\nLa commande '{command_word}' ne prend pas de paramètre.\n"
 # The MSG1 variable is used when the command takes 1 parameter.
 MSG1 = "\nLa commande '{command_word}' prend 1 seul paramètre.\n"
+# The DIRECTIONS table maps every accepted spelling (lower case) to the direction used in the exits.
+DIRECTIONS = {'n': 'N', 'north': 'N', 'nord': 'N',
+              'e': 'E', 'east': 'E', 'est': 'E',
+              's': 'S', 'south': 'S', 'sud': 'S',
+              'o': 'O', 'w': 'O', 'west': 'O', 'ouest': 'O',
+              'u': 'U', 'up': 'U', 'haut': 'U',
+              'd': 'D', 'down': 'D', 'bas': 'D'}
+
+import math
 
 from item import Beamer
+from player import STAMINA_MAX, STAMINA_REGEN
+import savegame
 
 class Actions:
     @staticmethod
@@ -36,13 +47,23 @@ class Actions:
         Examples:
         
         >>> from game import Game
-        >>> game = Game()
+        >>> game = Game("TestPlayer")
         >>> game.setup()
-        >>> go(game, ["go", "N"], 1)
+        >>> Actions.go(game, ["go", "N"], 1) # doctest: +ELLIPSIS
+        <BLANKLINE>
+        (Endurance restante : 90.0%)
+        <BLANKLINE>
+        Vous êtes dans une immense tour en pierre ...
         True
-        >>> go(game, ["go", "N", "E"], 1)
+        >>> Actions.go(game, ["go", "N", "E"], 1)
+        <BLANKLINE>
+        La commande 'go' prend 1 seul paramètre.
+        <BLANKLINE>
         False
-        >>> go(game, ["go"], 1)
+        >>> Actions.go(game, ["go"], 1)
+        <BLANKLINE>
+        La commande 'go' prend 1 seul paramètre.
+        <BLANKLINE>
         False
 
         """
@@ -52,41 +73,71 @@ class Actions:
         # If the number of parameters is incorrect, print an error message and return False.
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.print(MSG1.format(command_word=command_word))
             return False
 
         # Get direction from list_of_words
         direction = list_of_words[1].strip()
 
         # direction ignore case and full names
-        dir_map = {'n': 'N', 'north': 'N', 'nord': 'N',
-            'e': 'E', 'east': 'E', 'est': 'E',
-            's': 'S', 'south': 'S', 'sud': 'S',
-            'o': 'O', 'west': 'O', 'ouest': 'O',
-            'u': 'U', 'up':'u', 
-            'd': 'D', 'down':'d'}
-
-        key = direction.lower()
-        dir_normalize = dir_map.get(key)
-
-        # If not in map, check if user provided single-letter uppercase already.
+        dir_normalize = DIRECTIONS.get(direction.lower())
         if dir_normalize is None:
-            if direction.upper() in ('N', 'E', 'S', 'O','U','D'):
-                dir_normalize = direction.upper()
-            else:
-                print(f"\nDirection '{direction}' non reconnue.\n")
-                return False
+            game.output.print(f"\nDirection '{direction}' non reconnue.\n")
+            return False
 
-        next_room = player.current_room.exits.get(dir_normalize)
+        next_room = game.world_state.room(player.current_room.exits.get(dir_normalize))
         
         if next_room and getattr(next_room, 'locked', False):
-            print(f"\nLa porte vers {next_room.name} est verrouillée. Il vous faut une clé ou utiliser 'picklock'.\n")
+            game.output.print(f"\nLa porte vers {next_room.name} est verrouillée. Il vous faut une clé ou utiliser 'picklock'.\n")
             return False
 
         # Move the player using the canonical single-letter direction.
         player.move(dir_normalize)
         return True
 
+    @staticmethod
+    def travel(game, list_of_words, number_of_parameters):
+        """
+        Move the player along the shortest path to the named room.
+
+        The player moves one room at a time, so every step costs stamina
+        and the travel stops early if the player is too tired.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the player reached the room, False otherwise.
+
+        """
+        if len(list_of_words) < number_of_parameters + 1:
+            command_word = list_of_words[0]
+            game.output.print(MSG1.format(command_word=command_word))
+            return False
+
+        # Get the room name from the list of words (join all words after command)
+        room_name = " ".join(list_of_words[1:])
+        player = game.player
+        goal = game.routing.find_room(room_name)
+        if goal is None:
+            game.output.print(f"\nLieu '{room_name}' inconnu.\n")
+            return False
+
+        path = game.routing.route(player.current_room, goal)
+        if path is None:
+            game.output.print(f"\nAucun chemin praticable vers {goal.name}.\n")
+            return False
+        if not path:
+            game.output.print(f"\nVous êtes déjà à {goal.name}.\n")
+            return False
+
+        for direction in path:
+            if not player.move(direction):
+                return False
+        return True
+
     @staticmethod
     def quit(game, list_of_words, number_of_parameters):
         """
@@ -103,13 +154,17 @@ class Actions:
         Examples:
 
         >>> from game import Game
-        >>> game = Game()
+        >>> game = Game("TestPlayer")
         >>> game.setup()
-        >>> quit(game, ["quit"], 0)
+        >>> Actions.quit(game, ["quit"], 0)
+        <BLANKLINE>
+        Merci TestPlayer d'avoir joué. Au revoir.
+        <BLANKLINE>
         True
-        >>> quit(game, ["quit", "N"], 0)
-        False
-        >>> quit(game, ["quit", "N", "E"], 0)
+        >>> Actions.quit(game, ["quit", "N"], 0)
+        <BLANKLINE>
+        La commande 'quit' ne prend pas de paramètre.
+        <BLANKLINE>
         False
 
         """
@@ -117,13 +172,13 @@ class Actions:
         # If the number of parameters is incorrect, print an error message and return False.
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.print(MSG0.format(command_word=command_word))
             return False
         
         # Set the finished attribute of the game object to True.
         player = game.player
         msg = f"\nMerci {player.name} d'avoir joué. Au revoir.\n"
-        print(msg)
+        game.output.print(msg)
         game.finished = True
         return True
 
@@ -143,13 +198,17 @@ class Actions:
         Examples:
 
         >>> from game import Game
-        >>> game = Game()
+        >>> game = Game("TestPlayer")
         >>> game.setup()
-        >>> help(game, ["help"], 0)
+        >>> Actions.help(game, ["help"], 0) # doctest: +ELLIPSIS
+        <BLANKLINE>
+        Voici les commandes disponibles:
+        ...
         True
-        >>> help(game, ["help", "N"], 0)
-        False
-        >>> help(game, ["help", "N", "E"], 0)
+        >>> Actions.help(game, ["help", "N"], 0)
+        <BLANKLINE>
+        La commande 'help' ne prend pas de paramètre.
+        <BLANKLINE>
         False
 
         """
@@ -158,14 +217,14 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.print(MSG0.format(command_word=command_word))
             return False
         
         # Print the list of available commands.
-        print("\nVoici les commandes disponibles:")
+        game.output.print("\nVoici les commandes disponibles:")
         for command in game.commands.values():
-            print("\t- " + str(command))
-        print()
+            game.output.print("\t- " + str(command))
+        game.output.print()
         return True
         
     @staticmethod
@@ -180,13 +239,13 @@ class Actions:
         description complète.
         """
         if len(list_of_words) != number_of_parameters + 1:
-            print("\nCommande incorrecte.\n")
+            game.output.print("\nCommande incorrecte.\n")
             return False
 
         # verifie si un historique des pièces visitées existe
         player = game.player
         if not player.history:
-            print("\nAucune pièce précédente dans l'historique !\n")
+            game.output.print("\nAucune pièce précédente dans l'historique !\n")
             return False
 
         # Récupère la dernière pièce visitée depuis l'historique.
@@ -194,7 +253,7 @@ class Actions:
         
         # Met à jour la pièce actuelle du joueur.
         player.current_room = previous_room
-        print(player.current_room.get_long_description())
+        game.output.print(player.current_room.get_long_description())
 
         return True
 
@@ -218,26 +277,53 @@ class Actions:
         # Vérification du nombre de paramètres
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.print(MSG0.format(command_word=command_word))
             return False
 
         # Affichage de l'inventaire
         player = game.player
-        print(player.get_inventory())
+        game.output.print(player.get_inventory())
         return True
 
     @staticmethod
     def look(game, list_of_words, number_of_parameters):
+        """
+        Describe the current room, with the passers-by of the crowd if any.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+
+        Examples:
+
+        >>> import io
+        >>> from game import Game
+        >>> game = Game("TestPlayer", io.StringIO(), seed=1)
+        >>> game.setup()
+        >>> _ = game.run_script(["go N", "go N", "go D", "go D"])
+        >>> game.player.current_room.name
+        'Donjon-1-0'
+        >>> Actions.look(game, ["look"], 0)
+        True
+        """
 
         l = len(list_of_words)
 
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.print(MSG0.format(command_word=command_word))
             return False
 
         room = game.player.current_room
-        print(room.look())
+        game.output.print(room.look())
+        if game.crowd is not None:
+            passers_by = game.crowd.count_in(room)
+            if passers_by:
+                game.output.print(f"Une foule de {passers_by} passants circule ici.\n")
         return True
 
     @staticmethod
@@ -251,27 +337,24 @@ class Actions:
         # accepter au moins le nombre requis de paramètres 
         if l < number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.print(MSG1.format(command_word=command_word))
             return False
 
         # Récupérer le nom de l'objet à prendre 
         item_name = " ".join(list_of_words[1:]).strip()
 
-        room = game.player.current_room
+        room = game.world_state.mutable(game.player.current_room)
         player = game.player
 
         # Vérifier si l'objet est dans la pièce
         if item_name not in room.inventory:
-            print(f"\nIl n'y a pas d'objet '{item_name}' ici.\n")
+            game.output.print(f"\nIl n'y a pas d'objet '{item_name}' ici.\n")
             return False
 
-        # Ajouter l'objet au joueur
-        player.inventory[item_name] = room.inventory[item_name]
-
-        # Retirer l'objet de la pièce
-        del room.inventory[item_name]
+        # Retirer l'objet de la pièce et l'ajouter au joueur
+        player.put_item(item_name, room.remove_item(item_name))
 
-        print(f"\nVous avez pris '{item_name}'.\n")
+        game.output.print(f"\nVous avez pris '{item_name}'.\n")
         player.quest_manager.check_action_objectives("prendre", item_name)
         return True
 
@@ -286,27 +369,24 @@ class Actions:
         # accepter au moins le nombre requis de paramètres 
         if l < number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.print(MSG1.format(command_word=command_word))
             return False
 
         # Récupérer le nom de l'objet à déposer 
         item_name = " ".join(list_of_words[1:]).strip()
 
         player = game.player
-        room = player.current_room
+        room = game.world_state.mutable(player.current_room)
 
         # Vérifier si l'objet est dans l'inventaire du joueur
         if item_name not in player.inventory:
-            print(f"\nVous n'avez pas '{item_name}' dans votre inventaire.\n")
+            game.output.print(f"\nVous n'avez pas '{item_name}' dans votre inventaire.\n")
             return False
 
-        # Déposer l'objet dans la pièce
-        room.inventory[item_name] = player.inventory[item_name]
+        # Retirer l'objet de l'inventaire du joueur et le déposer dans la pièce
+        room.put_item(item_name, player.remove_item(item_name))
 
-        # Retirer l'objet de l'inventaire du joueur
-        del player.inventory[item_name]
-
-        print(f"\nVous avez déposé '{item_name}' dans la pièce.\n")
+        game.output.print(f"\nVous avez déposé '{item_name}' dans la pièce.\n")
         return True
 
     @staticmethod
@@ -315,7 +395,7 @@ class Actions:
 
         # Vérifie si le joueur a précisé un objet
         if l < number_of_parameters + 1:
-            print(MSG1.format(command_word=list_of_words[0]))
+            game.output.print(MSG1.format(command_word=list_of_words[0]))
             return False
 
         # Récupére le nom de l'objet
@@ -324,7 +404,7 @@ class Actions:
 
         # Vérifie si l'objet est dans l'inventaire
         if item_name not in player.inventory:
-            print(f"\nVous n'avez pas de '{item_name}' sur vous.\n")
+            game.output.print(f"\nVous n'avez pas de '{item_name}' sur vous.\n")
             return False
 
         # Gérer l'utilisation de l'objet
@@ -334,25 +414,25 @@ class Actions:
             player.stamina = min(100, player.stamina + gain)
             
             # Retirer l'objet après usage 
-            del player.inventory[item_name]
+            player.remove_item(item_name)
             
-            print(f"\nVous buvez la {item_name}. Vous vous sentez beaucoup mieux !")
-            print(f"Endurance actuelle : {round(player.stamina, 1)}%\n")
+            game.output.print(f"\nVous buvez la {item_name}. Vous vous sentez beaucoup mieux !")
+            game.output.print(f"Endurance actuelle : {round(player.stamina, 1)}%\n")
             return True
         
         elif item_name == "beamer":
             item = player.inventory[item_name]
             if isinstance(item, Beamer):
                 resultat = item.use(player)
-                print(resultat)
+                game.output.print(resultat)
                 return True
             else:
-                print("\nCet objet ressemble à un beamer mais ne fonctionne pas.\n")
+                game.output.print("\nCet objet ressemble à un beamer mais ne fonctionne pas.\n")
                 return False
 
         # Si l'objet n'est pas utilisable
         else:
-            print(f"\nL'objet '{item_name}' ne peut pas être utilisé de cette façon.\n")
+            game.output.print(f"\nL'objet '{item_name}' ne peut pas être utilisé de cette façon.\n")
             return False
 
     @staticmethod
@@ -365,16 +445,16 @@ class Actions:
         item = player.inventory.get("beamer") # On suppose que la clé est 'beamer'
         
         if isinstance(item, Beamer):
-            print(item.charge(player.current_room))
+            game.output.print(item.charge(player.current_room))
             return True
         else:
-            print("\nVous n'avez aucun objet pouvant être chargé.\n")
+            game.output.print("\nVous n'avez aucun objet pouvant être chargé.\n")
             return False
 
     @staticmethod
     def talk(game, list_of_words, number_of_parameters):
         if len(list_of_words) < 2:
-            print("\nÀ qui voulez-vous parler ?\n")
+            game.output.print("\nÀ qui voulez-vous parler ?\n")
             return False
 
         pnj_name = list_of_words[1]
@@ -388,28 +468,40 @@ class Actions:
                 break
 
         if target:
-            print(f"\n{target.name} vous dit : '{target.get_msg(game.player)}'\n")
+            game.output.print(f"\n{target.name} vous dit : '{target.get_msg(game.player)}'\n")
             return True
         else:
-            print(f"\nIl n'y a personne nommé '{pnj_name}' ici.\n")
+            game.output.print(f"\nIl n'y a personne nommé '{pnj_name}' ici.\n")
             return False
         
 
 
     @staticmethod
     def rest(game, list_of_words, number_of_parameters):
+        """
+        Rest until the player's stamina is full.
+
+        Stamina regenerates on its own as game time passes (see
+        Player.stamina): resting only makes the needed time pass at once,
+        so a single command replaces a series of short rests.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the player rested, False if already rested.
+
+        """
         player = game.player
-        recovery = 5
-        
-        if player.stamina >= 100:
-            print("\nVous êtes déjà en pleine forme ! Pas besoin de vous reposer.\n")
+
+        if player.stamina >= STAMINA_MAX:
+            game.output.print("\nVous êtes déjà en pleine forme ! Pas besoin de vous reposer.\n")
             return False 
-        
-        player.stamina += recovery
-        if player.stamina > 100:
-            player.stamina = 100
-            
-        print(f"\nVous vous reposez un instant... Votre endurance est maintenant à {player.stamina}%.\n")
+
+        game.wait(math.ceil((STAMINA_MAX - player.stamina) / STAMINA_REGEN))
+        game.output.print(f"\nVous vous reposez un long moment... Votre endurance est maintenant à {round(player.stamina, 1)}%.\n")
         return True
 
     @staticmethod
@@ -428,14 +520,12 @@ class Actions:
         Examples:
 
         >>> from game import Game
-        >>> game = Game()
-        >>> game.setup("TestPlayer")
+        >>> game = Game("TestPlayer")
+        >>> game.setup()
         >>> Actions.quests(game, ["quests"], 0)
         <BLANKLINE>
         📋 Liste des quêtes:
-          ❓ Grand Explorateur (Non activée)
-          ❓ Grand Voyageur (Non activée)
-          ❓ Découvreur de Secrets (Non activée)
+          ❓ La Boussole de Germain (Non activée)
         <BLANKLINE>
         True
         >>> Actions.quests(game, ["quests", "param"], 0)
@@ -449,7 +539,7 @@ class Actions:
         n = len(list_of_words)
         if n != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.print(MSG0.format(command_word=command_word))
             return False
 
         # Show all quests
@@ -473,17 +563,17 @@ class Actions:
         Examples:
 
         >>> from game import Game
-        >>> game = Game()
-        >>> game.setup("TestPlayer")
-        >>> Actions.quest(game, ["quest", "Grand", "Voyageur"], 1)
+        >>> game = Game("TestPlayer")
+        >>> game.setup()
+        >>> Actions.quest(game, ["quest", "La", "Boussole", "de", "Germain"], 1)
         <BLANKLINE>
-        📋 Quête: Grand Voyageur
-        📖 Déplacez-vous 10 fois entre les lieux.
+        📋 Quête: La Boussole de Germain
+        📖 parler à Germain pour commencer cette quête.
         <BLANKLINE>
         Objectifs:
-          ⬜ Se déplacer 10 fois (Progression: 0/10)
+          ⬜ Retrouver la boussole en argent perdue par Germain dans le marécage.
         <BLANKLINE>
-        🎁 Récompense: Bottes de voyageur
+        🎁 Récompense: 100 groschens
         <BLANKLINE>
         True
         >>> Actions.quest(game, ["quest"], 1)
@@ -497,7 +587,7 @@ class Actions:
         n = len(list_of_words)
         if n < number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.print(MSG1.format(command_word=command_word))
             return False
 
         # Get the quest title from the list of words (join all words after command)
@@ -529,12 +619,12 @@ class Actions:
         Examples:
 
         >>> from game import Game
-        >>> game = Game()
-        >>> game.setup("TestPlayer")
-        >>> Actions.activate(game, ["activate", "Grand", "Voyageur"], 1) # doctest: +ELLIPSIS
+        >>> game = Game("TestPlayer")
+        >>> game.setup()
+        >>> Actions.activate(game, ["activate", "La", "Boussole", "de", "Germain"], 1) # doctest: +ELLIPSIS
         <BLANKLINE>
-        🗡️  Nouvelle quête activée: Grand Voyageur
-        📝 Déplacez-vous 10 fois entre les lieux.
+        🗡️  Nouvelle quête activée: La Boussole de Germain
+        📝 parler à Germain pour commencer cette quête.
         <BLANKLINE>
         True
         >>> Actions.activate(game, ["activate"], 1)
@@ -548,7 +638,7 @@ class Actions:
         n = len(list_of_words)
         if n < number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
+            game.output.print(MSG1.format(command_word=command_word))
             return False
 
         # Get the quest title from the list of words (join all words after command)
@@ -560,7 +650,7 @@ class Actions:
 
         msg1 = f"\nImpossible d'activer la quête '{quest_title}'. "
         msg2 = "Vérifiez le nom ou si elle n'est pas déjà active.\n"
-        print(msg1 + msg2)
+        game.output.print(msg1 + msg2)
         # print(f"\nImpossible d'activer la quête '{quest_title}'. \
         #             Vérifiez le nom ou si elle n'est pas déjà active.\n")
         return False
@@ -582,8 +672,8 @@ class Actions:
         Examples:
 
         >>> from game import Game
-        >>> game = Game()
-        >>> game.setup("TestPlayer")
+        >>> game = Game("TestPlayer")
+        >>> game.setup()
         >>> Actions.rewards(game, ["rewards"], 0)
         <BLANKLINE>
         🎁 Aucune récompense obtenue pour le moment.
@@ -599,7 +689,7 @@ class Actions:
         n = len(list_of_words)
         if n != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            game.output.print(MSG0.format(command_word=command_word))
             return False
 
         # Show all rewards
@@ -608,6 +698,26 @@ class Actions:
 
     @staticmethod
     def picklock(game, list_of_words, number_of_parameters):
+        """
+        Try to pick the lock of the door in the given direction.
+
+        Examples:
+
+        >>> import io
+        >>> from game import Game
+        >>> game = Game("TestPlayer", io.StringIO())
+        >>> game.setup()
+        >>> tower = game.world.get_room("Tower")
+        >>> game.routing.set_locked(tower, True)
+        >>> game.routing.route(game.player.current_room, tower) is None
+        True
+        >>> game.player.lockpicking_level = 5
+        >>> Actions.picklock(game, ["picklock", "N"], 1)
+        True
+        >>> game.routing.route(game.player.current_room, tower), tower.locked
+        (['N'], False)
+
+        """
         target = list_of_words[1] # "porte" ou "coffre"
         player = game.player
         room = player.current_room
@@ -615,18 +725,23 @@ class Actions:
         # Simulation d'un mini-jeu de crochetage
         difficulty = 5 # Exemple pour Beikovetz
         if player.lockpicking_level >= difficulty:
-            print(f"Succès ! Vous avez ouvert le {target}.")
-            # Déverrouiller la pièce ou le coffre
+            game.output.print(f"Succès ! Vous avez ouvert le {target}.")
+            # Déverrouiller la pièce ou le coffre : la porte d'une direction
+            # est déverrouillée pour la session (chemins de `travel` compris)
+            direction = DIRECTIONS.get(target.lower())
+            next_room = room.exits.get(direction) if direction is not None else None
+            if next_room is not None:
+                game.routing.set_locked(next_room, False)
             return True
         else:
-            print("Votre niveau est trop faible. Vous cassez un crochet.")
+            game.output.print("Votre niveau est trop faible. Vous cassez un crochet.")
             return False
 
     @staticmethod
     def steal(game, list_of_words, number_of_parameters):
         player = game.player
         if len(list_of_words) < 2:
-            print("\nQui voulez-vous détrousser ?\n")
+            game.output.print("\nQui voulez-vous détrousser ?\n")
             return False
 
         target_name = list_of_words[1].lower()
@@ -634,25 +749,158 @@ class Actions:
         
         target = room.characters.get(target_name) 
         if not target:
-            print(f"\nIl n'y a pas de '{target_name}' ici.\n")
+            game.output.print(f"\nIl n'y a pas de '{target_name}' ici.\n")
             return False
 
         if player.stamina < 10:
-            print("\nVous êtes trop fatigué pour tenter un vol.\n")
+            game.output.print("\nVous êtes trop fatigué pour tenter un vol.\n")
             return False
         
         player.stamina -= 10
         
         # Calcul de réussite (Agilité vs Difficulté du PNJ)
-        import random
         success_chance = player.agility * 10 # 5 d'agilité = 50% de chance
         
-        if random.randint(1, 100) <= success_chance:
+        if game.rng.randint(1, 100) <= success_chance:
             loot = 20 
             player.groschens += loot
-            print(f"\n[SUCCÈS] Vous subtilisez discrètement {loot} groschens à {target.name} !")
-            print(f"Endurance restante : {player.stamina}%\n")
+            game.output.print(f"\n[SUCCÈS] Vous subtilisez discrètement {loot} groschens à {target.name} !")
+            game.output.print(f"Endurance restante : {round(player.stamina, 1)}%\n")
             return True
         else:
-            print(f"\n[ÉCHEC] {target.name} vous a repéré ! 'Au voleur !'\n")
-            return False
\ No newline at end of file
+            game.output.print(f"\n[ÉCHEC] {target.name} vous a repéré ! 'Au voleur !'\n")
+            return False
+
+    @staticmethod
+    def stats(game, list_of_words, number_of_parameters):
+        """
+        Print the performance metrics (administration command).
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+
+        Examples:
+
+        >>> from game import Game
+        >>> from metrics import Metrics
+        >>> game = Game("TestPlayer", metrics=Metrics())
+        >>> game.setup()
+        >>> game.process_command("look")  # doctest: +ELLIPSIS
+        <BLANKLINE>
+        ...
+        >>> Actions.stats(game, ["stats"], 0)  # doctest: +ELLIPSIS
+        <BLANKLINE>
+        mesure  ...
+        command:look ...
+        True
+
+        """
+        n = len(list_of_words)
+        if n != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            game.output.print(MSG0.format(command_word=command_word))
+            return False
+
+        if game.metrics is None:
+            game.output.print("\nLes mesures de performance sont désactivées.\n")
+            return False
+        game.output.print(game.metrics.summary())
+        return True
+
+    @staticmethod
+    def save(game, list_of_words, number_of_parameters):
+        """
+        Save the game under the given name (the player's name by default).
+
+        Only the state that differs from the world definition is written
+        (see savegame.py), so a save stays small even for a large world.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the game was saved, False otherwise.
+
+        Examples:
+
+        >>> from game import Game
+        >>> game = Game("TestPlayer")
+        >>> game.setup()
+        >>> Actions.save(game, ["save", "../partie"], 0)
+        <BLANKLINE>
+        Nom de sauvegarde invalide : '../partie'.
+        <BLANKLINE>
+        False
+
+        """
+        if len(list_of_words) > number_of_parameters + 2:
+            command_word = list_of_words[0]
+            game.output.print(MSG1.format(command_word=command_word))
+            return False
+
+        name = list_of_words[1] if len(list_of_words) > 1 else game.player.name
+        try:
+            path = savegame.save_path(name)
+            size = savegame.save(game, path)
+        except (savegame.SaveError, OSError) as e:
+            game.output.print(f"\n{e}\n")
+            return False
+        game.output.print(f"\nPartie sauvegardée sous '{name}' ({size} octets).\n")
+        return True
+
+    @staticmethod
+    def load(game, list_of_words, number_of_parameters):
+        """
+        Restore a game saved with the save command.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the game was restored, False otherwise.
+
+        Examples:
+
+        The dungeon floors next to the restored room are linked at once,
+        although loading does not advance the world:
+
+        >>> import io, os
+        >>> from game import Game
+        >>> game = Game("TestPlayer", io.StringIO(), seed=1)
+        >>> game.setup()
+        >>> game.player.current_room = game.dungeon.stairs(2)
+        >>> Actions.save(game, ["save", "doctest-donjon"], 0)
+        True
+        >>> other = Game("TestPlayer", io.StringIO(), seed=1)
+        >>> other.setup()
+        >>> Actions.load(other, ["load", "doctest-donjon"], 0)
+        True
+        >>> os.remove(savegame.save_path("doctest-donjon"))
+        >>> _ = other.run_script(["go D"])
+        >>> other.player.current_room.name
+        'Donjon-3-0'
+
+        """
+        if len(list_of_words) > number_of_parameters + 2:
+            command_word = list_of_words[0]
+            game.output.print(MSG1.format(command_word=command_word))
+            return False
+
+        name = list_of_words[1] if len(list_of_words) > 1 else game.player.name
+        try:
+            savegame.load(game, savegame.save_path(name))
+        except (savegame.SaveError, OSError) as e:
+            game.output.print(f"\n{e}\n")
+            return False
+        game.output.print(f"\nPartie '{name}' chargée.\n")
+        game.output.print(game.player.current_room.get_long_description())
+        return True
@@ -0,0 +1,1246 @@
+# Description: benchmarks du moteur de jeu.
+#
+# Chaque mesure accepte --json FICHIER pour enregistrer ses résultats et
+# comparer des exécutions d'un commit à l'autre.
+#
+# Usage : python benchmark.py commands [--rooms 10000] [--npcs 1000] [--commands 20000]
+#                                      [--mix go=40,look=20,...] [--json resultats.json]
+#         python benchmark.py npc [--rooms 10000] [--npcs 50000] [--commands 200]
+#         python benchmark.py world [--rooms 50000]
+#         python benchmark.py quests [--quests 500] [--events 5000]
+#         python benchmark.py sessions [--rooms 10000] [--sessions 20]
+#         python benchmark.py memory [--rooms 100000] [--items 5]
+#         python benchmark.py routing [--rooms 100000] [--goals 20]
+#         python benchmark.py crowd [--rooms 10000] [--npcs 1000000] [--steps 20]
+#         python benchmark.py parser [--log partie.jsonl ...] [--lines 1000000]
+#         python benchmark.py save [--rooms 10000] [--npcs 100] [--commands 2000]
+#         python benchmark.py journal [--rooms 10000] [--npcs 100] [--commands 5000]
+#         python benchmark.py store [--players 10000] [--rounds 5] [--interval 0.5]
+#         python benchmark.py hibernate [--sessions 5000] [--hot 500] [--commands 20000]
+#         python benchmark.py interest [--town 100] [--town-npcs 200] [--dungeon 100000] [--dungeon-npcs 50000]
+#         python benchmark.py rest [--rooms 10000] [--npcs 1000] [--rests 200]
+#         python benchmark.py dungeon [--depth 2000] [--max-floors 8]
+#         python benchmark.py worldgen [--rooms 1000000] [--topology small-world] [--npcs 10000] [--commands 5000]
+#         python benchmark.py worldcheck [--rooms 100000] [--topology tree] [--locked 0.05]
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+from room import Room
+from player import Player
+from character import Character
+from game import Game
+from world import load_world, get_world
+from item import Item
+from routing import RoutingTable, find_path
+from scheduler import Scheduler
+from loadtest import percentile
+from quest import Quest, QuestManager
+import crowd
+import savegame
+from journal import Journal
+from store import PlayerStore, probe
+from sessions import SessionManager
+from metrics import Metrics
+import worldgen
+import worldcheck
+
+
+def build_grid_world(n_rooms, rng):
+    """
+    Construit une grille carrée d'environ `n_rooms` pièces reliées par
+    des sorties N/E/S/O.
+    """
+    side = max(1, int(n_rooms ** 0.5))
+    grid = [[Room(f"R{x}_{y}", f"la pièce {x},{y}") for x in range(side)] for y in range(side)]
+    rooms = []
+    for y in range(side):
+        for x in range(side):
+            room = grid[y][x]
+            room.exits = {
+                "N": grid[y - 1][x] if y > 0 else None,
+                "S": grid[y + 1][x] if y < side - 1 else None,
+                "E": grid[y][x + 1] if x < side - 1 else None,
+                "O": grid[y][x - 1] if x > 0 else None,
+            }
+            rooms.append(room)
+    return rooms
+
+
+def build_game(n_rooms, n_npcs, move_chance=0.5, seed=0):
+    """Prépare une partie sans interaction avec `n_rooms` pièces et `n_npcs` PNJ."""
+    rng = random.Random(seed)
+    game = Game(seed=seed)
+    game._setup_commands()
+    game.rooms = build_grid_world(n_rooms, rng)
+    game.player = Player("Bench")
+    game.player.current_room = game.rooms[0]
+    for i in range(n_npcs):
+        room = rng.choice(game.rooms)
+        npc = Character(f"PNJ{i}", "un passant", room, ["..."])
+        npc.move_chance = move_chance
+        room.characters[npc.key] = npc
+        game.scheduler.register(npc)
+    return game
+
+
+def legacy_npc_pass(game):
+    """Ancienne boucle : parcourt toutes les pièces et tente de bouger chaque PNJ."""
+    all_characters = []
+    for room in game.rooms:
+        for char in room.characters.values():
+            all_characters.append(char)
+    for char in all_characters:
+        char.move()
+
+
+def bench_npc(n_rooms, n_npcs, n_commands, move_chance):
+    """Compare le nombre de commandes par seconde avant/après le scheduler."""
+    import game as game_module
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            game = build_game(n_rooms, n_npcs, move_chance)
+            start = time.perf_counter()
+            for _ in range(n_commands):
+                game.commands["look"].action(game, ["look"], 0)
+                legacy_npc_pass(game)
+            results["legacy"] = n_commands / (time.perf_counter() - start)
+
+            game = build_game(n_rooms, n_npcs, move_chance)
+            start = time.perf_counter()
+            for _ in range(n_commands):
+                game.process_command("look")
+            results["scheduler"] = n_commands / (time.perf_counter() - start)
+
+            # Sans rayon d'intérêt : tous les PNJ sont simulés, comme dans l'ancienne boucle
+            game = build_game(n_rooms, n_npcs, move_chance)
+            game.scheduler.radius = None
+            start = time.perf_counter()
+            for _ in range(n_commands):
+                game.process_command("look")
+            results["scheduler sans rayon"] = n_commands / (time.perf_counter() - start)
+    finally:
+        game_module.DEBUG = debug
+    return results
+
+
+def bench_crowd(n_rooms, n_npcs, n_steps, move_chance, seed=0):
+    """Compare le temps d'un pas de simulation : PNJ du scheduler contre foule numpy."""
+    rng = random.Random(seed)
+    rooms = build_grid_world(n_rooms, rng)
+    results = {}
+
+    scheduler = Scheduler()
+    scheduler.rng = random.Random(seed)
+    # Au-delà de 100 000 PNJ individuels, la mesure devient très longue
+    n_characters = min(n_npcs, 100000)
+    for i in range(n_characters):
+        room = rng.choice(rooms)
+        npc = Character(f"PNJ{i}", "un passant", room, ["..."])
+        npc.move_chance = move_chance
+        room.characters[npc.key] = npc
+        scheduler.register(npc)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        scheduler.advance()
+    results[f"scheduler ({n_characters} PNJ)"] = (time.perf_counter() - start) / n_steps
+
+    if crowd.available():
+        population = crowd.Crowd(rooms, move_chance, seed=seed)
+        population.positions = population.rng.integers(0, len(rooms), n_npcs, dtype="int32")
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            population.step()
+        results[f"crowd ({n_npcs} PNJ)"] = (time.perf_counter() - start) / n_steps
+    return results
+
+
+# Objets déposés dans les pièces des mondes de test
+BENCH_ITEMS = ["Pomme", "Caillou", "Corde", "Torche", "Pain"]
+
+
+def grid_world_definition(n_rooms, items_per_room=0, n_npcs=0, seed=0):
+    """
+    Définition JSON (dict) d'une grille d'environ `n_rooms` pièces,
+    avec éventuellement des objets dans chaque pièce et des PNJ.
+    """
+    rng = random.Random(seed)
+    side = max(1, int(n_rooms ** 0.5))
+    rooms = []
+    for y in range(side):
+        for x in range(side):
+            rooms.append({
+                "name": f"R{x}_{y}",
+                "description": f"la pièce {x},{y}",
+                "exits": {
+                    "N": f"R{x}_{y - 1}" if y > 0 else None,
+                    "S": f"R{x}_{y + 1}" if y < side - 1 else None,
+                    "E": f"R{x + 1}_{y}" if x < side - 1 else None,
+                    "O": f"R{x - 1}_{y}" if x > 0 else None,
+                },
+                "items": [{"name": name, "description": f"un objet ({name})", "weight": 0.5}
+                          for name in rng.sample(BENCH_ITEMS, min(items_per_room, len(BENCH_ITEMS)))],
+            })
+    characters = [{"name": f"PNJ{i}", "description": "un passant",
+                   "room": rng.choice(rooms)["name"], "msgs": ["Bonjour !", "Belle journée."]}
+                  for i in range(n_npcs)]
+    return {"start": "R0_0", "rooms": rooms, "characters": characters}
+
+
+class LegacyRoom:
+    """Ancien modèle de pièce (attributs dans un __dict__), pour comparaison."""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.exits = {}
+        self.inventory = {}
+        self.characters = {}
+        self.containers = {}
+        self.locked = False
+        self.difficulty = 0
+
+
+def _traced(build):
+    gc.collect()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - start, objects
+
+
+def bench_memory(n_rooms, items_per_room, n_kinds):
+    """Octets par pièce et par objet : ancien modèle / __slots__ et prototypes."""
+    kinds = [(f"Objet{k}", f"la description de l'objet {k}", 0.5) for k in range(n_kinds)]
+    names = [f"R{i}" for i in range(n_rooms)]
+    descriptions = [f"la pièce {i}" for i in range(n_rooms)]
+    results = {}
+    tracemalloc.start()
+
+    size, rooms = _traced(lambda: [LegacyRoom(n, d) for n, d in zip(names, descriptions)])
+    results["pièce (avant)"] = size / n_rooms
+
+    def fill_legacy():
+        for i, room in enumerate(rooms):
+            for j in range(items_per_room):
+                name, description, weight = kinds[(i + j) % n_kinds]
+                room.inventory[name] = {"description": description, "weight": weight}
+    size, _ = _traced(fill_legacy)
+    results["objet (avant)"] = size / (n_rooms * items_per_room)
+    del rooms
+
+    size, rooms = _traced(lambda: [Room(n, d) for n, d in zip(names, descriptions)])
+    results["pièce (après)"] = size / n_rooms
+
+    def fill():
+        for i, room in enumerate(rooms):
+            for j in range(items_per_room):
+                name, description, weight = kinds[(i + j) % n_kinds]
+                room.inventory[name] = Item.prototype(name, description, weight)
+    size, _ = _traced(fill)
+    results["objet (après)"] = size / (n_rooms * items_per_room)
+
+    tracemalloc.stop()
+    return results
+
+
+def bench_session_memory(n_rooms, n_sessions):
+    """Mémoire par session : monde chargé par session / monde partagé + surcouche."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "world.json")
+        definition = grid_world_definition(n_rooms)
+        for i, room in enumerate(definition["rooms"]):
+            room["items"] = [{"name": f"Objet{i}", "description": "un objet", "weight": 1.0}]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(definition, f)
+        load_world(path)  # écrit l'instantané
+
+        script = ["look", "take Objet0", "go E", "go S", "drop Objet0", "look"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            gc.collect()
+            start = tracemalloc.get_traced_memory()[0]
+            # Topologie de routage comprise : construite une fois par monde
+            get_world(path).create_routing(None)
+            results["monde partagé"] = tracemalloc.get_traced_memory()[0] - start
+
+            gc.collect()
+            start = tracemalloc.get_traced_memory()[0]
+            games = []
+            for i in range(n_sessions):
+                game = Game(f"Joueur{i}", world_file=path)
+                game.setup()
+                game.run_script(script)
+                games.append(game)
+            gc.collect()
+            results["après : surcouche par session"] = (tracemalloc.get_traced_memory()[0] - start) / n_sessions
+
+            start = tracemalloc.get_traced_memory()[0]
+            worlds = [load_world(path) for _ in range(n_sessions)]
+            results["avant : monde par session"] = (tracemalloc.get_traced_memory()[0] - start) / n_sessions
+            tracemalloc.stop()
+    return results
+
+
+def bench_world_load(n_rooms, repeat):
+    """Compare le chargement depuis le JSON et depuis l'instantané compilé."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "world.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(grid_world_definition(n_rooms), f)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            load_world(path, use_snapshot=False)
+        results["json"] = (time.perf_counter() - start) / repeat
+
+        load_world(path)  # compilation et écriture de l'instantané
+        start = time.perf_counter()
+        for _ in range(repeat):
+            load_world(path)
+        results["snapshot"] = (time.perf_counter() - start) / repeat
+    return results
+
+
+# Répartition par défaut des commandes d'une session scriptée
+DEFAULT_MIX = "go=40,look=20,take=10,drop=10,talk=10,quests=10"
+
+
+def parse_mix(text):
+    """
+    Lit une répartition de commandes de la forme "go=40,look=20".
+
+    >>> parse_mix("go=3,look=1")
+    {'go': 3, 'look': 1}
+    """
+    mix = {}
+    for part in text.split(","):
+        word, weight = part.split("=")
+        mix[word.strip()] = int(weight)
+    return mix
+
+
+def scripted_session(mix, n_commands, n_npcs, seed=0):
+    """Génère une suite de `n_commands` commandes tirées selon `mix`."""
+    rng = random.Random(seed)
+    words = list(mix)
+    weights = [mix[word] for word in words]
+    script = []
+    for word in rng.choices(words, weights, k=n_commands):
+        if word == "go":
+            script.append("go " + rng.choice("NESO"))
+        elif word in ("take", "drop"):
+            script.append(f"{word} {rng.choice(BENCH_ITEMS)}")
+        elif word == "talk":
+            script.append(f"talk PNJ{rng.randrange(n_npcs)}" if n_npcs else "talk personne")
+        else:
+            script.append(word)
+    return script
+
+
+def bench_commands(n_rooms, n_npcs, items_per_room, n_commands, mix, seed=0):
+    """
+    Exécute une session scriptée via `Game.process_command` et mesure le
+    débit, la latence par commande et le pic de mémoire.
+    """
+    import game as game_module
+    script = scripted_session(mix, n_commands, n_npcs, seed)
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as sink:
+            path = os.path.join(tmp, "world.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(grid_world_definition(n_rooms, items_per_room, n_npcs, seed), f)
+
+            game = Game("Bench", sink, world_file=path, seed=seed)
+            game.setup()
+            latencies = {}
+            process_command = game.process_command
+            start = time.perf_counter()
+            for command_string in script:
+                t0 = time.perf_counter()
+                process_command(command_string)
+                latencies.setdefault(command_string.split(" ")[0], []).append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+
+            # Deuxième passe, plus lente, pour le pic de mémoire
+            gc.collect()
+            tracemalloc.start()
+            game = Game("Bench", sink, world_file=path, seed=seed)
+            game.setup()
+            for command_string in script:
+                game.process_command(command_string)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        game_module.DEBUG = debug
+
+    everything = [t for values in latencies.values() for t in values]
+    results["commands"] = len(script)
+    results["commands_per_s"] = len(script) / elapsed
+    for name, fraction in (("p50_us", 0.5), ("p90_us", 0.9), ("p99_us", 0.99)):
+        results[name] = percentile(everything, fraction) * 1e6
+    results["max_us"] = max(everything) * 1e6
+    results["peak_memory_kib"] = peak / 1024
+    results["per_command"] = {word: {"count": len(values),
+                                     "p50_us": percentile(values, 0.5) * 1e6,
+                                     "p99_us": percentile(values, 0.99) * 1e6}
+                              for word, values in sorted(latencies.items())}
+    return results
+
+
+def replay_log_lines(paths):
+    """Renvoie les commandes des journaux de partie `paths` (voir replay.py)."""
+    lines = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            f.readline()  # en-tête
+            lines.extend(json.loads(line)[0] for line in f)
+    return lines
+
+
+def synthetic_lines(n_lines, seed=0):
+    """Lignes saisies réalistes : commandes, alias, préfixes, blancs multiples et enchaînements."""
+    rng = random.Random(seed)
+    variants = ["go N", "go  s", "aller est", "look", "l", "loo", "take Pomme", "prendre  Corde",
+                "drop Pomme", "talk gandalf", "quests", "inventaire", "go n ; go e ; look", "hep"]
+    return [rng.choice(variants) for _ in range(n_lines)]
+
+
+def bench_parser(lines, repeat):
+    """Lignes analysées par seconde : ancien découpage + dictionnaire / CommandParser."""
+    game = Game()
+    game._setup_commands()
+    commands = game.commands
+    parser = game.parser
+    total = len(lines) * repeat
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            list_of_words = line.strip().split(" ")
+            commands.get(list_of_words[0])
+    results["legacy"] = total / (time.perf_counter() - start)
+
+    parse = parser.parse
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            parse(line)
+    results["parser"] = total / (time.perf_counter() - start)
+    return results
+
+
+def bench_routing(n_rooms, n_goals, n_queries, seed=0):
+    """Temps par requête « prochaine direction » : recherche en largeur / table."""
+    rng = random.Random(seed)
+    rooms = build_grid_world(n_rooms, rng)
+    goals = [rng.choice(rooms) for _ in range(n_goals)]
+    queries = [(rng.choice(rooms), rng.choice(goals)) for _ in range(n_queries)]
+    results = {}
+
+    bfs = RoutingTable(rooms, use_table=False)
+    sample = queries[:max(1, n_queries // 100)]
+    start = time.perf_counter()
+    for room, goal in sample:
+        bfs.next_hop(room, goal)
+    results["bfs"] = (time.perf_counter() - start) / len(sample)
+
+    table = RoutingTable(rooms, use_table=True)
+    start = time.perf_counter()
+    for goal in goals:
+        table.next_hop(goal, goal)
+    results["table (construction par destination)"] = (time.perf_counter() - start) / n_goals
+    start = time.perf_counter()
+    for room, goal in queries:
+        table.next_hop(room, goal)
+    results["table"] = (time.perf_counter() - start) / n_queries
+    return results
+
+
+def build_quest_manager(n_quests, n_rooms):
+    """Gestionnaire avec `n_quests` quêtes actives aux objectifs variés."""
+    manager = QuestManager()
+    for i in range(n_quests):
+        objectives = [
+            f"Visiter R{i % n_rooms}",
+            f"prendre Objet{i}",
+            f"parler avec PNJ{i}",
+            f"Explorer R{(i * 7) % n_rooms}",
+        ]
+        quest = Quest(f"Quête {i}", "quête de test", objectives)
+        manager.add_quest(quest)
+        quest.is_active = True
+        manager.active_quests.append(quest)
+    return manager
+
+
+def legacy_quest_pass(manager, event, target):
+    """Ancienne vérification : toutes les variantes de texte pour chaque quête active."""
+    for quest in manager.active_quests[:]:
+        if event == "room":
+            quest.check_room_objective(target, manager.player)
+        else:
+            quest.check_action_objective(event, target, manager.player)
+        if quest.is_completed:
+            manager.active_quests.remove(quest)
+
+
+def bench_quests(n_quests, n_events, seed=0):
+    """Événements traités par seconde avant/après l'index des objectifs."""
+    rng = random.Random(seed)
+    n_rooms = max(1, n_quests // 2)
+    events = []
+    for _ in range(n_events):
+        kind = rng.choice(("room", "prendre", "parler"))
+        if kind == "room":
+            events.append(("room", f"R{rng.randrange(n_rooms * 4)}"))
+        elif kind == "prendre":
+            events.append(("prendre", f"Objet{rng.randrange(n_quests * 4)}"))
+        else:
+            events.append(("parler", f"PNJ{rng.randrange(n_quests * 4)}"))
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = build_quest_manager(n_quests, n_rooms)
+        start = time.perf_counter()
+        for event, target in events:
+            legacy_quest_pass(manager, event, target)
+        results["legacy"] = n_events / (time.perf_counter() - start)
+
+        manager = build_quest_manager(n_quests, n_rooms)
+        start = time.perf_counter()
+        for event, target in events:
+            if event == "room":
+                manager.check_room_objectives(target)
+            else:
+                manager.check_action_objectives(event, target)
+        results["index"] = n_events / (time.perf_counter() - start)
+    return results
+
+
+def bench_save(n_rooms, n_npcs, items_per_room, n_commands, repeat, seed=0):
+    """Taille d'une sauvegarde après une session scriptée, durées d'écriture et de chargement."""
+    import game as game_module
+    script = scripted_session(parse_mix(DEFAULT_MIX), n_commands, n_npcs, seed)
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as sink:
+            path = os.path.join(tmp, "world.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(grid_world_definition(n_rooms, items_per_room, n_npcs, seed), f)
+            game = Game("Bench", sink, world_file=path, seed=seed)
+            game.setup()
+            for command_string in script:
+                game.process_command(command_string)
+            save_file = os.path.join(tmp, "Bench.sav")
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                size = savegame.save(game, save_file)
+            save_seconds = (time.perf_counter() - start) / repeat
+
+            other = Game("Bench", sink, world_file=path, seed=seed)
+            other.setup()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                savegame.load(other, save_file)
+            load_seconds = (time.perf_counter() - start) / repeat
+            same = savegame.snapshot(other) == savegame.snapshot(game)
+    finally:
+        game_module.DEBUG = debug
+    return {"rooms": len(game.rooms), "modified_rooms": len(game.world_state),
+            "bytes": size, "save_ms": save_seconds * 1000, "load_ms": load_seconds * 1000,
+            "identical": same}
+
+
+def bench_journal(n_rooms, n_npcs, items_per_room, n_commands, seed=0):
+    """
+    Coût par commande : sans persistance / journal / sauvegarde complète
+    après chaque commande ; taille du journal et durée de la reprise.
+    """
+    import game as game_module
+    script = scripted_session(parse_mix(DEFAULT_MIX), n_commands, n_npcs, seed)
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as sink:
+            path = os.path.join(tmp, "world.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(grid_world_definition(n_rooms, items_per_room, n_npcs, seed), f)
+
+            def run(persist=None):
+                game = Game("Bench", sink, world_file=path, seed=seed)
+                game.setup()
+                if persist is not None:
+                    persist(game)
+                start = time.perf_counter()
+                for command_string in script:
+                    game.process_command(command_string)
+                return game, (time.perf_counter() - start) / len(script)
+
+            _, results["none_us"] = run()
+            base = os.path.join(tmp, "Bench")
+
+            def attach(game):
+                # Pas de compactage pendant la mesure : tout reste dans le journal
+                game.journal = Journal(base, game, compact_every=len(script) + 1)
+                game.journal.open()
+            game, results["journal_us"] = run(attach)
+            game.journal.file.close()
+            results["journal_records"] = game.journal.seq
+            results["journal_bytes"] = os.path.getsize(base + ".journal")
+
+            save_file = os.path.join(tmp, "full.sav")
+            full = Game("Bench", sink, world_file=path, seed=seed)
+            full.setup()
+            sample = script[:max(1, len(script) // 20)]
+            start = time.perf_counter()
+            for command_string in sample:
+                full.process_command(command_string)
+                savegame.save(full, save_file)
+            results["full_save_us"] = (time.perf_counter() - start) / len(sample)
+
+            other = Game("Bench", sink, world_file=path, seed=seed)
+            other.setup()
+            other.journal = Journal(base, other)
+            start = time.perf_counter()
+            other.journal.open()
+            results["recovery_ms"] = (time.perf_counter() - start) * 1000
+            results["identical"] = savegame.snapshot(other) == savegame.snapshot(game)
+            other.journal.close()
+    finally:
+        game_module.DEBUG = debug
+    for name in ("none_us", "journal_us", "full_save_us"):
+        results[name] *= 1e6
+    return results
+
+
+def bench_store(n_players, n_rounds, interval, seed=0):
+    """
+    `n_players` sessions jouant chacune à leur tour (une commande par
+    session et par tour) : une transaction par commande / écriture
+    différée par lots, écrite par un fil séparé comme dans server.py.
+    """
+    import concurrent.futures
+    import game as game_module
+    rng = random.Random(seed)
+    script = ["go N", "go S", "take Boussole en argent", "look", "drop Boussole en argent",
+              "go O", "go E", "rest", "quests", "check"]
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as sink:
+            games = []
+            for i in range(n_players):
+                game = Game(f"Joueur{i}", sink, seed=seed + i)
+                game.setup()
+                games.append(game)
+            commands = [[rng.choice(script) for _ in games] for _ in range(n_rounds)]
+            total = n_players * n_rounds
+
+            # Une transaction par commande
+            store = PlayerStore(os.path.join(tmp, "each.db"))
+            start = time.perf_counter()
+            for line in commands:
+                for game, command_string in zip(games, line):
+                    game.process_command(command_string)
+                    store.mark_dirty(game)
+                    store.flush()
+            elapsed = time.perf_counter() - start
+            results["per_command"] = {"commands_per_s": total / elapsed,
+                                      "transactions": store.transactions, "rows": store.writes}
+            store.close()
+
+            # Écriture différée
+            store = PlayerStore(os.path.join(tmp, "behind.db"), interval)
+            pending = None
+            write_seconds = []
+
+            def timed_write(rows):
+                t0 = time.perf_counter()
+                store.write(rows)
+                write_seconds.append(time.perf_counter() - t0)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as writer:
+                start = time.perf_counter()
+                last = start
+                for line in commands:
+                    for game, command_string in zip(games, line):
+                        # Comme server.py : seules les commandes qui changent la partie
+                        before = probe(game)
+                        game.process_command(command_string)
+                        if probe(game) != before:
+                            store.mark_dirty(game)
+                        now = time.perf_counter()
+                        if now - last >= interval and (pending is None or pending.done()):
+                            last = now
+                            pending = writer.submit(timed_write, store.collect())
+                if pending is not None:
+                    pending.result()
+                timed_write(store.collect())
+                elapsed = time.perf_counter() - start
+            results["write_behind"] = {"commands_per_s": total / elapsed,
+                                       "transactions": store.transactions, "rows": store.writes,
+                                       "max_write_ms": max(write_seconds, default=0.0) * 1000,
+                                       "stored_players": len(store)}
+            store.close()
+    finally:
+        game_module.DEBUG = debug
+    return results
+
+
+def bench_hibernate(n_sessions, max_hot, n_commands, seed=0):
+    """
+    Mémoire résidente et latence des commandes pour `n_sessions` sessions,
+    sans limite / avec au plus `max_hot` parties en mémoire. Les commandes
+    vont surtout aux sessions récentes (80 % aux 10 % les plus actives).
+    """
+    import game as game_module
+    rng = random.Random(seed)
+    script = ["go N", "go S", "take Boussole en argent", "look", "drop Boussole en argent",
+              "go O", "go E", "rest", "check"]
+    active = max(1, n_sessions // 10)
+    plan = [(rng.randrange(active) if rng.random() < 0.8 else rng.randrange(n_sessions), rng.choice(script))
+            for _ in range(n_commands)]
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with open(os.devnull, "w") as sink:
+            for name, limit in (("unlimited", None), ("lru", max_hot)):
+                get_world(None)
+                gc.collect()
+                tracemalloc.start()
+                sessions = SessionManager(limit)
+                for i in range(n_sessions):
+                    game = Game(f"Joueur{i}", sink, seed=seed + i)
+                    game.setup()
+                    sessions.add(i, game)
+                game = None
+                latencies = []
+                start = time.perf_counter()
+                for key, command_string in plan:
+                    t0 = time.perf_counter()
+                    sessions.get(key).process_command(command_string)
+                    latencies.append(time.perf_counter() - t0)
+                elapsed = time.perf_counter() - start
+                gc.collect()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                disk = 0
+                if sessions.directory is not None:
+                    disk = sum(entry.stat().st_size for entry in os.scandir(sessions.directory))
+                results[name] = {"resident_kib": current / 1024, "peak_kib": peak / 1024,
+                                 "hot": sessions.hot_count(), "commands_per_s": len(plan) / elapsed,
+                                 "p50_us": percentile(latencies, 0.5) * 1e6,
+                                 "p99_us": percentile(latencies, 0.99) * 1e6,
+                                 "hibernations": sessions.hibernations, "wakeups": sessions.wakeups,
+                                 "disk_bytes_per_cold_session": disk / max(1, len(sessions) - sessions.hot_count())}
+                sessions.close()
+    finally:
+        game_module.DEBUG = debug
+    return results
+
+
+def bench_interest(town_rooms, town_npcs, dungeon_rooms, dungeon_npcs, n_ticks, radius, seed=0):
+    """
+    Une ville peuplée reliée à un grand donjon : durée d'un tick du
+    scheduler quand tous les PNJ sont simulés / seulement ceux proches du
+    joueur, qui se promène dans la ville.
+    """
+    results = {}
+    for name, scheduler_radius in (("all", None), (f"radius={radius}", radius)):
+        rng = random.Random(seed)
+        town = build_grid_world(town_rooms, rng)
+        dungeon = build_grid_world(dungeon_rooms, rng)
+        for room in dungeon:
+            room.name = "D" + room.name
+        # Une seule porte entre la ville et le donjon
+        town[-1].exits["D"] = dungeon[0]
+        dungeon[0].exits["U"] = town[-1]
+        scheduler = Scheduler(random.Random(seed), scheduler_radius)
+        for i, rooms in enumerate((town, dungeon)):
+            for j in range(town_npcs if i == 0 else dungeon_npcs):
+                room = rng.choice(rooms)
+                npc = Character(f"PNJ{i}_{j}", "un passant", room, ["..."])
+                room.characters[npc.key] = npc
+                scheduler.register(npc)
+        player_room = town[0]
+        town_names = {room.name for room in town}
+        walk = random.Random(seed + 1)
+        start = time.perf_counter()
+        for _ in range(n_ticks):
+            exits = [room for room in player_room.exits.values() if room is not None and room.name in town_names]
+            player_room = walk.choice(exits)
+            scheduler.focus((player_room,))
+            scheduler.advance()
+        results[name] = {"tick_us": (time.perf_counter() - start) / n_ticks * 1e6,
+                         "frozen": scheduler.frozen_count()}
+        if scheduler_radius is not None:
+            # Le joueur descend dans le donjon : rattrapage des PNJ de la zone
+            start = time.perf_counter()
+            scheduler.focus((dungeon[0],))
+            caught_up = len(list(scheduler.advance()))
+            results[name]["enter_dungeon_us"] = (time.perf_counter() - start) * 1e6
+            results[name]["caught_up_moves"] = caught_up
+    return results
+
+
+def legacy_rest(game):
+    """Ancien 'rest' : 5 points d'endurance par commande, chacune suivie d'un tick du monde."""
+    player = game.player
+    player.stamina = min(100, player.stamina + 5)
+    game.output.print(f"\nVous vous reposez un instant... Votre endurance est maintenant à {player.stamina}%.\n")
+    game._advance_world()
+
+
+def bench_rest(n_rooms, n_npcs, n_rests):
+    """
+    Un joueur épuisé récupère toute son endurance : commandes 'rest'
+    successives de l'ancienne version contre un seul 'rest' qui fait
+    passer le temps de jeu d'un coup.
+    """
+    import game as game_module
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in ("legacy", "lazy"):
+                game = build_game(n_rooms, n_npcs)
+                player = game.player
+                if name == "lazy":
+                    player.clock = game.now
+                # Les PNJ éloignés du joueur sont gelés dès leur première échéance
+                for _ in range(100):
+                    game._advance_world()
+                commands = 0
+                start = time.perf_counter()
+                for _ in range(n_rests):
+                    player.stamina = 0.0
+                    while player.stamina < 100:
+                        if name == "legacy":
+                            legacy_rest(game)
+                        else:
+                            game.process_command("rest")
+                        commands += 1
+                elapsed = time.perf_counter() - start
+                results[name] = {"commands_per_rest": commands / n_rests,
+                                 "rest_us": elapsed / n_rests * 1e6}
+        # Lecture de l'endurance : même coût quel que soit le temps écoulé
+        player.stamina = 0.0
+        for elapsed in (1, 10**9):
+            game.time += elapsed
+            start = time.perf_counter()
+            for _ in range(100000):
+                player.stamina
+            results[f"read_after_{elapsed}_ns"] = (time.perf_counter() - start) / 100000 * 1e9
+            player.stamina = 0.0
+    finally:
+        game_module.DEBUG = debug
+    return results
+
+
+def descend(game, n_floors):
+    """Fait descendre le joueur de `n_floors` étages du donjon, en ramassant les objets rencontrés."""
+    for _ in range(n_floors):
+        room = game.player.current_room
+        if room.generated:
+            for direction in find_path(room, game.dungeon.stairs(room.floor)):
+                if game.player.stamina < 30:
+                    game.process_command("rest")
+                game.process_command(f"go {direction}")
+                inventory = game.player.current_room.inventory
+                if inventory:
+                    game.process_command("take " + next(iter(inventory)))
+        if game.player.stamina < 30:
+            game.process_command("rest")
+        game.process_command("go D")
+
+
+def bench_dungeon(depth, max_floors, seed=0):
+    """
+    Descente de `depth` étages du donjon : durée par étage, étages et
+    mémoire retenus, avec et sans éviction des étages lointains.
+    """
+    import game as game_module
+    results = {}
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    path = os.path.join(tempfile.gettempdir(), "tba-dungeon.sav")
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            for name, limit in (("unbounded", None), (f"max_floors={max_floors}", max_floors)):
+                game = Game("Bench", devnull, seed=seed)
+                game.setup()
+                game.dungeon.max_floors = limit
+                game.run_script(["go N", "go N", "go D"])
+                # Durée mesurée sur la première moitié de la descente, mémoire
+                # retenue sur la seconde (tracemalloc ralentit l'exécution)
+                half = depth // 2
+                start = time.perf_counter()
+                descend(game, half)
+                elapsed = time.perf_counter() - start
+                gc.collect()
+                tracemalloc.start()
+                descend(game, depth - half)
+                gc.collect()
+                retained, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[name] = {"floor_us": elapsed / half * 1e6,
+                                 "floors_in_memory": len(game.dungeon),
+                                 "retained_kib_per_floor": retained / 1024 / (depth - half),
+                                 "evictions": game.dungeon.evictions,
+                                 "save_bytes": savegame.save(game, path)}
+        os.remove(path)
+    finally:
+        game_module.DEBUG = debug
+    return results
+
+
+def bench_worldgen(n_rooms, topology, items, locked, n_npcs, n_quests, n_commands, mix, seed=0):
+    """
+    Génère un monde de `n_rooms` pièces (voir worldgen.py), puis y joue
+    une session scriptée, toutes les quêtes actives : durées de génération
+    et de mise en place, durées des commandes, des vérifications de quêtes
+    et du tick des PNJ.
+    """
+    import game as game_module
+    results = {}
+    item_kinds = [(name, f"un objet de test ({name})", 1.0) for name in BENCH_ITEMS]
+    options = dict(items=items, locked=locked, npcs=n_npcs, quests=n_quests, item_kinds=item_kinds, seed=seed)
+    start = time.perf_counter()
+    compiled = worldgen.generate(n_rooms, topology, **options)
+    results["generate_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    definition = json.dumps(worldgen.to_definition(compiled), ensure_ascii=False, separators=(",", ":"))
+    results["definition_s"] = time.perf_counter() - start
+    results["definition_mib"] = len(definition.encode("utf-8")) / 2 ** 20
+    del compiled, definition
+    gc.collect()
+    start = time.perf_counter()
+    world = worldgen.generate_world(n_rooms, topology, **options)
+    results["generate_world_s"] = time.perf_counter() - start
+
+    debug = game_module.DEBUG
+    game_module.DEBUG = False
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            metrics = Metrics()
+            start = time.perf_counter()
+            game = Game("Bench", sink, seed=seed, metrics=metrics, world=world)
+            game.setup()
+            for quest in game.player.quest_manager.get_all_quests():
+                game.player.quest_manager.activate_quest(quest.title)
+            results["setup_s"] = time.perf_counter() - start
+            script = scripted_session(mix, n_commands, n_npcs, seed)
+            start = time.perf_counter()
+            for command_string in script:
+                game.process_command(command_string)
+            results["commands_per_s"] = len(script) / (time.perf_counter() - start)
+    finally:
+        game_module.DEBUG = debug
+    results["series"] = {}
+    for (name, label), histogram in sorted(metrics.series.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        short = name[len("tba_"):-len("_duration_seconds")]
+        results["series"][f"{short}:{label}" if label is not None else short] = {
+            "count": histogram.count,
+            "mean_us": histogram.total / histogram.count * 1e6,
+            "p99_us": histogram.quantile(0.99) * 1e6,
+        }
+    return results
+
+
+def bench_worldcheck(n_rooms, topology, locked, seed=0):
+    """Durée de l'analyse du graphe (worldcheck.py) d'un monde généré de `n_rooms` pièces."""
+    definition = worldgen.to_definition(worldgen.generate(n_rooms, topology, items=0.5, locked=locked,
+                                                          quests=20, seed=seed))
+    gc.collect()
+    start = time.perf_counter()
+    report = worldcheck.analyze(definition, limit=0)
+    return {"analyze_s": time.perf_counter() - start, "summary": report["summary"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du moteur TBA")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    # Option commune à toutes les mesures
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", metavar="FICHIER", help="enregistrer les résultats en JSON ('-' : sortie standard)")
+
+    commands = sub.add_parser("commands", parents=[common], help="session scriptée : débit, latence, mémoire")
+    commands.add_argument("--rooms", type=int, default=10000)
+    commands.add_argument("--npcs", type=int, default=1000)
+    commands.add_argument("--items", type=int, default=2, help="objets par pièce")
+    commands.add_argument("--commands", type=int, default=20000)
+    commands.add_argument("--mix", default=DEFAULT_MIX, help="répartition des commandes")
+    commands.add_argument("--seed", type=int, default=0)
+
+    npc = sub.add_parser("npc", parents=[common], help="commandes/s avec une grande population de PNJ")
+    npc.add_argument("--rooms", type=int, default=10000)
+    npc.add_argument("--npcs", type=int, default=50000)
+    npc.add_argument("--commands", type=int, default=200)
+    npc.add_argument("--move-chance", type=float, default=0.5)
+
+    world = sub.add_parser("world", parents=[common], help="temps de chargement du monde")
+    world.add_argument("--rooms", type=int, default=50000)
+    world.add_argument("--repeat", type=int, default=5)
+
+    quests = sub.add_parser("quests", parents=[common], help="événements de quête traités par seconde")
+    quests.add_argument("--quests", type=int, default=500)
+    quests.add_argument("--events", type=int, default=5000)
+
+    sessions = sub.add_parser("sessions", parents=[common], help="mémoire par session")
+    sessions.add_argument("--rooms", type=int, default=10000)
+    sessions.add_argument("--sessions", type=int, default=20)
+
+    memory = sub.add_parser("memory", parents=[common], help="octets par pièce et par objet")
+    memory.add_argument("--rooms", type=int, default=100000)
+    memory.add_argument("--items", type=int, default=5, help="objets par pièce")
+    memory.add_argument("--kinds", type=int, default=50, help="sortes d'objets distinctes")
+
+    routing = sub.add_parser("routing", parents=[common], help="temps d'une requête de routage")
+    routing.add_argument("--rooms", type=int, default=100000)
+    routing.add_argument("--goals", type=int, default=20)
+    routing.add_argument("--queries", type=int, default=100000)
+
+    crowd_parser = sub.add_parser("crowd", parents=[common], help="temps d'un pas de simulation d'une foule")
+    crowd_parser.add_argument("--rooms", type=int, default=10000)
+    crowd_parser.add_argument("--npcs", type=int, default=1000000)
+    crowd_parser.add_argument("--steps", type=int, default=20)
+    crowd_parser.add_argument("--move-chance", type=float, default=0.5)
+
+    parser_bench = sub.add_parser("parser", parents=[common], help="lignes de commande analysées par seconde")
+    parser_bench.add_argument("--log", nargs="*", default=[], help="journaux de partie (replay.py) à analyser")
+    parser_bench.add_argument("--lines", type=int, default=1000000, help="nombre de lignes synthétiques sans --log")
+    parser_bench.add_argument("--repeat", type=int, default=1)
+
+    save = sub.add_parser("save", parents=[common], help="taille et durées d'une sauvegarde")
+    save.add_argument("--rooms", type=int, default=10000)
+    save.add_argument("--npcs", type=int, default=100)
+    save.add_argument("--items", type=int, default=2, help="objets par pièce")
+    save.add_argument("--commands", type=int, default=2000)
+    save.add_argument("--repeat", type=int, default=20)
+    save.add_argument("--seed", type=int, default=0)
+
+    journal = sub.add_parser("journal", parents=[common], help="coût du journal par commande et durée de la reprise")
+    journal.add_argument("--rooms", type=int, default=10000)
+    journal.add_argument("--npcs", type=int, default=100)
+    journal.add_argument("--items", type=int, default=2, help="objets par pièce")
+    journal.add_argument("--commands", type=int, default=5000)
+    journal.add_argument("--seed", type=int, default=0)
+
+    store = sub.add_parser("store", parents=[common], help="base SQLite : transaction par commande / écriture différée")
+    store.add_argument("--players", type=int, default=10000)
+    store.add_argument("--rounds", type=int, default=5, help="commandes par joueur")
+    store.add_argument("--interval", type=float, default=0.5, help="délai entre deux écritures (s)")
+
+    hibernate = sub.add_parser("hibernate", parents=[common], help="mémoire et latence avec mise en sommeil des sessions")
+    hibernate.add_argument("--sessions", type=int, default=5000)
+    hibernate.add_argument("--hot", type=int, default=500, help="parties gardées en mémoire")
+    hibernate.add_argument("--commands", type=int, default=20000)
+
+    interest = sub.add_parser("interest", parents=[common], help="durée d'un tick avec gestion de l'intérêt")
+    interest.add_argument("--town", type=int, default=100, help="pièces de la ville")
+    interest.add_argument("--town-npcs", type=int, default=200)
+    interest.add_argument("--dungeon", type=int, default=100000, help="pièces du donjon")
+    interest.add_argument("--dungeon-npcs", type=int, default=50000)
+    interest.add_argument("--ticks", type=int, default=200)
+    interest.add_argument("--radius", type=int, default=2)
+    dungeon = sub.add_parser("dungeon", parents=[common], help="descente dans le donjon : durée et mémoire par étage")
+    dungeon.add_argument("--depth", type=int, default=2000)
+    dungeon.add_argument("--max-floors", type=int, default=8)
+    rest = sub.add_parser("rest", parents=[common], help="coût d'une récupération complète de l'endurance")
+    rest.add_argument("--rooms", type=int, default=10000)
+    rest.add_argument("--npcs", type=int, default=1000)
+    rest.add_argument("--rests", type=int, default=200)
+    generated = sub.add_parser("worldgen", parents=[common], help="génération d'un grand monde et session scriptée")
+    generated.add_argument("--rooms", type=int, default=1000000)
+    generated.add_argument("--topology", choices=worldgen.TOPOLOGIES, default="small-world")
+    generated.add_argument("--items", type=float, default=0.5, help="nombre moyen d'objets par pièce")
+    generated.add_argument("--locked", type=float, default=0.01, help="proportion de pièces verrouillées")
+    generated.add_argument("--npcs", type=int, default=10000)
+    generated.add_argument("--quests", type=int, default=100)
+    generated.add_argument("--commands", type=int, default=5000)
+    generated.add_argument("--mix", default=DEFAULT_MIX, help="répartition des commandes")
+    generated.add_argument("--seed", type=int, default=0)
+    check = sub.add_parser("worldcheck", parents=[common], help="durée de l'analyse du graphe d'un monde")
+    check.add_argument("--rooms", type=int, default=100000)
+    check.add_argument("--topology", choices=worldgen.TOPOLOGIES, default="tree")
+    check.add_argument("--locked", type=float, default=0.05, help="proportion de pièces verrouillées")
+
+    args = parser.parse_args()
+    if args.bench == "commands":
+        results = bench_commands(args.rooms, args.npcs, args.items, args.commands, parse_mix(args.mix), args.seed)
+        print(f"{args.rooms} pièces, {args.npcs} PNJ, {args.commands} commandes ({args.mix})")
+        print(f"  {results['commands_per_s']:10.1f} commandes/s")
+        print(f"  latence p50 {results['p50_us']:.1f} µs, p90 {results['p90_us']:.1f} µs, "
+              f"p99 {results['p99_us']:.1f} µs, max {results['max_us']:.1f} µs")
+        print(f"  pic de mémoire {results['peak_memory_kib']:.1f} Kio")
+        for word, stats in results["per_command"].items():
+            print(f"  {word:<10} {stats['count']:8d} x  p50 {stats['p50_us']:10.1f} µs  p99 {stats['p99_us']:10.1f} µs")
+    elif args.bench == "npc":
+        results = bench_npc(args.rooms, args.npcs, args.commands, args.move_chance)
+        print(f"{args.rooms} pièces, {args.npcs} PNJ, move_chance={args.move_chance}")
+        for name, rate in results.items():
+            print(f"  {name:<20} {rate:10.1f} commandes/s")
+    elif args.bench == "world":
+        results = bench_world_load(args.rooms, args.repeat)
+        print(f"{args.rooms} pièces")
+        for name, seconds in results.items():
+            print(f"  {name:<10} {seconds * 1000:10.1f} ms")
+    elif args.bench == "sessions":
+        results = bench_session_memory(args.rooms, args.sessions)
+        print(f"{args.rooms} pièces, {args.sessions} sessions")
+        for name, size in results.items():
+            print(f"  {name:<30} {size / 1024:10.1f} Kio")
+    elif args.bench == "memory":
+        results = bench_memory(args.rooms, args.items, args.kinds)
+        print(f"{args.rooms} pièces, {args.items} objets par pièce, {args.kinds} sortes d'objets")
+        for name, size in results.items():
+            print(f"  {name:<16} {size:8.1f} octets")
+    elif args.bench == "routing":
+        results = bench_routing(args.rooms, args.goals, args.queries)
+        print(f"{args.rooms} pièces, {args.goals} destinations, {args.queries} requêtes")
+        for name, seconds in results.items():
+            print(f"  {name:<38} {seconds * 1e6:12.2f} µs")
+    elif args.bench == "quests":
+        results = bench_quests(args.quests, args.events)
+        print(f"{args.quests} quêtes actives, {args.events} événements")
+        for name, rate in results.items():
+            print(f"  {name:<10} {rate:10.1f} événements/s")
+    elif args.bench == "crowd":
+        if not crowd.available():
+            print("numpy n'est pas installé : seule la mesure du scheduler est faite")
+        results = bench_crowd(args.rooms, args.npcs, args.steps, args.move_chance)
+        print(f"{args.rooms} pièces, move_chance={args.move_chance}")
+        for name, seconds in results.items():
+            print(f"  {name:<28} {seconds * 1000:10.2f} ms/pas")
+
+    elif args.bench == "parser":
+        lines = replay_log_lines(args.log) if args.log else synthetic_lines(args.lines)
+        results = bench_parser(lines, args.repeat)
+        print(f"{len(lines) * args.repeat} lignes")
+        for name, rate in results.items():
+            print(f"  {name:<10} {rate:12.0f} lignes/s")
+
+    elif args.bench == "save":
+        results = bench_save(args.rooms, args.npcs, args.items, args.commands, args.repeat, args.seed)
+        print(f"{results['rooms']} pièces ({results['modified_rooms']} propres à la session), "
+              f"{args.npcs} PNJ, {args.commands} commandes")
+        print(f"  sauvegarde   {results['bytes']:10d} octets")
+        print(f"  écriture     {results['save_ms']:10.2f} ms")
+        print(f"  chargement   {results['load_ms']:10.2f} ms")
+        print(f"  état restauré identique : {'oui' if results['identical'] else 'non'}")
+
+    elif args.bench == "journal":
+        results = bench_journal(args.rooms, args.npcs, args.items, args.commands, args.seed)
+        print(f"{args.rooms} pièces, {args.npcs} PNJ, {args.commands} commandes")
+        print(f"  sans persistance          {results['none_us']:10.1f} µs/commande")
+        print(f"  journal                   {results['journal_us']:10.1f} µs/commande")
+        print(f"  sauvegarde complète       {results['full_save_us']:10.1f} µs/commande")
+        print(f"  journal : {results['journal_records']} enregistrements, {results['journal_bytes']} octets")
+        print(f"  reprise {results['recovery_ms']:.2f} ms, état identique : {'oui' if results['identical'] else 'non'}")
+
+    elif args.bench == "interest":
+        results = bench_interest(args.town, args.town_npcs, args.dungeon, args.dungeon_npcs, args.ticks, args.radius)
+        print(f"ville {args.town} pièces / {args.town_npcs} PNJ, donjon {args.dungeon} pièces / "
+              f"{args.dungeon_npcs} PNJ, {args.ticks} ticks")
+        for name, stats in results.items():
+            print(f"  {name:<10} {stats['tick_us']:10.1f} µs/tick  {stats['frozen']:7d} PNJ gelés")
+            if "enter_dungeon_us" in stats:
+                print(f"  {'':<10} entrée dans le donjon : {stats['enter_dungeon_us']:.0f} µs, "
+                      f"{stats['caught_up_moves']} PNJ rattrapés déplacés")
+
+    elif args.bench == "hibernate":
+        results = bench_hibernate(args.sessions, args.hot, args.commands)
+        print(f"{args.sessions} sessions, {args.commands} commandes")
+        for name, stats in results.items():
+            print(f"  {name:<10} {stats['hot']:6d} en mémoire  {stats['resident_kib'] / 1024:8.1f} Mio "
+                  f"(pic {stats['peak_kib'] / 1024:.1f} Mio)  {stats['commands_per_s']:8.0f} commandes/s  "
+                  f"p50 {stats['p50_us']:.0f} µs  p99 {stats['p99_us']:.0f} µs")
+        lru = results["lru"]
+        print(f"  {lru['hibernations']} mises en sommeil, {lru['wakeups']} réveils, "
+              f"{lru['disk_bytes_per_cold_session']:.0f} octets par session en sommeil")
+
+    elif args.bench == "store":
+        results = bench_store(args.players, args.rounds, args.interval)
+        print(f"{args.players} joueurs, {args.rounds} commandes chacun, écriture toutes les {args.interval} s")
+        for name, stats in results.items():
+            print(f"  {name:<14} {stats['commands_per_s']:10.0f} commandes/s  "
+                  f"{stats['transactions']:7d} transactions  {stats['rows']:7d} lignes écrites")
+        print(f"  plus longue écriture différée {results['write_behind']['max_write_ms']:.1f} ms, "
+              f"{results['write_behind']['stored_players']} joueurs en base")
+
+    elif args.bench == "rest":
+        results = bench_rest(args.rooms, args.npcs, args.rests)
+        print(f"{args.rooms} pièces, {args.npcs} PNJ : récupération complète de l'endurance")
+        for name in ("legacy", "lazy"):
+            stats = results[name]
+            print(f"  {name:<8} {stats['commands_per_rest']:5.1f} commandes  {stats['rest_us']:10.1f} µs")
+        print(f"  lecture de l'endurance : {results['read_after_1_ns']:.0f} ns après 1 unité de temps, "
+              f"{results['read_after_1000000000_ns']:.0f} ns après 10^9")
+
+    elif args.bench == "dungeon":
+        results = bench_dungeon(args.depth, args.max_floors)
+        print(f"descente de {args.depth} étages")
+        for name, stats in results.items():
+            print(f"  {name:<14} {stats['floor_us']:8.1f} µs/étage  {stats['floors_in_memory']:6d} étages en mémoire  "
+                  f"{stats['retained_kib_per_floor']:6.2f} Kio retenus par étage  sauvegarde {stats['save_bytes']} octets")
+
+    elif args.bench == "worldgen":
+        results = bench_worldgen(args.rooms, args.topology, args.items, args.locked, args.npcs, args.quests,
+                                 args.commands, parse_mix(args.mix), args.seed)
+        print(f"{args.rooms} pièces ({args.topology}), {args.npcs} PNJ, {args.quests} quêtes, {args.commands} commandes")
+        print(f"  génération (forme compilée)  {results['generate_s']:8.2f} s")
+        print(f"  fichier de monde             {results['definition_s']:8.2f} s  ({results['definition_mib']:.1f} Mio)")
+        print(f"  génération (objets)          {results['generate_world_s']:8.2f} s")
+        print(f"  mise en place de la partie   {results['setup_s']:8.2f} s")
+        print(f"  {results['commands_per_s']:10.1f} commandes/s")
+        for title, stats in results["series"].items():
+            print(f"  {title:<28} {stats['count']:8d} x  moyenne {stats['mean_us']:10.1f} µs  p99 <= {stats['p99_us']:10.1f} µs")
+
+    elif args.bench == "worldcheck":
+        results = bench_worldcheck(args.rooms, args.topology, args.locked)
+        print(f"{args.rooms} pièces ({args.topology}) : analyse en {results['analyze_s']:.2f} s")
+        for name, count in results["summary"].items():
+            print(f"  {name:<24} {count:8d}")
+
+    if args.json:
+        report = {
+            "benchmark": args.bench,
+            "parameters": {key: value for key, value in vars(args).items() if key not in ("bench", "json")},
+            "python": platform.python_version(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }
+        if args.json == "-":
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
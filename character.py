@@ -1,12 +1,26 @@
+import math
 import random
 
 class Character:
+    __slots__ = ("name", "description", "current_room", "msgs", "original_msgs", "key",
+                 "move_chance", "world_state", "hp", "quest_stage", "inventory")
+
     def __init__(self, name, description, current_room, msgs):
         self.name = name
         self.description = description
         self.current_room = current_room
         self.msgs = msgs
         self.original_msgs = list(msgs) # Aaspect cyclique
+        # Clé du PNJ dans le dictionnaire `characters` des pièces
+        self.key = name.lower()
+        # Probabilité de se déplacer à chaque tick
+        self.move_chance = 0.5
+        # État de la session (WorldState) quand le monde est partagé
+        self.world_state = None
+        # Caractéristiques optionnelles, renseignées par la définition du monde
+        self.hp = None
+        self.quest_stage = 0
+        self.inventory = {}
 
     def __str__(self):
         return f"{self.name} : {self.description}"
@@ -33,49 +47,55 @@ class Character:
         
         return self.msgs.pop(0)
 
-    def move(self):
+    def next_delay(self, rng=random):
+        """
+        Tire le nombre de ticks avant la prochaine tentative de déplacement.
+
+        Un PNJ qui a `move_chance` chances de bouger à chaque tick attend
+        un nombre de ticks qui suit une loi géométrique : le scheduler
+        peut donc le réveiller directement à la bonne échéance.
+        """
+        if self.move_chance >= 1:
+            return 1
+        if self.move_chance <= 0:
+            return math.inf
+        return 1 + int(math.log(1.0 - rng.random()) / math.log(1.0 - self.move_chance))
+
+    def wander(self, rng=random):
+        # Récupérer les sorties possibles (on filtre les None)
+        exit_names = [dir for dir, room in self.current_room.exits.items() if room is not None]
+        if not exit_names:
+            return False
+        chosen_dir = rng.choice(exit_names)
+        next_room = self.current_room.exits[chosen_dir]
+        if self.world_state is not None:
+            # Les PNJ n'entrent que dans les pièces propres à la session
+            next_room = self.world_state.mutable(next_room)
+
+        # Retire le perso de la pièce actuelle (sans erreur s'il n'y est pas)
+        self.current_room.remove_character(self)
+
+        # On le place dans la nouvelle pièce
+        self.current_room = next_room
+        next_room.add_character(self)
+        return True
+
+    def move(self, rng=random):
         # 1 chance sur 2 de bouger
-        if random.choice([True, False]):
-            # Récupérer les sorties possibles (on filtre les None)
-            exit_names = [direction for direction, room in self.current_room.exits.items() if room is not None]
-            
-            if exit_names:
-                chosen_direction = random.choice(exit_names)
-                next_room = self.current_room.exits[chosen_direction]
-                
-                # Retirer le PNJ de l'ancienne pièce et l'ajouter à la nouvelle
-                self.current_room.characters.pop(self.name, None)
-                self.current_room.characters[self.name] = self
-                self.current_room = next_room
-                return True
-        return False
-    
-    def move(self):
-        if random.choice([True, False]):
-            exit_names = [dir for dir, room in self.current_room.exits.items() if room is not None]
-            if exit_names:
-                chosen_dir = random.choice(exit_names)
-                next_room = self.current_room.exits[chosen_dir]
-                
-                # Utilise pop pour retirer le perso en toute sécurité
-                self.current_room.characters.pop(self.name, None)
-                
-                # On le place dans la nouvelle pièce
-                self.current_room = next_room
-                self.current_room.characters[self.name] = self
-                return True
+        if rng.random() < self.move_chance:
+            return self.wander(rng)
         return False
 
     # Exemple de ce que devrait faire Germain quand on lui parle
     def talk_to_germain(player):
         qm = player.quest_manager
-        quest = qm.get_quest_by_title("La Boussole de Germain")
+        quest = qm.get_quest("La Boussole de Germain")
 
         if not quest: # La quête n'existe même pas encore
             return "Bonjour ! Je ne vous connais pas."
 
         if not quest.is_active:
-            quest.activate()
+            quest.activate(player)
             return "On m'a volé ma boussole ! Aidez-moi !"
 
         if "Boussole en argent" in player.inventory:
@@ -0,0 +1,121 @@
+# Define the Crowd class.
+#
+# Nécessite numpy (dépendance optionnelle) : pip install numpy
+
+try:
+    import numpy as np
+except ImportError:  # le jeu fonctionne sans foule
+    np = None
+
+
+def available():
+    """Indique si le mode foule peut être utilisé (numpy installé)."""
+    return np is not None
+
+
+class Crowd:
+    """
+    Classe représentant une population anonyme de PNJ simulée en bloc.
+
+    Les positions des passants sont stockées dans un tableau d'entiers
+    (indice de pièce) et le graphe des pièces sous forme CSR (pour la
+    pièce i, ses voisines sont `indices[indptr[i]:indptr[i + 1]]`). Un
+    pas de simulation tire tous les nombres aléatoires d'un coup et met à
+    jour toutes les positions par opérations vectorielles, avec la même
+    règle que `Character.move` : chaque passant a `move_chance` chances
+    de prendre une sortie au hasard.
+
+    Les PNJ nommés (Germain, Gandalf...) restent des `Character` gérés par
+    le scheduler ; la foule ne sert qu'à l'ambiance des lieux peuplés.
+
+    Attributs :
+    rooms : list
+        Les pièces du monde, dans l'ordre de leurs indices.
+    positions : numpy.ndarray
+        L'indice de la pièce de chaque passant.
+    move_chance : float
+        Probabilité qu'un passant se déplace à chaque pas.
+
+    Exemples :
+    >>> from room import Room
+    >>> a, b = Room("A", "a"), Room("B", "b")
+    >>> a.exits = {"N": b, "S": None}
+    >>> crowd = Crowd([a, b], move_chance=1.0, seed=1)
+    >>> crowd.add(a, 1000)
+    >>> crowd.count_in(a), crowd.count_in(b)
+    (1000, 0)
+    >>> crowd.step()
+    >>> crowd.count_in(a), crowd.count_in(b)
+    (0, 1000)
+    >>> crowd.step()
+    >>> crowd.count_in(b), crowd.count_in(Room("C", "c"))
+    (1000, 0)
+    """
+
+    # Define the constructor.
+    def __init__(self, rooms, move_chance=0.5, seed=None, graph=None):
+        if np is None:
+            raise ImportError("Le mode foule nécessite numpy (pip install numpy).")
+        self.rooms = list(rooms)
+        self.move_chance = move_chance
+        self.rng = np.random.default_rng(seed)
+        # Le graphe ne dépend que de la topologie : il peut être partagé
+        # entre les sessions (voir build_graph)
+        if graph is None:
+            graph = self.build_graph(self.rooms)
+        self._index, self.indptr, self.indices = graph
+        self.degree = np.diff(self.indptr)
+
+        self.positions = np.empty(0, dtype=np.int32)
+        # Effectifs par pièce, recalculés à la demande après chaque pas
+        self._counts = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    @staticmethod
+    def build_graph(rooms):
+        """Renvoie (indices des pièces par nom, indptr, indices) : les sorties au format CSR."""
+        index = {room.name: i for i, room in enumerate(rooms)}
+        indptr = [0]
+        indices = []
+        for room in rooms:
+            for next_room in room.exits.values():
+                if next_room is not None:
+                    indices.append(index[next_room.name])
+            indptr.append(len(indices))
+        return index, np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32)
+
+    def add(self, room, count):
+        """Ajoute `count` passants dans `room`."""
+        new = np.full(count, self._index[room.name], dtype=np.int32)
+        self.positions = np.concatenate((self.positions, new))
+        self._counts = None
+
+    def count_in(self, room):
+        """
+        Renvoie le nombre de passants présents dans `room`, 0 pour une
+        pièce hors du graphe de la foule (par exemple une pièce du donjon).
+        """
+        i = self._index.get(room.name)
+        if i is None:
+            return 0
+        if self._counts is None:
+            self._counts = np.bincount(self.positions, minlength=len(self.rooms))
+        return int(self._counts[i])
+
+    def step(self):
+        """Fait avancer toute la foule d'un pas."""
+        rng = self.rng
+        moving = np.flatnonzero(rng.random(len(self.positions)) < self.move_chance)
+        current = self.positions[moving]
+        degree = self.degree[current]
+        # Les passants dans une pièce sans sortie ne bougent pas
+        has_exit = degree > 0
+        moving = moving[has_exit]
+        current = current[has_exit]
+        degree = degree[has_exit]
+        # Choix uniforme d'une sortie parmi celles de la pièce
+        choice = (rng.random(len(moving)) * degree).astype(np.int64)
+        self.positions[moving] = self.indices[self.indptr[current] + choice]
+        self._counts = None
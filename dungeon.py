@@ -0,0 +1,331 @@
+# Description: donjon vertical généré à la demande.
+#
+# Sous la pièce d'entrée (définie par le champ "dungeon" du fichier de
+# monde), le donjon descend sans limite d'étage en étage. Un étage (pièces,
+# sorties, objets, gardiens) est entièrement déterminé par la graine de la
+# partie et son numéro : il n'est construit (matérialisé) que lorsque le
+# joueur arrive à l'étage voisin, par les sorties U/D.
+#
+# Seuls les `max_floors` étages visités le plus récemment restent en
+# mémoire. Un étage évincé ne laisse qu'un petit différentiel : l'état des
+# pièces dont le contenu diffère de la génération (objets pris ou déposés).
+# S'il est de nouveau atteint, il est régénéré depuis la graine puis le
+# différentiel lui est appliqué.
+#
+# Les pièces d'un étage évincé sont vidées (sorties, objets, personnages)
+# mais peuvent encore être désignées ailleurs (historique du joueur, pièce
+# mémorisée d'un Beamer) : WorldState.room les remplace par la pièce
+# matérialisée correspondante.
+
+import random
+from collections import OrderedDict
+from types import MappingProxyType
+
+from room import Room
+from item import Item
+from character import Character
+
+# Nombre d'étages gardés en mémoire
+MAX_FLOORS = 8
+# Nombre de pièces d'un étage (bornes incluses)
+FLOOR_ROOMS = (4, 9)
+# Déplacements sur la grille d'un étage
+STEPS = {"N": (0, 1), "S": (0, -1), "E": (1, 0), "O": (-1, 0)}
+OPPOSITE = {"N": "S", "S": "N", "E": "O", "O": "E", "U": "D", "D": "U"}
+# Contenu des pièces d'un étage évincé (en lecture seule : elles ne doivent plus servir)
+EMPTY = MappingProxyType({})
+
+DESCRIPTIONS = (
+    "une salle voûtée aux murs suintants",
+    "un couloir étroit où résonnent vos pas",
+    "une crypte encombrée d'ossements",
+    "une galerie taillée à même la roche",
+    "une salle au sol couvert de gravats",
+    "un caveau où flotte une odeur de cire froide",
+    "une grotte où goutte une eau glacée",
+    "une ancienne armurerie pillée",
+)
+# Objets trouvés dans le donjon : (nom, description, poids)
+LOOT = (
+    ("Torche", "Une torche de résine", 0.5),
+    ("Pièce d'or ancienne", "Frappée à l'effigie d'un roi oublié", 0.01),
+    ("Os de rat", "Rongé jusqu'à la moelle", 0.05),
+    ("Potion de sang de chevreuil", "Accroît l'endurance et sa régénération", 0.3),
+    ("Dague rouillée", "Encore tranchante", 0.8),
+)
+# Gardiens : (nom, description, messages)
+GUARDIANS = (
+    ("Squelette", "un squelette qui claque des dents", ["Clac... clac...", "Personne ne remonte d'ici."]),
+    ("Gobelin", "un gobelin méfiant", ["Ce trésor est à moi !", "Va-t'en, humain."]),
+    ("Spectre", "une silhouette translucide", ["Plus bas... toujours plus bas...", "Tu n'aurais pas dû venir."]),
+)
+
+
+class DungeonRoom(Room):
+    """
+    Pièce d'un étage du donjon, repérée par son étage et son indice dans l'étage.
+    """
+
+    __slots__ = ("floor", "index")
+
+    generated = True
+
+    def __init__(self, name, description, floor, index):
+        super().__init__(name, description)
+        self.floor = floor
+        self.index = index
+
+    @property
+    def ordinal(self):
+        """Numéro de la pièce parmi toutes celles du donjon (identifiant des sauvegardes)."""
+        return (self.floor - 1) * FLOOR_ROOMS[1] + self.index
+
+
+def generate_floor(seed, floor):
+    """
+    Renvoie la définition de l'étage `floor` : une liste de (description,
+    sorties {direction: indice}, objets {nom: Item}, gardien ou None).
+
+    La pièce 0 mène à l'étage supérieur (U), la dernière à l'étage
+    inférieur (D). Même graine et même étage donnent toujours le même étage.
+
+    >>> rooms = generate_floor(1, 3)
+    >>> rooms == generate_floor(1, 3), FLOOR_ROOMS[0] <= len(rooms) <= FLOOR_ROOMS[1]
+    (True, True)
+    >>> all(rooms[j][1][OPPOSITE[d]] == i for i, room in enumerate(rooms) for d, j in room[1].items())
+    True
+    """
+    rng = random.Random(f"{seed}:dungeon:{floor}")
+    n_rooms = rng.randint(*FLOOR_ROOMS)
+    # Marche aléatoire sur une grille : chaque nouvelle pièce est reliée
+    # à une pièce existante, l'étage est donc connexe
+    cells = {(0, 0): 0}
+    positions = [(0, 0)]
+    exits = [{}]
+    while len(positions) < n_rooms:
+        i = rng.randrange(len(positions))
+        direction = rng.choice("NSEO")
+        dx, dy = STEPS[direction]
+        cell = (positions[i][0] + dx, positions[i][1] + dy)
+        if cell in cells:
+            continue
+        cells[cell] = j = len(positions)
+        positions.append(cell)
+        exits.append({OPPOSITE[direction]: i})
+        exits[i][direction] = j
+
+    loot_chance = min(0.6, 0.2 + 0.02 * floor)
+    rooms = []
+    for i in range(n_rooms):
+        items = {}
+        if rng.random() < loot_chance:
+            item = Item.prototype(*rng.choice(LOOT))
+            items[item.name] = item
+        rooms.append((rng.choice(DESCRIPTIONS), exits[i], items, None))
+    if rng.random() < 0.5:
+        i = rng.randrange(1, n_rooms)
+        description, room_exits, items, _ = rooms[i]
+        rooms[i] = (description, room_exits, items, rng.choice(GUARDIANS))
+    return rooms
+
+
+class Dungeon:
+    """
+    Classe représentant le donjon d'une partie.
+
+    Le donjon appartient à l'état de la session (`WorldState.dungeon`) :
+    ses pièces ne sont pas partagées et sont modifiées directement.
+    `Game` appelle `visit` après chaque commande qui fait avancer le
+    monde, avec la pièce du joueur : les étages voisins de celui du joueur
+    sont matérialisés et les étages en trop évincés.
+
+    Le premier étage, l'étage du joueur, ses voisins et les étages où se
+    trouve un PNJ du monde ne sont jamais évincés.
+
+    Attributs :
+    state : WorldState
+        L'état de la session.
+    entrance : Room
+        La pièce d'entrée du donjon (sa sortie D mène au premier étage).
+    seed : int or str
+        La graine des étages.
+    max_floors : int or None
+        Le nombre d'étages gardés en mémoire (None : pas de limite).
+    materializations : int
+        Le nombre d'étages construits.
+    evictions : int
+        Le nombre d'étages évincés.
+
+    Exemples :
+    >>> from world import get_world, WorldState
+    >>> world = get_world()
+    >>> state = WorldState(world)
+    >>> dungeon = Dungeon(state, world.get_room("Sous_sol"), seed=1, max_floors=4)
+    >>> state.room(world.get_room("Sous_sol")).exits["D"].name, len(dungeon)
+    ('Donjon-1-0', 1)
+    >>> room = dungeon.stairs(2)
+    >>> room.put_item("Pomme", Item.prototype("Pomme", "une pomme", 0.1))
+    >>> for floor in range(1, 7):
+    ...     dungeon.visit(dungeon.stairs(floor))
+    >>> dungeon.floors(), dungeon.evictions
+    ([1, 5, 6, 7], 3)
+
+    L'étage 2 est régénéré avec son différentiel ; l'ancienne pièce désigne
+    la nouvelle :
+
+    >>> dungeon.visit(dungeon.stairs(2))
+    >>> dungeon.floors(), state.room(room) is room, "Pomme" in state.room(room).inventory
+    ([1, 2, 3, 6], False, True)
+    """
+
+    # Define the constructor.
+    def __init__(self, state, entrance, seed, max_floors=MAX_FLOORS):
+        self.state = state
+        self.seed = seed
+        self.max_floors = max_floors
+        self.materializations = 0
+        self.evictions = 0
+        # Étages matérialisés (pièces et gardiens), du moins au plus récemment visité
+        self._floors = OrderedDict()
+        # Étages évincés : étage -> {indice: (verrouillée, objets)}
+        self._diffs = {}
+        state.dungeon = self
+        self.entrance = state.mutable(entrance)
+        self._ensure(1)
+
+    def __len__(self):
+        return len(self._floors)
+
+    def floors(self):
+        """Renvoie la liste triée des étages matérialisés."""
+        return sorted(self._floors)
+
+    def stairs(self, floor):
+        """Renvoie la pièce de l'étage `floor` qui mène à l'étage inférieur."""
+        return self._ensure(floor)[0][-1]
+
+    def resolve(self, room):
+        """Renvoie la pièce matérialisée correspondant à `room` (pièce du donjon)."""
+        floor = self._floors.get(room.floor)
+        if floor is None:
+            floor = self._ensure(room.floor)
+        return floor[0][room.index]
+
+    def visit(self, room):
+        """Note que le joueur est dans `room` : prépare les étages voisins et évince les autres."""
+        if not room.generated:
+            return
+        current = room.floor
+        for floor in (current - 1, current + 1, current):
+            if floor >= 1:
+                self._ensure(floor)
+                self._floors.move_to_end(floor)
+        if self.max_floors is None:
+            return
+        for floor in list(self._floors):
+            if len(self._floors) <= self.max_floors:
+                break
+            if floor == 1 or abs(floor - current) <= 1 or self._occupied(floor):
+                continue
+            self._evict(floor)
+
+    def changes(self):
+        """
+        Renvoie l'état des pièces dont le contenu diffère de la génération :
+        liste de (numéro de la pièce, verrouillée, objets).
+        """
+        changes = []
+        for floor, diff in self._diffs.items():
+            for index, (locked, items) in diff.items():
+                changes.append(((floor - 1) * FLOOR_ROOMS[1] + index, locked, items))
+        for floor, (rooms, _) in self._floors.items():
+            for index, (locked, items) in self._diff(floor, rooms).items():
+                changes.append((rooms[index].ordinal, locked, items))
+        return changes
+
+    def room(self, ordinal):
+        """Renvoie la pièce de numéro `ordinal` (voir DungeonRoom.ordinal)."""
+        floor, index = divmod(ordinal, FLOOR_ROOMS[1])
+        rooms = self._ensure(floor + 1)[0]
+        if index >= len(rooms):
+            raise IndexError(f"Pas de pièce {ordinal} dans le donjon.")
+        return rooms[index]
+
+    def _ensure(self, floor):
+        entry = self._floors.get(floor)
+        if entry is None:
+            entry = self._floors[floor] = self._materialize(floor)
+        return entry
+
+    def _materialize(self, floor):
+        spec = generate_floor(self.seed, floor)
+        rooms = []
+        guardians = []
+        for i, (description, _, items, guardian) in enumerate(spec):
+            room = DungeonRoom(f"Donjon-{floor}-{i}", f"{description} (niveau -{floor}).", floor, i)
+            room.inventory = dict(items)
+            if guardian is not None:
+                name, npc_description, msgs = guardian
+                npc = Character(name, npc_description, room, list(msgs))
+                npc.move_chance = 0
+                room.add_character(npc)
+                guardians.append(npc)
+            rooms.append(room)
+        for room, (_, exits, _, _) in zip(rooms, spec):
+            room.exits = {direction: rooms[i] for direction, i in exits.items()}
+        for index, (locked, items) in self._diffs.pop(floor, {}).items():
+            rooms[index].locked = locked
+            rooms[index].inventory = dict(items)
+        # Escaliers vers les étages voisins déjà matérialisés
+        upper = self.entrance if floor == 1 else self._stairs_if_present(floor - 1)
+        if upper is not None:
+            self._set_exit(upper, "D", rooms[0])
+            rooms[0].exits["U"] = upper
+        lower = self._floors.get(floor + 1)
+        if lower is not None:
+            rooms[-1].exits["D"] = lower[0][0]
+            lower[0][0].set_exit("U", rooms[-1])
+        self.materializations += 1
+        return rooms, guardians
+
+    def _set_exit(self, room, direction, target):
+        # L'entrée est une pièce du monde : sa sortie passe par la table de
+        # routage de la session, qui invalide les chemins concernés
+        routing = self.state.routing
+        if room is self.entrance and routing is not None:
+            routing.set_exit(room, direction, target)
+        else:
+            room.set_exit(direction, target)
+
+    def _stairs_if_present(self, floor):
+        entry = self._floors.get(floor)
+        return entry[0][-1] if entry is not None else None
+
+    def _occupied(self, floor):
+        # Un PNJ du monde (géré par le scheduler) empêche l'éviction
+        rooms, guardians = self._floors[floor]
+        return any(npc not in guardians for room in rooms for npc in room.characters.values())
+
+    def _diff(self, floor, rooms):
+        diff = {}
+        for room, (_, _, items, _) in zip(rooms, generate_floor(self.seed, floor)):
+            if room.locked or room.inventory != items:
+                diff[room.index] = (room.locked, dict(room.inventory))
+        return diff
+
+    def _evict(self, floor):
+        rooms, _ = self._floors.pop(floor)
+        diff = self._diff(floor, rooms)
+        if diff:
+            self._diffs[floor] = diff
+        upper = self.entrance if floor == 1 else self._stairs_if_present(floor - 1)
+        if upper is not None:
+            self._set_exit(upper, "D", None)
+        lower = self._floors.get(floor + 1)
+        if lower is not None:
+            lower[0][0].set_exit("U", None)
+        # Les pièces encore désignées ailleurs ne retiennent plus le reste de l'étage
+        for room in rooms:
+            room.exits = room.inventory = room.characters = room.containers = EMPTY
+            room._cache = None
+        self.evictions += 1
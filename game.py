@@ -3,28 +3,199 @@
 
 DEBUG = True # À mettre à False pour la version finale
 
-from room import Room
+# Autres mots reconnus pour les commandes
+ALIASES = {
+    "aide": "help", "?": "help",
+    "quitter": "quit",
+    "aller": "go",
+    "l": "look", "regarder": "look",
+    "i": "check", "inventaire": "check",
+    "prendre": "take",
+    "poser": "drop",
+    "parler": "talk",
+    "utiliser": "use",
+    "retour": "back",
+    "voyager": "travel",
+    "sauver": "save", "sauvegarder": "save",
+}
+# Commandes après lesquelles le monde n'avance pas
+NO_TICK = ("talk", "stats", "save", "load")
+# Rayon d'intérêt (en sorties) autour du joueur : les PNJ plus éloignés
+# sont gelés et rattrapés quand il s'approche (voir scheduler.py)
+INTEREST_RADIUS = 1
+# Analyseurs partagés, par liste de mots de commande
+_PARSERS = {}
+
+import argparse
+import io
+import random
+import time
+
 from player import Player
 from command import Command
 from actions import Actions
-from item import Beamer
-from character import Character
-from quest import Quest
+from scheduler import Scheduler
+from world import get_world, WorldState
+from metrics import Metrics
+from output import OutputSink
+from parser import CommandParser
 
 class Game:
+    """
+    Classe représentant une partie.
+
+    Une partie peut être jouée dans un terminal (`play`) ou pilotée sans
+    interaction : le nom du joueur et la sortie (tout objet possédant une
+    méthode `write`) sont alors passés en paramètres, et `run_script`
+    exécute une suite de commandes en renvoyant le texte produit.
+
+    Exemples :
+    >>> game = Game("Alice", io.StringIO())
+    >>> game.setup()
+    >>> game.player.name
+    'Alice'
+    >>> output = game.run_script(["look", "go N", "quit"])
+    >>> "marécage" in output and "Merci Alice" in output
+    True
+    >>> game.finished
+    True
+
+    Le hasard (déplacements des PNJ, vols...) est tiré de générateurs
+    dérivés de `seed` : deux parties de même graine recevant les mêmes
+    commandes produisent exactement la même sortie.
+
+    >>> a, b = Game("Alice", seed=42), Game("Alice", seed=42)
+    >>> a.setup(); b.setup()
+    >>> commands = ["go N", "go E", "look", "go O", "look"]
+    >>> a.run_script(commands) == b.run_script(commands)
+    True
+
+    Le temps de jeu (`now`) avance d'une unité par commande qui fait
+    avancer le monde, ou suit `clock` (par exemple time.monotonic) si
+    elle est donnée ; l'endurance du joueur en dépend.
+
+    >>> game = Game("Alice", seed=1)
+    >>> game.setup()
+    >>> _ = game.run_script(["go N", "look"])
+    >>> game.now(), game.player.stamina
+    (2, 92.0)
+    """
 
     # Constructor
-    def __init__(self):
+    def __init__(self, player_name=None, output=None, world_file=None, seed=None, metrics=None, clock=None,
+                 world=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
         self.finished = False
+        self.world_file = world_file
+        # Monde déjà chargé (par exemple généré par worldgen.py), à la place
+        # de celui décrit par `world_file`
+        self.world = world
+        self.world_state = WorldState()
+        self.routing = None
+        self.crowd = None
+        # Donjon généré à la demande (voir dungeon.py), None si le monde n'en a pas
+        self.dungeon = None
         self.rooms = []
         self.commands = {}
+        self.parser = None
         self.player = None
+        self.npcs = []
+        self.player_name = player_name
+        # Sortie de la session : `output` (objet possédant une méthode
+        # `write`) ou la sortie standard
+        self.output = OutputSink(output)
+        # Enregistreur des commandes (voir replay.py)
+        self.recorder = None
+        # Journal des changements, pour reprendre après un arrêt (voir journal.py)
+        self.journal = None
+        # Mesures des durées (voir metrics.py), None si désactivées
+        self.metrics = metrics
+        # Un générateur par sous-système : ajouter un tirage dans l'un ne
+        # décale pas les tirages des autres
+        self.rng = self.rng_stream("actions")
+        self.scheduler = Scheduler(self.rng_stream("npc"), INTEREST_RADIUS)
+        # Horloge du temps de jeu (None : le temps avance par commande) et
+        # temps écoulé en plus de celui de l'horloge (commandes, repos)
+        self.clock = clock
+        self._clock_start = clock() if clock is not None else 0
+        self.time = 0
+
+    def now(self):
+        """Renvoie le temps de jeu."""
+        if self.clock is None:
+            return self.time
+        return self.time + self.clock() - self._clock_start
+
+    def wait(self, duration):
+        """Fait passer `duration` unités de temps de jeu d'un coup."""
+        self.time += duration
+
+    def rng_stream(self, name):
+        """Renvoie un générateur aléatoire propre au sous-système `name`, dérivé de la graine."""
+        return random.Random(f"{self.seed}:{name}")
     
     # Setup the game
-    def setup(self):
+    def setup(self, player_name=None):
+        if player_name is not None:
+            self.player_name = player_name
+
+        self._setup_commands()
+
+        # Setup rooms, exits and items from the world definition.
+        # The world is shared between sessions: changes go to world_state.
+        if self.world is None:
+            self.world = get_world(self.world_file)
+        self.rooms = self.world.rooms
+        # Construire l'ensemble des directions valides présentes dans la map 
+        self.valid_directions = self.world.directions()
 
-        # Setup commands
+        if self.player_name is None:
+            self.player_name = input("\nEntrez votre nom: ")
+        self.start_session()
 
+    def start_session(self):
+        """
+        (Re)crée l'état de la partie tel que défini par le monde : joueur
+        dans la pièce de départ, quêtes, PNJ et foule. Utilisé par `setup`
+        et avant de restaurer une sauvegarde.
+        """
+        self.world_state = WorldState(self.world)
+        self.routing = self.world.create_routing(self.world_state)
+        self.dungeon = self.world.create_dungeon(self.world_state, self.seed)
+
+        # Setup player and starting room
+        self.player = Player(self.player_name)
+        self.player.world_state = self.world_state
+        self.player.output = self.output
+        self.player.clock = self.now
+        self.player.quest_manager.metrics = self.metrics
+        self.player.current_room = self.world.start
+        #Initialize the game with quests
+        self._setup_quests()
+
+        # Création des PNJ et enregistrement auprès du scheduler
+        self.scheduler = Scheduler(self.scheduler.rng, self.scheduler.radius)
+        self.npcs = self.world.spawn_characters(self.world_state)
+        for npc in self.npcs:
+            self.scheduler.register(npc)
+        # Foule d'ambiance (si numpy est disponible)
+        self.crowd = self.world.create_crowd(self.rng_stream("crowd").getrandbits(64))
+        self.prepare_surroundings()
+
+    def prepare_surroundings(self):
+        """
+        Construit les étages du donjon voisins du joueur (et évince les
+        étages lointains) sans faire avancer le monde : les escaliers de la
+        pièce du joueur mènent quelque part dès la commande suivante, même
+        après une commande de NO_TICK comme `load`.
+        """
+        if self.dungeon is not None:
+            self.dungeon.visit(self.player.current_room)
+
+    def _setup_commands(self):
+        """Register all commands."""
         help = Command("help", " : afficher cette aide", Actions.help, 0)
         self.commands["help"] = help
         quit = Command("quit", " : quitter le jeu", Actions.quit, 0)
@@ -45,7 +216,7 @@ class Game:
         self.commands["charge"] = charge
         talk = Command("talk", " <nom_pnj> : parler à un personnage", Actions.talk, 1)
         self.commands["talk"] = talk
-        rest = Command("rest", "permet de récupérer de l'endurance", Actions.rest, 0)
+        rest = Command("rest", " : se reposer jusqu'à récupérer toute son endurance", Actions.rest, 0)
         self.commands["rest"] = rest
         self.commands["quests"] = Command("quests", " : afficher la liste des quêtes", Actions.quests, 0)
         self.commands["quest"] = Command("quest", " <titre> : détails d'une quête", Actions.quest, 1)
@@ -53,160 +224,186 @@ class Game:
         self.commands["rewards"] = Command("rewards", " : afficher vos récompenses", Actions.rewards, 0)
         self.commands["picklock"] = Command("picklock", " <direction> : tenter de crocheter une porte", Actions.picklock, 1)
         self.commands["steal"] = Command("steal", " <nom_pnj> <nom_objet> : tenter de voler un objet à un PNJ", Actions.steal, 2)
-
-        # Setup rooms
-
-        forest = Room("Forest", "une forêt enchantée. Vous entendez une brise légère à travers la cime des arbres.")
-        self.rooms.append(forest)
-        tower = Room("Tower", "une immense tour en pierre qui s'élève au dessus des nuages.")
-        self.rooms.append(tower)
-        cave = Room("Cave", "une grotte profonde et sombre. Des voix semblent provenir des profondeurs.")
-        self.rooms.append(cave)
-        cottage = Room("Cottage", "un petit chalet pittoresque avec un toit de chaume. Une épaisse fumée verte sort de la cheminée.")
-        self.rooms.append(cottage)
-        swamp = Room("Swamp", "un marécage sombre et ténébreux. L'eau bouillonne, les abords sont vaseux.")
-        self.rooms.append(swamp)
-        castle = Room("Castle", "un énorme château fort avec des douves et un pont levis. Sur les tours, des flèches en or massif.")
-        self.rooms.append(castle)
-
-        # New vertical rooms
-        basement = Room("Sous_sol", "un sous-sol humide et sombre. Une odeur inquiétante flotte dans l'air.")
-        self.rooms.append(basement)
-        tower_top = Room("Tower-Top", "au sommet de la tour, vue à couper le souffle sur le royaume.")
-        self.rooms.append(tower_top)
-
-        # Additional rooms for quests
-        city = Room("City", "une ville médiévale animée. Les marchands crient et les pavés résonnent sous les pas.")
-        self.rooms.append(city)
-        taverne_rdc = Room("Taverne des Toussaints", "L'ambiance est bruyante. Un escalier monte et une porte mène à la cave.")
-        self.rooms.append(taverne_rdc)
-        chambre_beikovetz = Room("Chambre du Tavernier", "Beikovetz dort ici. Ses clés sont peut-être sur la table de nuit.")
-        self.rooms.append(chambre_beikovetz)
-        cave_beikovetz = Room("Cave de Beikovetz", "C'est sombre et humide. Des coffres sont entreposés ici.")
-        self.rooms.append(cave_beikovetz)
-        # Create exits for rooms
-
-        forest.exits = {"N" : cave, "E" : city, "S" : castle, "O" : None, "U": None, "D": None}
-        tower.exits = {"N" : cottage, "E" : None, "S" : None, "O" : forest, "U": tower_top, "D": None}
-        cave.exits = {"N" : None, "E" : cottage, "S" : forest, "O" : None, "U": None, "D": None}
-        cottage.exits = {"N" : None, "E" : None, "S" : tower, "O" : cave, "U": None, "D": basement}
-        swamp.exits = {"N" : tower, "E" : None, "S" : None, "O" : castle, "U": None, "D": None}
-        castle.exits = {"N" : forest, "E" : swamp, "S" : None, "O" : None, "U": None, "D": None}
-        basement.exits = {"N": None, "E": None, "S": None, "O": None, "U": cottage, "D": None}
-        tower_top.exits = {"N": None, "E": None, "S": None, "O": None, "U": None, "D": tower}
-        city.exits = {"O": forest, "E": taverne_rdc}
-        taverne_rdc.exits = {"U": chambre_beikovetz, "D": cave_beikovetz, "O": city}
-        chambre_beikovetz.exits = {"D": taverne_rdc}
-        cave_beikovetz.exits = {"U": taverne_rdc}
-
-        # Place some items in rooms
-        forest.inventory["Décoction de souci"] = {"description": "Guérit de 60PV en une minute","weight": 0.5}
-        forest.inventory["Potion de sang de chevreuil"] = {"description":"Accroît l'endurance et sa régénération","weight":0.3}
-        cave.inventory["kit de crochetage"] = {"description": "vous permettra d'ouvrir tout un tas de coffres et de vous incruster dans des reserves d'équipement ou de nourriture","weight": 0.1}
-        tower_top.inventory["beamer"] = Beamer()
-        #Placement des objets de quête
-        cave_beikovetz.inventory["Robe de mariage tachée"] = {"description": "Une robe de grande valeur, preuve du vol.", "weight": 1.0}
-        cave_beikovetz.inventory["Vieille statuette"] = {"description": "Une statuette peinte très ancienne.", "weight": 0.5}
-        swamp.inventory["Boussole en argent"] = {"description": "Une boussole en argent finement ciselée.", "weight": 0.2}
-
-        # Setup player and starting room
-
-        self.player = Player(input("\nEntrez votre nom: "))
-        self.player.current_room = swamp
-        #Initialize the game with quests
-        self._setup_quests()
-        # Construire l'ensemble des directions valides présentes dans la map 
-        self.valid_directions = set().union(*(room.exits.keys() for room in self.rooms))
-
-        # Setup 'back' command
-        back = Command("back", " : revenir à la pièce précédente visitée", Actions.back, 0)
-        self.commands["back"] = back
-
-        #Ajout des propriétés de verrouillage
-        # On définit que la cave est difficile à ouvrir
-        cave_beikovetz.locked = True
-        cave_beikovetz.difficulty = 2 # Nécessite lockpicking_level 2 ou une clé
-
-        # Création d'un PNJ 
-        gandalf = Character("Gandalf", "un magicien blanc", forest, ["Je suis Gandalf", "Abracadabra !"])
-        # Ajout du PNJ dans la pièce
-        forest.characters[gandalf.name] = gandalf
-        zigfried = Character("Ziegfried", "Lord de la Destruction", tower_top, ["Seuls les forts montent.", "Préparez-vous à périr !"])
-        tower_top.characters["ziegfried"] = zigfried
-        zigfried.hp = 500
-        germain = Character("Germain", "Un homme barbu aux vêtements exotiques.", taverne_rdc, ["Ach ! Vous me semblez être un honnête voyageur.", "Le climat ici est terrible pour mes articulations."])
-        germain.quest_stage = 0  
-        germain.inventory = {"Bourse en soie": {"description": "Une bourse luxueuse", "weight": 0.1}} # Note : j'ai mis un dict pour correspondre à ton système d'inventaire
-        taverne_rdc.characters["germain"] = germain
+        self.commands["back"] = Command("back", " : revenir à la pièce précédente visitée", Actions.back, 0)
+        self.commands["travel"] = Command("travel", " <lieu> : se rendre à un lieu par le plus court chemin", Actions.travel, 1)
+        self.commands["stats"] = Command("stats", " : (administration) afficher les mesures de performance", Actions.stats, 0)
+        self.commands["save"] = Command("save", " [nom] : sauvegarder la partie", Actions.save, 0)
+        self.commands["load"] = Command("load", " [nom] : charger une partie sauvegardée", Actions.load, 0)
+        # Analyseur des lignes saisies (préfixes, alias, commandes enchaînées).
+        # Il ne dépend que des mots de commande : les parties le partagent.
+        key = tuple(self.commands)
+        parser = _PARSERS.get(key)
+        if parser is None:
+            parser = _PARSERS[key] = CommandParser(self.commands, ALIASES)
+        self.parser = parser
 
     def _setup_quests(self):
-            """Initialize all quests."""
-            relique_germain = Quest(
-            "La Boussole de Germain",
-            "parler à Germain pour commencer cette quête.",
-            "Retrouver la boussole en argent perdue par Germain dans le marécage."
-            "recompense: 100 groschens",
-            )
-            # Add quests to player's quest manager
-            self.player.quest_manager.add_quest(relique_germain)
-            
+        """Initialize all quests."""
+        # Add quests to player's quest manager
+        for quest in self.world.create_quests():
+            self.player.quest_manager.add_quest(quest)
 
     # Play the game
     def play(self):
         self.setup()
+        if self.journal is not None:
+            # Reprise de la partie si le journal en contient une
+            self.journal.open()
         self.print_welcome() 
         # Loop until the game is finished
         while not self.finished:
             # Get the command from the player
             self.process_command(input("> "))
+        if self.journal is not None:
+            self.journal.close()
         return None
 
+    # Run a list of commands without user interaction
+    def run_script(self, commands):
+        """
+        Exécute une suite de commandes et renvoie la sortie produite.
+
+        La sortie est aussi transmise à la cible de `self.output` si elle
+        est définie. L'exécution s'arrête dès que la partie est terminée.
+        """
+        output = self.output
+        target = output.target
+        buffer = io.StringIO()
+        output.target = buffer
+        try:
+            for command_string in commands:
+                if self.finished:
+                    break
+                self.process_command(command_string)
+        finally:
+            output.target = target
+        text = buffer.getvalue()
+        if target is not None:
+            target.write(text)
+        return text
+
     # Process the command entered by the player
-    def process_command(self, command_string) -> None:
+    def process_command(self, command_string):
+        """
+        Exécute une commande et renvoie le texte produit.
+
+        Les messages de la commande sont accumulés dans `self.output` puis
+        envoyés en une seule écriture.
+        """
+        output = self.output
+        if output.buffering:
+            # Commande imbriquée : sa sortie rejoint celle de la commande en cours
+            self._process_command(command_string)
+            return ""
+        output.start()
+        try:
+            self._process_command(command_string)
+        finally:
+            text = output.flush()
+        if self.recorder is not None:
+            self.recorder.record(command_string, text)
+        return text
+
+    def _process_command(self, command_string) -> None:
         # ignore None inputs (defensive)
         if command_string is None:
             return None
-        command_string = command_string.strip()
-        if command_string == "":
-            # Ne rien afficher — on ignore la commande vide.
-            return None
-        # Split the command string into a list of words
-        list_of_words = command_string.split(" ")
+        # Une ligne peut enchaîner plusieurs commandes séparées par ';'
+        for list_of_words in self.parser.parse(command_string):
+            if self.finished:
+                break
+            self._execute(list_of_words)
 
+    def _execute(self, list_of_words):
         command_word = list_of_words[0]
+        command = self.commands.get(command_word)
 
         # If the command is not recognized, print an error message
-        if command_word not in self.commands.keys():
-            print(f"\nCommande '{command_word}' non reconnue. Entrez 'help' pour voir la liste des commandes disponibles.\n")
+        if command is None:
+            candidates = self.parser.candidates(command_word)
+            if len(candidates) > 1:
+                self.output.print(f"\nCommande '{command_word}' ambiguë : {', '.join(candidates)}.\n")
+            else:
+                self.output.print(f"\nCommande '{command_word}' non reconnue. Entrez 'help' pour voir la liste des commandes disponibles.\n")
         # If the command is recognized, execute it
         else:
-            command = self.commands[command_word]
-            success = command.action(self, list_of_words, command.number_of_parameters)
-            
-            if success and command_word != "talk":
-                # Ton bloc de mouvement tel quel :
-                all_characters = []
-                for room in self.rooms:
-                    for char in room.characters.values():
-                        all_characters.append(char)
-
-                for char in all_characters:
-                    old_room_name = char.current_room.name
-                    if char.move():
-                        if DEBUG:
-                            print(f"DEBUG: {char.name} s'est déplacé de {old_room_name} vers {char.current_room.name}")
+            journal = self.journal
+            if journal is not None:
+                journal.begin()
+            metrics = self.metrics
+            if metrics is None:
+                success = command.action(self, list_of_words, command.number_of_parameters)
+                if success and command_word not in NO_TICK:
+                    self._advance_world()
+            else:
+                start = time.perf_counter()
+                success = command.action(self, list_of_words, command.number_of_parameters)
+                metrics.observe("tba_command_duration_seconds", command_word, time.perf_counter() - start)
+                if success and command_word not in NO_TICK:
+                    self._advance_world()
+                metrics.maybe_dump()
+            if journal is not None:
+                journal.end()
+
+    def _advance_world(self):
+        """Fait agir les PNJ et la foule après une commande réussie."""
+        if self.clock is None:
+            self.time += 1
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        # Seuls les PNJ dont l'échéance est atteinte agissent
+        journal = self.journal
+        # Étages voisins du joueur construits, étages lointains évincés
+        self.prepare_surroundings()
+        # Seuls les PNJ proches du joueur sont simulés à chaque tick
+        self.scheduler.focus((self.player.current_room,))
+        for char, old_room in self.scheduler.advance():
+            if DEBUG:
+                self.output.print(f"DEBUG: {char.name} s'est déplacé de {old_room.name} vers {char.current_room.name}")
+            if journal is not None:
+                journal.npc_moved(char)
+        if metrics is not None:
+            now = time.perf_counter()
+            metrics.observe("tba_npc_tick_duration_seconds", None, now - start)
+            start = now
+        if self.crowd is not None:
+            self.crowd.step()
+            if metrics is not None:
+                metrics.observe("tba_crowd_step_duration_seconds", None, time.perf_counter() - start)
         
     # Print the welcome message
     def print_welcome(self):
-        print(f"\nBienvenue {self.player.name} dans ce jeu d'aventure !")
-        print("Entrez 'help' si vous avez besoin d'aide.")
-        #
-        print(self.player.current_room.get_long_description())
+        self.output.print(self.get_welcome())
+
+    def get_welcome(self):
+        return (f"\nBienvenue {self.player.name} dans ce jeu d'aventure !\n"
+                "Entrez 'help' si vous avez besoin d'aide.\n"
+                + self.player.current_room.get_long_description())
     
 
 def main():
+    parser = argparse.ArgumentParser(description="Jeu d'aventure TBA")
+    parser.add_argument("--seed", type=int, help="graine du hasard de la partie")
+    parser.add_argument("--world", default=None, help="fichier de définition du monde")
+    parser.add_argument("--record", metavar="FICHIER", help="enregistrer la partie pour la rejouer (replay.py)")
+    parser.add_argument("--metrics", metavar="FICHIER", help="exporter les mesures au format Prometheus")
+    parser.add_argument("--journal", metavar="BASE", help="journaliser la partie (BASE.journal, BASE.checkpoint) et la reprendre après un arrêt")
+    args = parser.parse_args()
     # Create a game object and play the game
-    Game().play()
+    metrics = Metrics(args.metrics) if args.metrics else None
+    game = Game(world_file=args.world, seed=args.seed, metrics=metrics)
+    if args.journal is not None:
+        from journal import Journal
+        game.journal = Journal(args.journal, game)
+    if args.record is None:
+        game.play()
+    else:
+        from replay import Recorder
+        with open(args.record, "w", encoding="utf-8") as f:
+            game.recorder = Recorder(f, game)
+            game.play()
+    if metrics is not None:
+        metrics.dump()
     
 
 if __name__ == "__main__":
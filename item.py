@@ -1,13 +1,58 @@
 class Item:
+    """
+    Classe représentant un objet.
+
+    Un objet sans état (nom, description et poids fixes) est partagé :
+    `Item.prototype` renvoie toujours la même instance pour une même
+    définition, quel que soit le nombre de pièces ou d'inventaires qui le
+    contiennent. Les objets à état (comme le Beamer) sont des sous-classes
+    dont chaque exemplaire est une instance distincte (`stateful`).
+
+    Exemples :
+    >>> a = Item.prototype("Pomme", "une pomme", 0.1)
+    >>> a is Item.prototype("Pomme", "une pomme", 0.1)
+    True
+    >>> str(a)
+    'Pomme : une pomme (0.1 kg)'
+    >>> Beamer() is Beamer(), Beamer.stateful
+    (False, True)
+    """
+
+    __slots__ = ("name", "description", "weight")
+
+    # Les objets à état doivent être copiés et non partagés
+    stateful = False
+
+    # Prototypes partagés : (nom, description, poids) -> Item
+    _prototypes = {}
+
     def __init__(self, name, description, weight):
         self.name = name
         self.description = description
         self.weight = weight
 
+    @classmethod
+    def prototype(cls, name, description, weight):
+        key = (name, description, weight)
+        item = cls._prototypes.get(key)
+        if item is None:
+            item = cls._prototypes[key] = cls(name, description, weight)
+        return item
+
+    def key(self):
+        # Identifie la définition de l'objet ; un objet à état l'est par sa classe
+        if self.stateful:
+            return type(self).__name__
+        return (self.name, self.description, self.weight)
+
     def __str__(self):
         return f"{self.name} : {self.description} ({self.weight} kg)"
 
 class Beamer(Item):
+    __slots__ = ("saved_room",)
+
+    stateful = True
+
     def __init__(self):
         super().__init__("Beamer", "Un étrange appareil technologique permettant de se téléporter.", 1.5)
         self.saved_room = None  # La pièce mémorisée
@@ -19,9 +64,9 @@ class Beamer(Item):
     def use(self, player):
         if not self.saved_room:
             return "\n[Beamer] : Erreur, l'appareil n'est pas chargé.\n"
-        
+
         # Téléportation
         player.history.append(player.current_room) # On garde une trace pour la commande 'back'
         player.current_room = self.saved_room
         self.saved_room = None # Se décharge après usage
-        return f"\n[Beamer] : Énergie libérée ! Vous êtes téléporté...\n{player.current_room.get_long_description()}"
\ No newline at end of file
+        return f"\n[Beamer] : Énergie libérée ! Vous êtes téléporté...\n{player.current_room.get_long_description()}"
@@ -0,0 +1,306 @@
+# Description: journal d'écriture anticipée (write-ahead log) d'une partie.
+#
+# Réécrire une sauvegarde complète après chaque commande coûterait trop
+# cher. Le journal ajoute à la place, après chaque commande qui a modifié
+# la partie, une ligne JSON décrivant les changements : déplacements du
+# joueur et des PNJ, objets pris ou déposés, objectifs de quête, endurance
+# et argent. Tous les `compact_every` enregistrements, le journal est
+# compacté : une sauvegarde complète (savegame.py) est écrite et le journal
+# est vidé.
+#
+# Fichiers, pour une base `saves/Alice` :
+#   saves/Alice.checkpoint  dernière sauvegarde complète (format de savegame.py) ;
+#   saves/Alice.journal     changements postérieurs, une ligne par commande.
+#
+# Usage : python game.py --journal saves/Alice
+#
+# Format d'une ligne :
+# {"seq": n, "player": {attributs modifiés}, "history": [conservés, [ajouts]],
+#  "quests": [...], "room_state": [...], "npcs": [...],
+#  "moves": [PNJ, pièce, PNJ, pièce...]}
+# Les entrées "quests", "room_state" et "npcs" ont le format de
+# savegame.py et remplacent l'entrée de même indice ; "moves" donne la
+# nouvelle pièce des PNJ déplacés. Chaque ligne porte un
+# numéro de séquence ; la sauvegarde complète indique le dernier numéro
+# qu'elle contient, ce qui permet de reprendre après un arrêt survenu entre
+# l'écriture de la sauvegarde et la remise à zéro du journal.
+
+import json
+import os
+
+import savegame
+
+# Nombre d'enregistrements entre deux compactages
+COMPACT_EVERY = 1000
+# Clés de savegame.player_record, dans l'ordre de `_probe`
+RECORD_KEYS = ("room", "inventory") + savegame.PLAYER_FIELDS
+
+
+def _probe(player):
+    # Relevé peu coûteux de l'état du joueur, dans l'ordre de RECORD_KEYS
+    probe = [player.current_room.name, savegame.inventory_probe(player.inventory)]
+    for field in savegame.PLAYER_FIELDS:
+        value = getattr(player, field)
+        probe.append(list(value) if isinstance(value, list) else value)
+    return probe
+
+
+class Journal:
+    """
+    Classe tenant le journal des changements d'une partie.
+
+    Le journal est rattaché à `game.journal` : `Game` appelle `begin`
+    avant chaque commande, `npc_moved` pour chaque PNJ déplacé et `end`
+    après la commande, qui ajoute au plus une ligne au journal.
+
+    Attributs :
+    base : str
+        Le chemin des fichiers, sans extension.
+    game : Game
+        La partie journalisée.
+    compact_every : int
+        Le nombre d'enregistrements entre deux compactages.
+    sync : bool
+        Si True, chaque ligne est forcée sur le disque (os.fsync) ;
+        sinon elle est seulement transmise au système.
+    seq : int
+        Le numéro du dernier enregistrement.
+
+    Exemples :
+    >>> import tempfile
+    >>> from game import Game
+    >>> tmp = tempfile.TemporaryDirectory()
+    >>> base = os.path.join(tmp.name, "Alice")
+    >>> game = Game("Alice", seed=3)
+    >>> game.setup()
+    >>> game.journal = Journal(base, game)
+    >>> game.journal.open()
+    False
+    >>> _ = game.run_script(["take Boussole en argent", "go N", "look", "rest"])
+    >>> game.journal.seq
+    4
+    >>> game.journal.file.close()  # arrêt brutal : pas de compactage
+
+    Une nouvelle partie reprend l'état de la sauvegarde et du journal :
+
+    >>> other = Game("Bob", seed=3)
+    >>> other.setup()
+    >>> other.journal = Journal(base, other)
+    >>> other.journal.open()
+    True
+    >>> savegame.snapshot(other) == savegame.snapshot(game)
+    True
+    >>> other.journal.close()
+    >>> tmp.cleanup()
+    """
+
+    # Define the constructor.
+    def __init__(self, base, game, compact_every=COMPACT_EVERY, sync=False):
+        self.base = base
+        self.game = game
+        self.compact_every = compact_every
+        self.sync = sync
+        self.seq = 0
+        self.file = None
+        # Enregistrements depuis le dernier compactage
+        self._count = 0
+        # État relevé par `begin`
+        self._player = None
+        self._record = None
+        self._history = 0
+        self._room = None
+        self._quests = None
+        self._talkers = None
+        self._moved = []
+        self._npc_index = {}
+
+    @property
+    def snapshot_path(self):
+        return self.base + ".checkpoint"
+
+    @property
+    def journal_path(self):
+        return self.base + ".journal"
+
+    def open(self):
+        """
+        Ouvre le journal. Si une sauvegarde existe, la partie est d'abord
+        restaurée à partir de la sauvegarde et des lignes du journal.
+        Renvoie True si une partie a été restaurée.
+        """
+        recovered = os.path.exists(self.snapshot_path)
+        if recovered:
+            data, self.seq = recover(self.snapshot_path, self.journal_path)
+            savegame.restore(self.game, data)
+        # Repartir d'une sauvegarde complète et d'un journal vide
+        self.compact()
+        return recovered
+
+    def close(self):
+        """Compacte le journal et le ferme."""
+        if self.file is not None:
+            self.compact()
+            self.file.close()
+            self.file = None
+
+    def compact(self):
+        """Écrit une sauvegarde complète et vide le journal."""
+        data = savegame.snapshot(self.game)
+        data["journal"] = self.seq
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        os.makedirs(os.path.dirname(self.base) or ".", exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.journal_path, "w", encoding="utf-8")
+        self._count = 0
+        self._npc_index = {id(npc): i for i, npc in enumerate(self.game.npcs)}
+
+    def begin(self):
+        """Relève l'état que la commande à venir peut modifier."""
+        game = self.game
+        world = game.world
+        player = game.player
+        self._player = player
+        self._record = _probe(player)
+        self._history = len(player.history)
+        room = player.current_room
+        self._room = (room, room.locked, savegame.inventory_probe(room.inventory))
+        self._quests = [(quest.is_active, quest.is_completed, len(quest.completed_objectives))
+                        for quest in player.quest_manager.quests]
+        # Parler à un PNJ fait avancer ses messages
+        self._talkers = [(npc, len(npc.msgs)) for npc in room.characters.values()]
+        self._moved = []
+
+    def npc_moved(self, npc):
+        self._moved.append(npc)
+
+    def end(self):
+        """Ajoute au journal les changements faits depuis `begin`."""
+        game = self.game
+        if game.player is not self._player:
+            # Partie chargée (commande load) : tout a changé
+            self.compact()
+            return
+        world = game.world
+        player = game.player
+        entry = {}
+
+        probe = _probe(player)
+        if probe != self._record:
+            record = savegame.player_record(world, player)
+            entry["player"] = {key: record[key] for key, before, after in zip(RECORD_KEYS, self._record, probe)
+                               if before != after}
+        # Une commande ajoute des pièces à l'historique (go, travel) ou en retire une (back)
+        history = player.history
+        if len(history) != self._history:
+            keep = min(len(history), self._history)
+            entry["history"] = [keep, [world.room_id(room) for room in history[keep:]]]
+
+        # Seule la pièce de départ peut avoir changé (take, drop)
+        room, locked, contents = self._room
+        room = game.world_state.room(room)
+        if room.locked != locked or savegame.inventory_probe(room.inventory) != contents:
+            entry["room_state"] = [savegame.room_entry(world, room)]
+
+        quests = player.quest_manager.quests
+        changed = [savegame.quest_entry(i, quest) for i, (quest, before) in enumerate(zip(quests, self._quests))
+                   if (quest.is_active, quest.is_completed, len(quest.completed_objectives)) != before]
+        if changed:
+            entry["quests"] = changed
+
+        index = self._npc_index
+        if self._moved:
+            # Déplacements des PNJ : liste plate [indice, pièce, indice, pièce...]
+            room_id = world.room_id
+            moves = []
+            for npc in self._moved:
+                moves += (index[id(npc)], room_id(npc.current_room))
+            entry["moves"] = moves
+        # Les gardiens du donjon (hors de game.npcs) sont régénérés avec leur étage
+        talked = [npc for npc, count in self._talkers if len(npc.msgs) != count and id(npc) in index]
+        if talked:
+            entry["npcs"] = [savegame.npc_entry(world, index[id(npc)], npc, world.characters[index[id(npc)]])
+                             for npc in talked]
+
+        if entry:
+            self.append(entry)
+
+    def append(self, entry):
+        """Ajoute l'enregistrement `entry` au journal (une ligne, une écriture)."""
+        self.seq += 1
+        entry["seq"] = self.seq
+        self.file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self._count += 1
+        if self._count >= self.compact_every:
+            self.compact()
+
+
+def apply(data, entries):
+    """
+    Applique les enregistrements `entries` à la sauvegarde `data` (dict au
+    format de savegame.py) et la renvoie.
+
+    >>> data = {"player": {"room": 0, "history": [0, 1]}, "quests": [],
+    ...         "room_state": [[1, False, [0]]], "npcs": []}
+    >>> data = apply(data, [{"seq": 1, "player": {"room": 2}, "history": [2, [1]]},
+    ...                     {"seq": 2, "room_state": [[1, False, []]], "moves": [3, 1, 0, 2]}])
+    >>> data["player"], data["room_state"], data["npcs"]
+    ({'room': 2, 'history': [0, 1, 1]}, [[1, False, []]], [[0, 2, {}], [3, 1, {}]])
+    """
+    player = data["player"]
+    tables = {key: {row[0]: row for row in data[key]} for key in ("quests", "room_state", "npcs")}
+    for entry in entries:
+        player.update(entry.get("player", ()))
+        if "history" in entry:
+            keep, added = entry["history"]
+            player["history"] = player["history"][:keep] + added
+        for key, table in tables.items():
+            for row in entry.get(key, ()):
+                table[row[0]] = row
+        moves = entry.get("moves", ())
+        npcs = tables["npcs"]
+        for i in range(0, len(moves), 2):
+            row = npcs.get(moves[i])
+            if row is None:
+                npcs[moves[i]] = [moves[i], moves[i + 1], {}]
+            else:
+                row[1] = moves[i + 1]
+    # Lignes dans l'ordre des identifiants, comme dans `savegame.snapshot`
+    for key, table in tables.items():
+        data[key] = [table[row_id] for row_id in sorted(table)]
+    return data
+
+
+def recover(snapshot_path, journal_path):
+    """
+    Lit la sauvegarde complète et le journal, et renvoie (sauvegarde à
+    jour, numéro du dernier enregistrement appliqué).
+
+    Les enregistrements déjà contenus dans la sauvegarde sont ignorés, de
+    même qu'une dernière ligne incomplète (arrêt pendant son écriture).
+    """
+    with open(snapshot_path, encoding="utf-8") as f:
+        data = json.load(f)
+    seq = data.pop("journal", 0)
+    entries = []
+    if os.path.exists(journal_path):
+        with open(journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["seq"] > seq:
+                    entries.append(entry)
+    if entries:
+        seq = entries[-1]["seq"]
+    return apply(data, entries), seq
@@ -0,0 +1,119 @@
+# Description: client de test de charge pour server.py.
+#
+# Usage : python loadtest.py [--clients 5000] [--commands 20] [--port 4000]
+#         python loadtest.py --spawn-server   (lance un serveur local dans le même processus)
+#
+# Ouvre de nombreuses connexions simultanées, envoie une suite de
+# commandes sur chacune et mesure la latence de chaque commande (envoi de
+# la ligne -> réception de l'invite).
+
+import argparse
+import asyncio
+import random
+import resource
+import time
+
+from server import GameServer, NAME_PROMPT, PROMPT, ENCODING
+
+COMMANDS = ("look", "go N", "go S", "go E", "go O", "check", "quests", "help")
+
+
+def percentile(values, fraction):
+    """
+    Renvoie le percentile `fraction` (entre 0 et 1) d'une liste de valeurs.
+
+    >>> percentile([1, 2, 3, 4], 0.5)
+    2
+    >>> percentile([1, 2, 3, 4], 0.99)
+    4
+    """
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_client(host, port, client_id, n_commands, latencies, errors, rng):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        errors.append("connexion")
+        return
+    try:
+        await reader.readuntil(NAME_PROMPT.encode(ENCODING))
+        writer.write(f"Client{client_id}\n".encode(ENCODING))
+        await reader.readuntil(PROMPT.encode(ENCODING))
+        for _ in range(n_commands):
+            command = rng.choice(COMMANDS)
+            start = time.perf_counter()
+            writer.write(f"{command}\n".encode(ENCODING))
+            await writer.drain()
+            await reader.readuntil(PROMPT.encode(ENCODING))
+            latencies.append(time.perf_counter() - start)
+        writer.write(b"quit\n")
+        await writer.drain()
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        errors.append("session")
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def run_load_test(host, port, n_clients, n_commands, connect_rate, seed=0, spawn_server=False):
+    server = None
+    if spawn_server:
+        server = GameServer(host, 0)
+        await server.start()
+        port = server.port
+
+    rng = random.Random(seed)
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    tasks = []
+    for client_id in range(n_clients):
+        tasks.append(asyncio.create_task(
+            run_client(host, port, client_id, n_commands, latencies, errors, random.Random(rng.random()))))
+        # Étale les connexions pour ne pas saturer la file d'attente d'accept()
+        if connect_rate and client_id % connect_rate == connect_rate - 1:
+            await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.close()
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du serveur TBA")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--commands", type=int, default=20)
+    parser.add_argument("--connect-rate", type=int, default=200,
+                        help="connexions ouvertes par tranche de 10 ms (0 : sans limite)")
+    parser.add_argument("--spawn-server", action="store_true")
+    args = parser.parse_args()
+
+    # Chaque client (et chaque session si le serveur est local) consomme un descripteur
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = args.clients * (2 if args.spawn_server else 1) + 64
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+    latencies, errors, elapsed = asyncio.run(run_load_test(
+        args.host, args.port, args.clients, args.commands, args.connect_rate,
+        spawn_server=args.spawn_server))
+
+    print(f"{args.clients} clients, {len(latencies)} commandes en {elapsed:.1f} s "
+          f"({len(latencies) / elapsed:.0f} commandes/s), {len(errors)} erreurs")
+    if latencies:
+        print(f"  p50 : {percentile(latencies, 0.50) * 1000:.2f} ms")
+        print(f"  p99 : {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
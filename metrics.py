@@ -0,0 +1,179 @@
+# Define the Metrics class.
+#
+# Mesures de durée (commandes, déplacements des PNJ, quêtes) regroupées en
+# histogrammes, affichées par la commande `stats` et exportées au format
+# texte de Prometheus.
+
+import bisect
+import os
+import time
+
+# Bornes supérieures des seaux des histogrammes, en secondes
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+           0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Description des mesures, pour l'export Prometheus
+HELP = {
+    "tba_command_duration_seconds": "Durée d'exécution des commandes",
+    "tba_npc_tick_duration_seconds": "Durée des déplacements des PNJ après une commande",
+    "tba_crowd_step_duration_seconds": "Durée d'un pas de simulation de la foule",
+    "tba_quest_check_duration_seconds": "Durée des vérifications d'objectifs de quête",
+}
+
+# Nom de l'étiquette de chaque mesure (commande, type d'événement...)
+LABELS = {
+    "tba_command_duration_seconds": "command",
+    "tba_quest_check_duration_seconds": "event",
+}
+
+
+class Histogram:
+    """
+    Classe représentant la distribution des durées d'une mesure.
+
+    Attributs :
+    count : int
+        Le nombre d'observations.
+    total : float
+        La somme des durées observées.
+    buckets : list
+        Le nombre d'observations dans chaque seau (non cumulé), le dernier
+        seau recevant les durées supérieures à la plus grande borne.
+
+    Exemples :
+    >>> h = Histogram()
+    >>> for seconds in (0.0002, 0.0003, 0.004):
+    ...     h.observe(seconds)
+    >>> h.count, h.quantile(0.5), h.quantile(1.0)
+    (3, 0.0005, 0.005)
+    """
+
+    __slots__ = ("count", "total", "buckets")
+
+    # Define the constructor.
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, fraction):
+        """Renvoie la borne supérieure du seau contenant le quantile `fraction`."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """
+    Classe regroupant les mesures d'une partie ou d'un serveur.
+
+    Une partie sans instrumentation a `game.metrics` à None : la seule
+    dépense est alors un test par commande. Un serveur partage un même
+    objet `Metrics` entre toutes ses sessions.
+
+    Si `path` est donné, `maybe_dump` réécrit ce fichier au format texte
+    de Prometheus au plus une fois toutes les `interval` secondes.
+
+    Attributs :
+    series : dict
+        Les histogrammes, indexés par (nom de la mesure, étiquette).
+    path : str or None
+        Le fichier d'export Prometheus.
+    interval : float
+        Le délai minimal entre deux exports, en secondes.
+
+    Exemples :
+    >>> metrics = Metrics()
+    >>> metrics.observe("tba_command_duration_seconds", "look", 0.0004)
+    >>> print(metrics.to_prometheus())  # doctest: +ELLIPSIS
+    # HELP tba_command_duration_seconds Durée d'exécution des commandes
+    # TYPE tba_command_duration_seconds histogram
+    tba_command_duration_seconds_bucket{command="look",le="1e-05"} 0
+    ...
+    tba_command_duration_seconds_bucket{command="look",le="0.0005"} 1
+    ...
+    tba_command_duration_seconds_count{command="look"} 1
+    """
+
+    # Define the constructor.
+    def __init__(self, path=None, interval=10.0):
+        self.series = {}
+        self.path = path
+        self.interval = interval
+        self._last_dump = time.monotonic()
+
+    def observe(self, name, label, seconds):
+        histogram = self.series.get((name, label))
+        if histogram is None:
+            histogram = self.series[(name, label)] = Histogram()
+        histogram.observe(seconds)
+
+    def summary(self):
+        """Renvoie un tableau lisible des mesures (commande `stats`)."""
+        if not self.series:
+            return "\nAucune mesure pour le moment.\n"
+        lines = ["", f"{'mesure':<28} {'nombre':>8} {'moyenne':>10} {'p50 <=':>10} {'p99 <=':>10}"]
+        for (name, label), h in sorted(self.series.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            short = name[len("tba_"):-len("_duration_seconds")]
+            title = f"{short}:{label}" if label is not None else short
+            lines.append(f"{title:<28} {h.count:>8} {_format_seconds(h.total / h.count):>10} "
+                         f"{_format_seconds(h.quantile(0.5)):>10} {_format_seconds(h.quantile(0.99)):>10}")
+        lines.append("")
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        """Renvoie les mesures au format texte de Prometheus."""
+        lines = []
+        names = sorted({name for name, _ in self.series})
+        for name in names:
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for (series_name, label), h in sorted(self.series.items(), key=lambda item: str(item[0][1])):
+                if series_name != name:
+                    continue
+                labels = f'{LABELS.get(name, "label")}="{label}",' if label is not None else ""
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.buckets):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels}le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {h.count}')
+                suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+                lines.append(f"{name}_sum{suffix} {h.total:.9f}")
+                lines.append(f"{name}_count{suffix} {h.count}")
+        return "\n".join(lines)
+
+    def maybe_dump(self):
+        """Exporte les mesures dans `path` si le délai `interval` est écoulé."""
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if now - self._last_dump >= self.interval:
+            self._last_dump = now
+            self.dump()
+
+    def dump(self):
+        # Écriture atomique : le collecteur ne lit jamais un fichier à moitié écrit
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus() + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def _format_seconds(seconds):
+    if seconds == float("inf"):
+        return "inf"
+    if seconds < 0.001:
+        return f"{seconds * 1e6:.0f} µs"
+    return f"{seconds * 1000:.1f} ms"
@@ -0,0 +1,76 @@
+# Define the OutputSink class.
+
+
+import sys
+
+
+class OutputSink:
+    """
+    Classe représentant la sortie d'une session de jeu.
+
+    Les messages du jeu sont écrits avec `print`, qui s'utilise comme la
+    fonction `print` de Python. Pendant une commande (`start` ... `flush`),
+    les messages sont accumulés et envoyés à la cible en une seule
+    écriture ; en dehors d'une commande, ils sont écrits immédiatement.
+
+    Attributs :
+    target : objet possédant une méthode `write`, ou None
+        La destination du texte (fichier, tampon, flux réseau...) ;
+        None désigne la sortie standard.
+
+    Exemples :
+    >>> import io
+    >>> buffer = io.StringIO()
+    >>> out = OutputSink(buffer)
+    >>> out.start()
+    >>> out.print("Bonjour", "Alice")
+    >>> out.print("Au revoir", end="")
+    >>> buffer.getvalue()
+    ''
+    >>> out.flush()
+    'Bonjour Alice\\nAu revoir'
+    >>> buffer.getvalue()
+    'Bonjour Alice\\nAu revoir'
+    >>> out.print("immédiat")
+    >>> buffer.getvalue()[-9:]
+    'immédiat\\n'
+    """
+
+    __slots__ = ("target", "_parts")
+
+    # Define the constructor.
+    def __init__(self, target=None):
+        self.target = target
+        # Messages de la commande en cours, None hors d'une commande
+        self._parts = None
+
+    @property
+    def buffering(self):
+        return self._parts is not None
+
+    def print(self, *values, sep=" ", end="\n"):
+        text = sep.join(map(str, values)) + end
+        if self._parts is not None:
+            self._parts.append(text)
+        else:
+            self.write(text)
+
+    def write(self, text):
+        # La sortie standard est résolue à chaque écriture (redirections, tests)
+        (self.target if self.target is not None else sys.stdout).write(text)
+
+    def start(self):
+        """Commence à accumuler les messages d'une commande."""
+        self._parts = []
+
+    def flush(self):
+        """Envoie les messages accumulés en une seule écriture et renvoie ce texte."""
+        text = "".join(self._parts) if self._parts else ""
+        self._parts = None
+        if text:
+            self.write(text)
+        return text
+
+
+# Sortie par défaut des objets qui n'appartiennent à aucune partie
+CONSOLE = OutputSink()
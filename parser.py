@@ -0,0 +1,104 @@
+# Define the CommandParser class.
+
+
+class _Node:
+    __slots__ = ("children", "targets")
+
+    def __init__(self):
+        self.children = {}
+        # Commandes atteignables depuis ce préfixe
+        self.targets = set()
+
+
+class CommandParser:
+    """
+    Classe découpant une ligne saisie en commandes.
+
+    Les mots de commande et leurs alias sont rangés dans un arbre de
+    préfixes (trie) : un préfixe qui ne désigne qu'une seule commande
+    suffit (`he` pour `help`). Les mots sont séparés par n'importe quels
+    blancs et plusieurs commandes peuvent être enchaînées avec `;`.
+
+    Attributs :
+    words : dict
+        Les mots connus (commandes et alias) et la commande qu'ils désignent.
+
+    Exemples :
+    >>> parser = CommandParser(["go", "look", "take", "talk"], {"regarder": "look"})
+    >>> parser.parse("  go   N ; loo;regarder")
+    [['go', 'N'], ['look'], ['look']]
+    >>> parser.resolve("tak"), parser.resolve("ta"), parser.resolve("x")
+    ('take', None, None)
+    >>> parser.candidates("ta")
+    ['take', 'talk']
+    """
+
+    # Séparateur des commandes enchaînées
+    SEPARATOR = ";"
+
+    # Define the constructor.
+    def __init__(self, commands, aliases=None):
+        self.words = {}
+        self._root = _Node()
+        for word in commands:
+            self.add(word, word)
+        for alias, word in (aliases or {}).items():
+            self.add(alias, word)
+
+    def add(self, word, command_word):
+        """Ajoute le mot `word` désignant la commande `command_word`."""
+        word = word.lower()
+        self.words[word] = command_word
+        node = self._root
+        node.targets.add(command_word)
+        for char in word:
+            node = node.children.setdefault(char, _Node())
+            node.targets.add(command_word)
+
+    def _node(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def resolve(self, word):
+        """Renvoie la commande désignée par `word` (mot, alias ou préfixe non ambigu), ou None."""
+        word = word.lower()
+        # Cas le plus courant : le mot exact
+        command_word = self.words.get(word)
+        if command_word is not None:
+            return command_word
+        node = self._node(word)
+        if node is not None and len(node.targets) == 1:
+            return next(iter(node.targets))
+        return None
+
+    def candidates(self, word):
+        """Renvoie les commandes commençant par `word`, triées."""
+        node = self._node(word.lower())
+        return sorted(node.targets) if node is not None else []
+
+    def parse(self, line):
+        """
+        Découpe `line` en listes de mots, une par commande.
+
+        Le premier mot de chaque liste est remplacé par la commande qu'il
+        désigne quand elle est connue ; sinon il est laissé tel quel.
+        """
+        words = self.words
+        separator = self.SEPARATOR
+        batch = []
+        for part in line.split(separator) if separator in line else (line,):
+            list_of_words = part.split()
+            if not list_of_words:
+                continue
+            # Chemin rapide : mot exact, sans passer par le trie
+            command_word = words.get(list_of_words[0])
+            if command_word is None:
+                command_word = self.resolve(list_of_words[0])
+            if command_word is not None:
+                list_of_words[0] = command_word
+            batch.append(list_of_words)
+        return batch
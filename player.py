@@ -1,4 +1,12 @@
 from quest import QuestManager
+from item import Item
+from output import CONSOLE
+
+# Endurance maximale, et endurance regagnée par unité de temps de jeu
+# (une commande, ou une seconde avec l'horloge murale : voir Game.now)
+STAMINA_MAX = 100.0
+STAMINA_REGEN = 1.0
+
 # Define the Player class.
 class Player():
     """
@@ -14,6 +22,13 @@ class Player():
         Le nom du joueur.
     current_room : Room or None
         La pièce dans laquelle le joueur se trouve actuellement.
+    stamina : float
+        L'endurance du joueur. Elle est stockée avec l'instant de sa
+        dernière modification et calculée à la lecture : elle remonte de
+        STAMINA_REGEN par unité de temps, quel que soit le temps écoulé,
+        sans rien exécuter entre deux lectures.
+    clock : callable or None
+        L'horloge du jeu (None : pas de récupération).
 
     Méthodes :
     move(direction)
@@ -26,31 +41,64 @@ class Player():
     et renvoie False si elle est absente (aucun KeyError levé).
 
     Exemples :
-    >>> from Room import Room
+    >>> from room import Room
     >>> r1 = Room("Hall", "dans un grand hall d'entrée")
     >>> r2 = Room("Jardin", "dans un jardin fleuri")
     >>> r1.exits["sud"] = r2
     >>> p = Player("Alice")
     >>> p.current_room = r1
-    >>> p.move("sud")
+    >>> p.move("sud") # doctest: +NORMALIZE_WHITESPACE
+    (Endurance restante : 90.0%)
+    Vous êtes dans dans un jardin fleuri
+    Sorties:
     True
     >>> p.current_room is r2
     True
     >>> p.move("nord")
+    <BLANKLINE>
+    Aucune porte dans cette direction !
+    <BLANKLINE>
     False
+
+    Avec une horloge, l'endurance remonte d'elle-même :
+
+    >>> now = [0]
+    >>> p.clock = lambda: now[0]
+    >>> p.stamina = 40.0
+    >>> now[0] = 25
+    >>> p.stamina
+    65.0
+    >>> now[0] = 10**9
+    >>> p.stamina
+    100.0
     """
+    __slots__ = ("name", "world_state", "output", "_current_room", "quest_manager", "rewards",
+                 "history", "move_count", "inventory", "weight_grams", "max_weight", "clock",
+                 "_stamina", "_stamina_time",
+                 "groschens", "lockpicking_level", "agility", "has_lockpick")
+
     # Define the constructor.
     def __init__(self, name):
         self.name = name
+        # État de la session (WorldState) quand le monde est partagé
+        self.world_state = None
+        # Sortie de la partie (OutputSink), la console par défaut
+        self.output = CONSOLE
         self.current_room = None
-        self.quest_manager = QuestManager()
+        self.quest_manager = QuestManager(self)
         self.rewards = []  # List to store earned rewards
 
         # historique des pièces visitées
         self.history = []
+        # nombre de déplacements (objectifs du type "Se déplacer 10 fois")
+        self.move_count = 0
         self.inventory = {}
+        # Poids transporté, tenu à jour en grammes (entier) pour éviter la
+        # dérive des flottants après de nombreux ajouts et retraits
+        self.weight_grams = 0
         self.max_weight = 20.0 
-        self.stamina = 100.0
+        self.clock = None
+        self.stamina = STAMINA_MAX
         self.groschens = 15  # système monétaire
         # Caractéristiques du joueur
         self.lockpicking_level = 1
@@ -58,6 +106,31 @@ class Player():
         self.has_lockpick = True
         
     
+    @property
+    def current_room(self):
+        # Avec un monde partagé, on voit la version de la pièce propre à la session
+        if self.world_state is not None:
+            return self.world_state.room(self._current_room)
+        return self._current_room
+
+    @current_room.setter
+    def current_room(self, room):
+        self._current_room = room
+
+    @property
+    def stamina(self):
+        value = self._stamina
+        if self.clock is None or value >= STAMINA_MAX:
+            return value
+        return min(STAMINA_MAX, value + (self.clock() - self._stamina_time) * STAMINA_REGEN)
+
+    @stamina.setter
+    def stamina(self, value):
+        # On ne garde que la valeur et l'instant : la récupération est
+        # calculée à la lecture
+        self._stamina = value
+        self._stamina_time = self.clock() if self.clock is not None else 0
+
     # Define the move method.
     def move(self, direction):
         # Get the next room from the exits dictionary of the current room.
@@ -66,7 +139,7 @@ class Player():
 
         # If the next room is None, print an error message and return False.
         if next_room is None:
-            print("\nAucune porte dans cette direction !\n")
+            self.output.print("\nAucune porte dans cette direction !\n")
             return False
 
         #Logique de fatigue en fonction du poids transporté
@@ -74,9 +147,9 @@ class Player():
         cost = 10 + (weight * 2)
         
         if self.stamina < cost:
-            print(f"\n[FATIGUE] Vous êtes trop épuisé pour vous déplacer vers {direction}.")
-            print(f"Endurance actuelle : {round(self.stamina, 1)} | Coût requis : {round(cost, 1)}")
-            print("Essayez de 'drop' (déposer) des objets ou de vous reposer.\n")
+            self.output.print(f"\n[FATIGUE] Vous êtes trop épuisé pour vous déplacer vers {direction}.")
+            self.output.print(f"Endurance actuelle : {round(self.stamina, 1)} | Coût requis : {round(cost, 1)}")
+            self.output.print("Essayez de 'drop' (déposer) des objets ou de vous reposer.\n")
             return False
 
         self.stamina -= cost
@@ -86,33 +159,59 @@ class Player():
         
         # Set the current room to the next room.
         self.current_room = next_room
-        print(f"\n(Endurance restante : {round(self.stamina, 1)}%)")
-        print(self.current_room.get_long_description())
+        self.output.print(f"\n(Endurance restante : {round(self.stamina, 1)}%)")
+        self.output.print(self.current_room.get_long_description())
+        self.move_count += 1
+        self.quest_manager.check_room_objectives(self.current_room.name)
+        self.quest_manager.check_counter_objectives("Se déplacer", self.move_count)
         return True
     
     def add_item(self, name, description, weight):
-        self.inventory[name] = {"description": description,"weight": weight}
+        self.put_item(name, Item.prototype(name, description, weight))
+
+    def put_item(self, name, item):
+        """
+        Place un objet dans l'inventaire et met à jour le poids transporté.
+
+        Exemples :
+        >>> p = Player("Alice")
+        >>> p.add_item("Pomme", "une pomme", 0.1)
+        >>> p.add_item("Épée", "une épée", 2.35)
+        >>> p.get_current_weight()
+        2.45
+        >>> p.remove_item("Pomme").weight
+        0.1
+        >>> p.get_current_weight()
+        2.35
+        """
+        if name in self.inventory:
+            self.remove_item(name)
+        self.inventory[name] = item
+        self.weight_grams += self._grams(item)
+
+    def remove_item(self, name):
+        """Retire un objet de l'inventaire, met à jour le poids et renvoie l'objet."""
+        item = self.inventory.pop(name)
+        self.weight_grams -= self._grams(item)
+        return item
+
+    @staticmethod
+    def _grams(item):
+        return round(item.weight * 1000)
 
     def get_inventory(self):
         if not self.inventory:
-            return f"Votre inventaire vide | Charge : 0/{self.max_weight} kg | Endurance : {self.stamina}%"
+            return f"Votre inventaire vide | Charge : 0/{self.max_weight} kg | Endurance : {round(self.stamina, 1)}%"
 
-        result = f"Vous disposez des items suivant (Charge : {self.get_current_weight()}/{self.max_weight} kg | Endurance : {self.stamina}%)\n"
+        result = f"Vous disposez des items suivant (Charge : {self.get_current_weight()}/{self.max_weight} kg | Endurance : {round(self.stamina, 1)}%)\n"
 
-        for name, infos in self.inventory.items():
-            result += f"    - {name} : {infos['description']} ({infos['weight']} kg)\n"
+        for name, item in self.inventory.items():
+            result += f"    - {name} : {item.description} ({item.weight} kg)\n"
 
         return result
     
     def get_current_weight(self):
-        total = 0.0
-        for item in self.inventory.values():
-            # Si c'est un objet 
-            if hasattr(item, 'weight'):
-                total += item.weight
-            elif isinstance(item, dict):
-                total += item.get('weight', 0)
-        return round(total, 2)
+        return round(self.weight_grams / 1000, 2)
 
     
     def add_reward(self, reward):
@@ -137,7 +236,7 @@ class Player():
         """
         if reward and reward not in self.rewards:
             self.rewards.append(reward)
-            print(f"\n🎁 Vous avez obtenu: {reward}\n")
+            self.output.print(f"\n🎁 Vous avez obtenu: {reward}\n")
 
 
     def show_rewards(self):
@@ -162,12 +261,12 @@ class Player():
         <BLANKLINE>
         """
         if not self.rewards:
-            print("\n🎁 Aucune récompense obtenue pour le moment.\n")
+            self.output.print("\n🎁 Aucune récompense obtenue pour le moment.\n")
         else:
-            print("\n🎁 Vos récompenses:")
+            self.output.print("\n🎁 Vos récompenses:")
             for reward in self.rewards:
-                print(f"  • {reward}")
-            print()
+                self.output.print(f"  • {reward}")
+            self.output.print()
 
     
 
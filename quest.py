@@ -1,5 +1,14 @@
 """ Define the Quest class"""
 
+import time
+
+from output import CONSOLE
+
+
+def _output(player):
+    # Sortie de la partie du joueur, ou la console hors d'une partie
+    return player.output if player is not None else CONSOLE
+
 class Quest:
     """
     This class represents a quest in the game. A quest has a title, description,
@@ -15,6 +24,9 @@ class Quest:
     """
 
 
+    __slots__ = ("title", "description", "objectives", "completed_objectives",
+                 "is_completed", "is_active", "reward")
+
     def __init__(self, title, description, objectives=None, reward=None):
         """
         Initialize a new quest.
@@ -46,9 +58,12 @@ class Quest:
         self.reward = reward
 
 
-    def activate(self):
+    def activate(self, player=None):
         """
         Activate the quest.
+
+        Args:
+            player: The player object (optional), whose game output is used.
         
         Examples:
         
@@ -64,8 +79,9 @@ class Quest:
         True
         """
         self.is_active = True
-        print(f"\n🗡️  Nouvelle quête activée: {self.title}")
-        print(f"📝 {self.description}\n")
+        out = _output(player)
+        out.print(f"\n🗡️  Nouvelle quête activée: {self.title}")
+        out.print(f"📝 {self.description}\n")
 
 
     def complete_objective(self, objective, player=None):
@@ -94,7 +110,7 @@ class Quest:
         """
         if objective in self.objectives and objective not in self.completed_objectives:
             self.completed_objectives.append(objective)
-            print(f"✅ Objectif accompli: {objective}")
+            _output(player).print(f"✅ Objectif accompli: {objective}")
 
             # Check if all objectives are completed
             if len(self.completed_objectives) == len(self.objectives):
@@ -126,12 +142,13 @@ class Quest:
         """
         if not self.is_completed:
             self.is_completed = True
-            print(f"\n🏆 Quête terminée: {self.title}")
+            out = _output(player)
+            out.print(f"\n🏆 Quête terminée: {self.title}")
             if self.reward:
-                print(f"🎁 Récompense: {self.reward}")
+                out.print(f"🎁 Récompense: {self.reward}")
                 if player:
                     player.add_reward(self.reward)
-            print()
+            out.print()
 
 
     def get_status(self):
@@ -377,14 +394,93 @@ class Quest:
         return self.get_status()
 
 
+# Verbes des objectifs de visite d'un lieu (voir Quest.check_room_objective)
+ROOM_VERBS = ("Visiter", "Explorer", "Aller à", "Entrer dans")
+# Mots acceptés entre une action et sa cible (voir Quest.check_action_objective)
+ACTION_LINKS = ("avec", "le", "la")
+
+
+class Objective:
+    """
+    This class represents an objective compiled into a structured form.
+
+    The text of an objective is parsed once into the event keys that can
+    complete it, so that the quest manager can index objectives by
+    (event type, target) instead of rebuilding every text variation on
+    each event.
+
+    Attributes:
+        quest (Quest): The quest the objective belongs to.
+        text (str): The objective text.
+        keys (list): The (event, target) keys that complete the objective.
+        counter (str): The counter name for counting objectives, or None.
+        count (int): The required count for counting objectives, or None.
+
+    Examples:
+
+    >>> objective = Objective(None, "Visiter Castle")
+    >>> ("room", "Castle") in objective.keys
+    True
+    >>> ("parler", "garde") in Objective(None, "parler avec garde").keys
+    True
+    >>> objective = Objective(None, "Se déplacer 10 fois")
+    >>> objective.counter, objective.count
+    ('Se déplacer', 10)
+    """
+
+    __slots__ = ("quest", "text", "keys", "counter", "count")
+
+    def __init__(self, quest, text):
+        self.quest = quest
+        self.text = text
+        # Exact text: matches check_action_objective(text) without target
+        keys = [(text, None)]
+
+        # "<action> <target>" and "<action> avec|le|la <target>"
+        action, _, target = text.partition(" ")
+        if target:
+            keys.append((action, target))
+            link, _, linked_target = target.partition(" ")
+            if link in ACTION_LINKS and linked_target:
+                keys.append((action, linked_target))
+
+        # "Visiter <room>", "Explorer <room>", ...
+        for verb in ROOM_VERBS:
+            if text.startswith(verb + " "):
+                keys.append(("room", text[len(verb) + 1:]))
+
+        self.keys = keys
+
+        # "<counter> <number> ..." (e.g. "Se déplacer 10 fois")
+        self.counter = None
+        self.count = None
+        words = text.split()
+        for i, word in enumerate(words):
+            if word.isdigit():
+                self.counter = " ".join(words[:i])
+                self.count = int(word)
+                break
+
+    def is_pending(self):
+        """Return True if the objective can still be completed."""
+        quest = self.quest
+        return (quest.is_active and not quest.is_completed
+                and self.text not in quest.completed_objectives)
+
+
 class QuestManager:
     """
     This class manages all quests in the game.
+
+    Objectives are compiled when a quest is added and indexed by the
+    (event type, target) keys that can complete them, so checking an
+    event only touches the objectives it can satisfy.
     
     Attributes:
         quests (list): List of all quests in the game.
         active_quests (list): List of currently active quests.
         player: Reference to the player object.
+        metrics (Metrics): Timing of objective checks, or None when disabled.
     """
 
 
@@ -406,6 +502,11 @@ class QuestManager:
         self.quests = []
         self.active_quests = []
         self.player = player
+        self.metrics = None
+        # (event, target) -> pending objectives
+        self._index = {}
+        # counter name -> pending counting objectives
+        self._counters = {}
 
 
     def add_quest(self, quest):
@@ -426,6 +527,53 @@ class QuestManager:
         'Quest 1'
         """
         self.quests.append(quest)
+        for text in quest.objectives:
+            objective = Objective(quest, text)
+            for key in objective.keys:
+                self._index.setdefault(key, []).append(objective)
+            if objective.counter is not None:
+                self._counters.setdefault(objective.counter, []).append(objective)
+
+
+    def _dispatch(self, key):
+        """
+        Complete the pending objectives indexed under `key`.
+
+        Each quest completes at most one objective per event.
+
+        Returns:
+            bool: True if at least one objective was completed.
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return self._complete_indexed(key)
+        start = time.perf_counter()
+        completed = self._complete_indexed(key)
+        metrics.observe("tba_quest_check_duration_seconds", key[0], time.perf_counter() - start)
+        return completed
+
+
+    def _complete_indexed(self, key):
+        candidates = self._index.get(key)
+        if not candidates:
+            return False
+        completed_quests = []
+        for objective in candidates:
+            quest = objective.quest
+            if quest in completed_quests or not objective.is_pending():
+                continue
+            if quest.complete_objective(objective.text, self.player):
+                completed_quests.append(quest)
+                self._retire(quest)
+        # Keep only objectives that may still be completed
+        self._index[key] = [o for o in candidates if o.text not in o.quest.completed_objectives]
+        return bool(completed_quests)
+
+
+    def _retire(self, quest):
+        # Remove completed quests from active list
+        if quest.is_completed and quest in self.active_quests:
+            self.active_quests.remove(quest)
 
 
     def activate_quest(self, quest_title):
@@ -456,7 +604,7 @@ class QuestManager:
         """
         for quest in self.quests:
             if quest.title == quest_title and not quest.is_active:
-                quest.activate()
+                quest.activate(self.player)
                 self.active_quests.append(quest)
                 return True
         return False
@@ -492,11 +640,11 @@ class QuestManager:
         >>> manager.complete_objective("Do nothing")
         False
         """
-        for quest in self.active_quests:
-            if quest.complete_objective(objective_text):
-                # Remove completed quests from active list
-                if quest.is_completed:
-                    self.active_quests.remove(quest)
+        for objective in self._index.get((objective_text, None), []):
+            if objective.is_pending():
+                quest = objective.quest
+                quest.complete_objective(objective_text, self.player)
+                self._retire(quest)
                 return True
         return False
 
@@ -527,10 +675,7 @@ class QuestManager:
         >>> len(manager.active_quests)
         0
         """
-        for quest in self.active_quests[:]:  # Use slice to avoid modification during iteration
-            quest.check_room_objective(room_name, self.player)
-            if quest.is_completed:
-                self.active_quests.remove(quest)
+        self._dispatch(("room", room_name))
 
 
     def check_action_objectives(self, action, target=None):
@@ -560,10 +705,7 @@ class QuestManager:
         >>> len(manager.active_quests)
         0
         """
-        for quest in self.active_quests[:]:
-            quest.check_action_objective(action, target, self.player)
-            if quest.is_completed:
-                self.active_quests.remove(quest)
+        self._dispatch((action, target) if target else (action, None))
 
 
     def check_counter_objectives(self, counter_name, current_count):
@@ -596,10 +738,28 @@ class QuestManager:
         >>> len(manager.active_quests)
         0
         """
-        for quest in self.active_quests[:]:
-            quest.check_counter_objective(counter_name, current_count, self.player)
-            if quest.is_completed:
-                self.active_quests.remove(quest)
+        metrics = self.metrics
+        if metrics is None:
+            return self._complete_counters(counter_name, current_count)
+        start = time.perf_counter()
+        self._complete_counters(counter_name, current_count)
+        metrics.observe("tba_quest_check_duration_seconds", "counter", time.perf_counter() - start)
+
+
+    def _complete_counters(self, counter_name, current_count):
+        objectives = self._counters.get(counter_name)
+        if not objectives:
+            return
+        completed_quests = []
+        for objective in objectives:
+            quest = objective.quest
+            if quest in completed_quests or not objective.is_pending():
+                continue
+            if current_count >= objective.count:
+                quest.complete_objective(objective.text, self.player)
+                completed_quests.append(quest)
+                self._retire(quest)
+        self._counters[counter_name] = [o for o in objectives if o.text not in o.quest.completed_objectives]
 
 
     def get_active_quests(self):
@@ -665,10 +825,10 @@ class QuestManager:
         >>> quest2 = Quest("Open Door", "Open the locked door")
         >>> manager.add_quest(quest1)
         >>> manager.add_quest(quest2)
-        >>> found = manager.get_quest_by_title("Find Key")
+        >>> found = manager.get_quest("Find Key")
         >>> found.title
         'Find Key'
-        >>> manager.get_quest_by_title("Unknown") is None
+        >>> manager.get_quest("Unknown") is None
         True
         """
         for quest in self.quests:
@@ -696,14 +856,15 @@ class QuestManager:
         ❓ Display Quest (Non activée)
         <BLANKLINE>
         """
+        out = _output(self.player)
         if not self.quests:
-            print("\nAucune quête disponible.\n")
+            out.print("\nAucune quête disponible.\n")
             return
 
-        print("\n📋 Liste des quêtes:")
+        out.print("\n📋 Liste des quêtes:")
         for quest in self.quests:
-            print(f"  {quest.get_status()}")
-        print()
+            out.print(f"  {quest.get_status()}")
+        out.print()
 
 
     def show_quest_details(self, quest_title, current_counts=None):
@@ -732,8 +893,9 @@ class QuestManager:
         Quête 'Unknown' non trouvée.
         <BLANKLINE>
         """
-        quest = self.get_quest_by_title(quest_title)
+        quest = self.get_quest(quest_title)
+        out = _output(self.player)
         if quest:
-            print(quest.get_details(current_counts))
+            out.print(quest.get_details(current_counts))
         else:
-            print(f"\nQuête '{quest_title}' non trouvée.\n")
+            out.print(f"\nQuête '{quest_title}' non trouvée.\n")
@@ -0,0 +1,134 @@
+# Description: enregistrement et rejeu des parties.
+#
+# Usage : python game.py --seed 42 --record partie.jsonl
+#         python replay.py partie.jsonl
+#
+# Un journal de partie est un fichier JSON lines : la première ligne donne
+# la graine, le nom du joueur et le fichier de monde ; chaque ligne
+# suivante donne une commande et l'empreinte (CRC32) de la sortie qu'elle
+# a produite. Le rejeu exécute les commandes sans interaction et vérifie
+# que chaque sortie est identique à l'originale.
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import zlib
+
+from game import Game
+
+# À incrémenter à chaque changement du format du journal
+LOG_VERSION = 1
+
+
+def fingerprint(text):
+    """Renvoie l'empreinte de la sortie d'une commande."""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class Recorder:
+    """
+    Classe enregistrant les commandes d'une partie dans un journal.
+
+    L'enregistreur est rattaché à `game.recorder` ; `Game.process_command`
+    lui transmet chaque commande et sa sortie. L'en-tête est écrit à la
+    première commande, une fois le joueur créé.
+
+    Attributs :
+    file : file
+        Le fichier texte du journal.
+    game : Game
+        La partie enregistrée.
+    count : int
+        Le nombre de commandes enregistrées.
+
+    Exemples :
+    >>> log = io.StringIO()
+    >>> game = Game("Alice", seed=7)
+    >>> game.setup()
+    >>> game.recorder = Recorder(log, game)
+    >>> _ = game.run_script(["go N", "look", "go S"])
+    >>> result = replay(io.StringIO(log.getvalue()))
+    >>> result.commands, result.mismatch
+    (3, None)
+    """
+
+    # Define the constructor.
+    def __init__(self, file, game):
+        self.file = file
+        self.game = game
+        self.count = 0
+
+    def record(self, command_string, output):
+        if self.count == 0:
+            game = self.game
+            header = {"version": LOG_VERSION, "seed": game.seed,
+                      "player": game.player_name, "world": game.world_file}
+            self.file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        self.file.write(json.dumps([command_string, fingerprint(output)], ensure_ascii=False) + "\n")
+        self.count += 1
+
+
+class ReplayResult:
+    """
+    Classe représentant le résultat d'un rejeu.
+
+    Attributs :
+    commands : int
+        Le nombre de commandes rejouées.
+    seconds : float
+        La durée du rejeu.
+    mismatch : int or None
+        Le numéro (à partir de 1) de la première commande dont la sortie
+        diffère de l'originale, ou None si tout est identique.
+    """
+
+    # Define the constructor.
+    def __init__(self, commands, seconds, mismatch):
+        self.commands = commands
+        self.seconds = seconds
+        self.mismatch = mismatch
+
+
+def replay(file, stop_on_mismatch=True):
+    """
+    Rejoue le journal `file` (fichier texte ouvert) et renvoie un `ReplayResult`.
+    """
+    header = json.loads(file.readline())
+    if header.get("version") != LOG_VERSION:
+        raise ValueError(f"Version de journal non prise en charge : {header.get('version')}")
+    count = 0
+    mismatch = None
+    with open(os.devnull, "w", encoding="utf-8") as sink:
+        game = Game(header["player"], sink, world_file=header["world"], seed=header["seed"])
+        game.setup()
+        start = time.perf_counter()
+        for line in file:
+            command_string, expected = json.loads(line)
+            text = game.process_command(command_string)
+            count += 1
+            if mismatch is None and fingerprint(text) != expected:
+                mismatch = count
+                if stop_on_mismatch:
+                    break
+    return ReplayResult(count, time.perf_counter() - start, mismatch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejoue un journal de partie")
+    parser.add_argument("log", help="journal écrit par game.py --record")
+    args = parser.parse_args()
+    with open(args.log, encoding="utf-8") as f:
+        result = replay(f)
+    rate = result.commands / result.seconds if result.seconds else float("inf")
+    print(f"{result.commands} commandes rejouées en {result.seconds:.2f} s ({rate:.0f} commandes/s)")
+    if result.mismatch is not None:
+        print(f"Sortie différente à la commande {result.mismatch}")
+        sys.exit(1)
+    print("Sortie identique")
+
+
+if __name__ == "__main__":
+    main()
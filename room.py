@@ -26,6 +26,14 @@ class Room:
     get_long_description()
         Retourne une description complète de la pièce, incluant les sorties.
 
+    Le texte affiché (`look`, `get_long_description`, `get_inventory`)
+    est mis en cache : il n'est reconstruit que lorsque le numéro de
+    `version` de la pièce a changé. Les méthodes qui modifient les objets,
+    les personnages ou les sorties (`put_item`, `remove_item`,
+    `add_character`, `remove_character`, `set_exit`) incrémentent ce
+    numéro ; une modification directe des dictionnaires doit être suivie
+    d'un appel à `touch`.
+
     Exceptions :
     Aucune exception spécifique n’est levée par cette classe.
 
@@ -39,8 +47,24 @@ class Room:
     True
     >>> "est" in r1.get_exit_string()
     True
+    >>> r1.look() is r1.look()
+    True
+    >>> from item import Item
+    >>> r1.put_item("Pomme", Item.prototype("Pomme", "une pomme", 0.1))
+    >>> print(r1.look())
+    <BLANKLINE>
+    dans une cuisine lumineuse
+    On voit :
+        - Pomme : une pomme (0.1 kg)
+    <BLANKLINE>
     """
 
+    __slots__ = ("name", "description", "exits", "inventory", "characters",
+                 "containers", "locked", "difficulty", "version", "_cache")
+
+    # Pièce générée par la partie (voir dungeon.py) plutôt que définie par le monde
+    generated = False
+
     # Define the constructor.
     def __init__(self, name, description):
         self.name = name
@@ -51,56 +75,97 @@ class Room:
         self.containers = {} 
         self.locked = False
         self.difficulty = 0 
+        # Numéro de version du contenu, et textes déjà rendus :
+        # type de rendu -> (version, texte)
+        self.version = 0
+        self._cache = None
+
+    def touch(self):
+        """Signale une modification de la pièce : les rendus en cache sont périmés."""
+        self.version += 1
+
+    def put_item(self, name, item):
+        self.inventory[name] = item
+        self.version += 1
+
+    def remove_item(self, name):
+        item = self.inventory.pop(name)
+        self.version += 1
+        return item
+
+    def add_character(self, character):
+        self.characters[character.key] = character
+        self.version += 1
+
+    def remove_character(self, character):
+        if self.characters.pop(character.key, None) is not None:
+            self.version += 1
+
+    def set_exit(self, direction, room):
+        self.exits[direction] = room
+        self.version += 1
+
+    def _cached(self, kind, render):
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        entry = cache.get(kind)
+        if entry is not None and entry[0] == self.version:
+            return entry[1]
+        text = render()
+        cache[kind] = (self.version, text)
+        return text
 
     # Define the get_exit method.
     def get_exit(self, direction):
         # Return the room in the given direction if it exists.
-        if direction in self.exits.keys():
-            return self.exits[direction]
-        else:
-            return None
+        return self.exits.get(direction)
 
     # Return a string describing the room's exits.
     def get_exit_string(self):
-        exit_string = "Sorties: "
-        for exit in self.exits.keys():
-            if self.exits.get(exit) is not None:
-                exit_string += exit + ", "
-        exit_string = exit_string.strip(", ")
-        return exit_string
+        return self._cached("exits", self._render_exits)
+
+    def _render_exits(self):
+        exits = ", ".join(direction for direction, room in self.exits.items() if room is not None)
+        return f"Sorties: {exits}".strip(", ")
 
     # Return a long description of this room including exits.
     def get_long_description(self):
+        return self._cached("long", self._render_long_description)
+
+    def _render_long_description(self):
         return f"\nVous êtes dans {self.description}\n\n{self.get_exit_string()}\n"
 
     def get_inventory(self):
+        return self._cached("inventory", self._render_inventory)
+
+    def _render_inventory(self):
         if not self.inventory:
             return "Il n'y a rien ici."
+        lines = ["La pièce contient :\n"]
+        for name, item in self.inventory.items():
+            lines.append(f"    - {name} : {item.description} ({item.weight} kg)\n")
+        return "".join(lines)
 
-        result = "La pièce contient :\n"
+    def look(self):
+        return self._cached("look", self._render_look)
 
-        for name, infos in self.inventory.items():
-            result += f"    - {name} : {infos['description']} ({infos['weight']} kg)\n"
+    def _render_look(self):
+        lines = [f"\n{self.description}\n"]
 
-        return result
-    def look(self):
-        msg = f"\n{self.description}\n"
-        
         # Affichage des items
         if self.inventory:
-            msg += "On voit :\n"
+            lines.append("On voit :\n")
             for name, item in self.inventory.items():
-                d = item.get('description', '') if isinstance(item, dict) else item.description
-                w = item.get('weight', 0) if isinstance(item, dict) else item.weight
-                msg += f"    - {name} : {d} ({w} kg)\n"
-        
+                lines.append(f"    - {name} : {item.description} ({item.weight} kg)\n")
+
         # Affichage des PNJ
         if self.characters:
-            msg += "Personnages présents :\n"
+            lines.append("Personnages présents :\n")
             for char in self.characters.values():
-                msg += f"    - {char}\n"
-        
+                lines.append(f"    - {char}\n")
+
         if not self.inventory and not self.characters:
-            msg += "Il n'y a rien ni personne ici."
-            
-        return msg
+            lines.append("Il n'y a rien ni personne ici.")
+
+        return "".join(lines)
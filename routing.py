@@ -0,0 +1,275 @@
+# Define the RoutingTable class.
+
+from collections import OrderedDict, deque
+
+# En dessous de cette taille, une recherche en largeur par requête suffit
+TABLE_MIN_ROOMS = 1000
+
+
+def find_path(start, goal, is_locked=None, view=None):
+    """
+    Recherche en largeur du plus court chemin de `start` à `goal`.
+
+    Les pièces verrouillées (selon `is_locked`, par défaut l'attribut
+    `locked`) ne peuvent pas être traversées. Les sorties d'une pièce
+    sont lues sur `view(pièce)` si `view` est donnée (version de la
+    pièce vue par une session).
+
+    Renvoie la liste des directions à suivre, [] si `start` est `goal`,
+    ou None si `goal` est inaccessible.
+
+    Exemples :
+    >>> from room import Room
+    >>> a, b, c = Room("A", "a"), Room("B", "b"), Room("C", "c")
+    >>> a.exits = {"N": b}
+    >>> b.exits = {"E": c, "S": a}
+    >>> find_path(a, c)
+    ['N', 'E']
+    >>> find_path(c, a) is None
+    True
+    >>> b.locked = True
+    >>> find_path(a, c) is None
+    True
+    """
+    if is_locked is None:
+        is_locked = lambda room: room.locked
+    if start.name == goal.name:
+        return []
+    # pièce -> (pièce précédente, direction)
+    came_from = {start.name: None}
+    queue = deque([start])
+    while queue:
+        room = queue.popleft()
+        exits = room.exits if view is None else view(room).exits
+        for direction, next_room in exits.items():
+            if next_room is None or next_room.name in came_from or is_locked(next_room):
+                continue
+            came_from[next_room.name] = (room.name, direction)
+            if next_room.name == goal.name:
+                path = []
+                step = came_from[goal.name]
+                while step is not None:
+                    path.append(step[1])
+                    step = came_from[step[0]]
+                path.reverse()
+                return path
+            queue.append(next_room)
+    return None
+
+
+class RoutingTable:
+    """
+    Classe répondant à « quelle direction prendre pour aller de A à B ».
+
+    Pour les petits mondes, chaque requête est une recherche en largeur.
+    Pour les grands mondes, la table calcule pour chaque destination
+    demandée un arbre des plus courts chemins (recherche en largeur
+    inversée depuis la destination) qui donne la direction à prendre
+    depuis n'importe quelle pièce ; la requête suivante vers la même
+    destination est alors une simple lecture de dictionnaire.
+
+    Quand une sortie ou un verrou change (`set_exit`, `set_locked`), seuls
+    les arbres concernés sont invalidés et recalculés à la demande.
+
+    Les pièces sont identifiées par leur nom, ce qui rend la table
+    indépendante des copies de pièces propres à une session. La topologie
+    (`build_topology`) est construite une fois par monde et partagée par
+    les tables des sessions, qui ne gardent que leurs arbres et leurs
+    sorties modifiées.
+
+    Attributs :
+    rooms : dict
+        Les pièces du monde, indexées par nom.
+    world_state : WorldState or None
+        L'état de la session, pour lire l'état des verrous.
+    use_table : bool
+        True si les arbres de routage sont mis en cache.
+
+    Exemples :
+    >>> from room import Room
+    >>> a, b, c = Room("A", "a"), Room("B", "b"), Room("C", "c")
+    >>> a.exits = {"N": b}
+    >>> b.exits = {"E": c, "S": a}
+    >>> c.exits = {"O": b}
+    >>> table = RoutingTable([a, b, c], use_table=True)
+    >>> table.route(a, c)
+    ['N', 'E']
+    >>> table.next_hop(c, a)
+    'O'
+    >>> table.set_exit(a, "E", c)
+    >>> table.route(a, c)
+    ['E']
+    >>> table.set_locked(c, True)
+    >>> table.route(a, c) is None
+    True
+    >>> topology = RoutingTable.build_topology([a, b, c])
+    >>> first = RoutingTable([a, b, c], topology=topology)
+    >>> second = RoutingTable([a, b, c], topology=topology)
+    >>> first.rooms is second.rooms, second.route(c, a)
+    (True, ['O', 'S'])
+
+    Avec l'état d'une session, une sortie modifiée ne vaut que pour elle :
+
+    >>> from world import get_world, WorldState
+    >>> world = get_world()
+    >>> table = world.create_routing(WorldState(world))
+    >>> forest, top = world.get_room("Forest"), world.get_room("Tower-Top")
+    >>> table.set_exit(forest, "U", top)
+    >>> table.route(forest, top), forest.exits["U"]
+    (['U'], None)
+    >>> world.create_routing(WorldState(world)).route(forest, top)
+    ['N', 'E', 'S', 'U']
+    """
+
+    # Define the constructor.
+    def __init__(self, rooms, world_state=None, use_table=None, max_trees=256, topology=None):
+        # La topologie ne dépend que du monde : elle peut être partagée
+        # entre les sessions (voir build_topology)
+        if topology is None:
+            topology = self.build_topology(rooms)
+        self.rooms, self._names, self._predecessors = topology
+        self.world_state = world_state
+        self.use_table = len(self.rooms) >= TABLE_MIN_ROOMS if use_table is None else use_table
+        self.max_trees = max_trees
+        # Arbres calculés : destination -> (distances, directions), du plus ancien au plus récent
+        self._trees = OrderedDict()
+        # Sorties inversées modifiées par `set_exit`, propres à la table :
+        # la topologie partagée n'est jamais modifiée
+        self._own_predecessors = {}
+        if world_state is not None:
+            world_state.routing = self
+
+    @staticmethod
+    def build_topology(rooms):
+        """
+        Renvoie la topologie de `rooms` : (pièces par nom, noms en
+        minuscules -> noms, sorties inversées : pièce -> [(pièce
+        précédente, direction)]).
+        """
+        by_name = {room.name: room for room in rooms}
+        # Noms en minuscules -> noms, pour retrouver une pièce tapée par le joueur
+        names = {name.lower(): name for name in by_name}
+        predecessors = {name: [] for name in by_name}
+        for room in rooms:
+            for direction, next_room in room.exits.items():
+                if next_room is not None:
+                    predecessors[next_room.name].append((room.name, direction))
+        return by_name, names, predecessors
+
+    def _predecessors_of(self, name):
+        own = self._own_predecessors.get(name)
+        return own if own is not None else self._predecessors[name]
+
+    def reset(self, world_state):
+        """Rattache la table à une nouvelle session (les arbres calculés sont oubliés)."""
+        self.world_state = world_state
+        self._trees.clear()
+        self._own_predecessors.clear()
+        if world_state is not None:
+            world_state.routing = self
+
+    def find_room(self, name):
+        """Renvoie la pièce nommée `name` (sans tenir compte de la casse), ou None."""
+        name = self._names.get(name.strip().lower())
+        return self.rooms.get(name) if name is not None else None
+
+    def _view(self, room):
+        if self.world_state is not None:
+            return self.world_state.room(room)
+        return room
+
+    def is_locked(self, room):
+        return self._view(room).locked
+
+    def route(self, start, goal):
+        """Renvoie la liste des directions de `start` à `goal`, ou None."""
+        if not self.use_table:
+            return find_path(start, goal, self.is_locked, self._view)
+        path = []
+        room = start
+        while room.name != goal.name:
+            direction = self.next_hop(room, goal)
+            if direction is None:
+                return None
+            path.append(direction)
+            room = self._view(room).exits[direction]
+        return path
+
+    def next_hop(self, room, goal):
+        """Renvoie la direction à prendre depuis `room` pour aller vers `goal`, ou None."""
+        if not self.use_table:
+            path = find_path(room, goal, self.is_locked, self._view)
+            return path[0] if path else None
+        return self._tree(goal.name)[1].get(room.name)
+
+    def _tree(self, goal):
+        tree = self._trees.get(goal)
+        if tree is not None:
+            self._trees.move_to_end(goal)
+            return tree
+        distances = {goal: 0}
+        hops = {}
+        if not self.is_locked(self.rooms[goal]):
+            queue = deque([goal])
+            while queue:
+                name = queue.popleft()
+                # On n'entre dans `name` que s'il n'est pas verrouillé
+                if name != goal and self.is_locked(self.rooms[name]):
+                    continue
+                for previous, direction in self._predecessors_of(name):
+                    if previous not in distances:
+                        distances[previous] = distances[name] + 1
+                        hops[previous] = direction
+                        queue.append(previous)
+        tree = (distances, hops)
+        self._trees[goal] = tree
+        if len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+        return tree
+
+    def set_exit(self, room, direction, target):
+        """
+        Modifie une sortie de `room` (dans la session) et met à jour les
+        arbres concernés. Les pièces hors du monde (donjon) ne font pas
+        partie des arbres.
+        """
+        if self.world_state is not None:
+            room = self.world_state.mutable(room)
+        old = room.exits.get(direction)
+        room.set_exit(direction, target)
+        name = room.name
+        predecessors = self._predecessors
+        if name not in predecessors:
+            return
+        own = self._own_predecessors
+        if old is not None and old.name in predecessors:
+            own[old.name] = [entry for entry in self._predecessors_of(old.name) if entry != (name, direction)]
+        if target is not None and target.name in predecessors:
+            own[target.name] = self._predecessors_of(target.name) + [(name, direction)]
+        for goal, (distances, hops) in list(self._trees.items()):
+            # Sortie supprimée ou détournée alors que l'arbre l'utilisait
+            if hops.get(name) == direction:
+                del self._trees[goal]
+            # Nouvelle sortie offrant un chemin plus court
+            elif target is not None and target.name in distances \
+                    and distances[target.name] + 1 < distances.get(name, float("inf")):
+                del self._trees[goal]
+
+    def set_locked(self, room, locked):
+        """Verrouille ou déverrouille `room` et invalide les arbres concernés."""
+        if self.world_state is not None:
+            room = self.world_state.mutable(room)
+        room.locked = locked
+        name = room.name
+        if name not in self._predecessors:
+            return
+        for goal, (distances, hops) in list(self._trees.items()):
+            if locked:
+                # Les arbres qui passaient par cette pièce ne sont plus valides
+                if name == goal or any(hops.get(previous) == direction
+                                       for previous, direction in self._predecessors_of(name)):
+                    del self._trees[goal]
+            elif name not in distances or any(
+                    previous not in distances or distances[previous] > distances[name] + 1
+                    for previous, _ in self._predecessors_of(name)):
+                del self._trees[goal]
@@ -0,0 +1,332 @@
+# Description: sauvegarde et restauration d'une partie.
+#
+# Une sauvegarde ne contient que ce qui diffère du monde tel qu'il est
+# défini (pièces dont le contenu a changé, PNJ déplacés, quêtes en
+# cours...). Les pièces et les objets y sont désignés par leur identifiant
+# entier dans le monde (`World.room_id`, `World.item_table`), ce qui garde
+# le fichier petit même pour un très grand monde.
+#
+# Les pièces du donjon (dungeon.py) sont numérotées après celles du monde ;
+# seules celles dont le contenu diffère de la génération sont enregistrées.
+#
+# Format (JSON compact) :
+# {"version": 1, "rooms": <nombre de pièces du monde>, "start": <nom>,
+#  "player": {...}, "quests": [[indice, active, terminée, [objectifs]]],
+#  "room_state": [[pièce, verrouillée, [objets]]],
+#  "npcs": [[indice, pièce, {attributs modifiés}]]}
+#
+# Un objet est codé par son identifiant, ou par un dict quand son nom dans
+# l'inventaire diffère du sien, qu'il a un état (pièce mémorisée d'un
+# Beamer) ou qu'il n'est pas défini par le monde.
+
+import copy
+import json
+import os
+import re
+
+from item import Item
+from player import Player
+
+# À incrémenter à chaque changement du format
+SAVE_VERSION = 1
+# Répertoire des sauvegardes, à côté des modules du jeu
+SAVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saves")
+SAVE_SUFFIX = ".sav"
+# Noms de sauvegarde acceptés (pas de chemin)
+SAVE_NAME = re.compile(r"[\w-]{1,64}")
+
+# Attributs du joueur enregistrés s'ils diffèrent de ceux d'un nouveau joueur
+PLAYER_FIELDS = ("stamina", "groschens", "move_count", "max_weight",
+                 "lockpicking_level", "agility", "has_lockpick", "rewards")
+# Attributs de la partie recréés par une restauration (voir Game.start_session)
+SESSION_FIELDS = ("player_name", "world_state", "routing", "dungeon", "player", "scheduler", "npcs", "crowd")
+
+
+class SaveError(Exception):
+    """Sauvegarde illisible ou incompatible avec le monde chargé."""
+
+
+def save_path(name):
+    """
+    Renvoie le chemin de la sauvegarde `name`, ou lève SaveError si le nom
+    n'est pas valide.
+
+    >>> os.path.basename(save_path("Alice"))
+    'Alice.sav'
+    >>> save_path("../secret")
+    Traceback (most recent call last):
+    ...
+    savegame.SaveError: Nom de sauvegarde invalide : '../secret'.
+    """
+    if not SAVE_NAME.fullmatch(name):
+        raise SaveError(f"Nom de sauvegarde invalide : '{name}'.")
+    return os.path.join(SAVE_DIR, name + SAVE_SUFFIX)
+
+
+def _encode_item(world, name, item):
+    items, ids = world.item_table()
+    item_id = ids.get(item.key())
+    saved_room = getattr(item, "saved_room", None)
+    if item_id is not None and name == item.name and saved_room is None:
+        return item_id
+    entry = {"id": item_id} if item_id is not None else {"item": [item.name, item.description, item.weight]}
+    if name != item.name:
+        entry["name"] = name
+    if saved_room is not None:
+        entry["room"] = world.room_id(saved_room)
+    return entry
+
+
+def _room(game, room_id):
+    # Pièce d'identifiant `room_id` : pièce du monde ou du donjon (matérialisée au besoin)
+    world = game.world
+    if room_id < len(world.rooms):
+        return world.rooms[room_id]
+    if game.dungeon is None:
+        raise SaveError("Cette sauvegarde a été faite avec un autre monde.")
+    return game.dungeon.room(room_id - len(world.rooms))
+
+
+def _decode_item(game, entry):
+    items, _ = game.world.item_table()
+    if isinstance(entry, int):
+        item = items[entry]
+        return item.name, copy.copy(item) if item.stateful else item
+    if "id" in entry:
+        item = items[entry["id"]]
+        item = copy.copy(item) if item.stateful else item
+    else:
+        item = Item.prototype(*entry["item"])
+    if "room" in entry:
+        item.saved_room = _room(game, entry["room"])
+    return entry.get("name", item.name), item
+
+
+def _encode_inventory(world, inventory):
+    return [_encode_item(world, name, item) for name, item in inventory.items()]
+
+
+def _decode_inventory(game, entries):
+    return dict(_decode_item(game, entry) for entry in entries)
+
+
+def inventory_probe(inventory):
+    """
+    Relevé peu coûteux d'un inventaire, pour savoir s'il a changé : objets
+    (comparés par identité) et état des objets à état.
+    """
+    return (list(inventory.items()),
+            [item.saved_room for item in inventory.values() if item.stateful])
+
+
+def player_record(world, player):
+    """
+    Renvoie l'état du joueur (sans l'historique) : pièce, inventaire et
+    attributs de PLAYER_FIELDS.
+    """
+    record = {
+        "room": world.room_id(player.current_room),
+        "inventory": _encode_inventory(world, player.inventory),
+    }
+    for field in PLAYER_FIELDS:
+        value = getattr(player, field)
+        record[field] = list(value) if isinstance(value, list) else value
+    return record
+
+
+def quest_entry(i, quest):
+    """Renvoie l'état de la quête d'indice `i` : [indice, active, terminée, [objectifs]]."""
+    done = [quest.objectives.index(text) for text in quest.completed_objectives]
+    return [i, quest.is_active, quest.is_completed, done]
+
+
+def room_entry(world, room):
+    """Renvoie l'état de la pièce : [identifiant, verrouillée, [objets]]."""
+    return [world.room_id(room), room.locked, _encode_inventory(world, room.inventory)]
+
+
+def npc_entry(world, i, npc, spec):
+    """Renvoie l'état du PNJ d'indice `i` : [indice, pièce, {attributs modifiés}]."""
+    changes = {}
+    if npc.hp != spec.get("hp"):
+        changes["hp"] = npc.hp
+    if npc.quest_stage != spec.get("quest_stage", 0):
+        changes["quest_stage"] = npc.quest_stage
+    if list(npc.inventory) != [item["name"] for item in spec.get("inventory", [])]:
+        changes["inventory"] = _encode_inventory(world, npc.inventory)
+    if len(npc.msgs) != len(npc.original_msgs):
+        changes["msgs"] = len(npc.msgs)
+    return [i, world.room_id(npc.current_room), changes]
+
+
+def snapshot(game):
+    """Renvoie l'état de la partie sous forme de dict sérialisable en JSON."""
+    world = game.world
+    player = game.player
+    default = Player(player.name)
+    record = player_record(world, player)
+    saved = {"name": player.name, "room": record["room"],
+             "history": [world.room_id(room) for room in player.history],
+             "inventory": record["inventory"]}
+    for field in PLAYER_FIELDS:
+        if record[field] != getattr(default, field):
+            saved[field] = record[field]
+    data = {
+        "version": SAVE_VERSION,
+        "rooms": len(world.rooms),
+        "start": world.start.name,
+        "player": saved,
+    }
+
+    data["quests"] = [quest_entry(i, quest) for i, quest in enumerate(player.quest_manager.quests)
+                      if quest.is_active or quest.completed_objectives]
+
+    # Pièces dont le contenu diffère de la définition du monde
+    room_state = []
+    for room in game.world_state.own_rooms():
+        shared = world.get_room(room.name)
+        # Cas le plus courant (pièce copiée au passage d'un PNJ) : mêmes objets
+        if room.locked == shared.locked and room.inventory == shared.inventory:
+            continue
+        entry = room_entry(world, room)
+        if entry != room_entry(world, shared):
+            room_state.append(entry)
+    if game.dungeon is not None:
+        for ordinal, locked, inventory in game.dungeon.changes():
+            room_state.append([len(world.rooms) + ordinal, locked, _encode_inventory(world, inventory)])
+    # Ordre des identifiants, et non celui des copies : deux parties dans le
+    # même état ont la même sauvegarde
+    room_state.sort(key=lambda entry: entry[0])
+    data["room_state"] = room_state
+
+    # PNJ qui ont quitté leur pièce de départ ou dont l'état a changé
+    npcs = []
+    for i, (npc, spec) in enumerate(zip(game.npcs, world.characters)):
+        entry = npc_entry(world, i, npc, spec)
+        if npc.current_room.name != spec["room"] or entry[2]:
+            npcs.append(entry)
+    data["npcs"] = npcs
+    return data
+
+
+def restore(game, data):
+    """
+    Remplace l'état de la partie par celui de `data` (voir `snapshot`).
+
+    Lève SaveError si la sauvegarde est illisible ou ne correspond pas au
+    monde chargé ; la partie est alors laissée telle quelle.
+
+    Exemples :
+    >>> from game import Game
+    >>> game = Game("Alice", seed=3)
+    >>> game.setup()
+    >>> _ = game.run_script(["take Boussole en argent", "go N", "activate La Boussole de Germain"])
+    >>> data = json.loads(json.dumps(snapshot(game)))
+    >>> other = Game("Bob", seed=3)
+    >>> other.setup()
+    >>> restore(other, data)
+    >>> other.player.name, other.player.current_room.name
+    ('Alice', 'Tower')
+    >>> other.player.get_inventory() == game.player.get_inventory()
+    True
+    >>> snapshot(other) == data
+    True
+    >>> data["player"]["inventory"] = [1000000]
+    >>> restore(other, data)
+    Traceback (most recent call last):
+    ...
+    savegame.SaveError: Sauvegarde illisible.
+    >>> other.player.get_inventory() == game.player.get_inventory()
+    True
+    """
+    if not isinstance(data, dict):
+        raise SaveError("Sauvegarde illisible.")
+    if data.get("version") != SAVE_VERSION:
+        raise SaveError(f"Version de sauvegarde non prise en charge : {data.get('version')}.")
+    # La session est recréée avant d'être remplie : en cas d'échec, la
+    # partie reprend l'état qu'elle avait avant la restauration
+    previous = {name: getattr(game, name) for name in SESSION_FIELDS}
+    rng_state = game.scheduler.rng.getstate()
+    try:
+        _restore(game, data)
+    except BaseException as e:
+        for name, value in previous.items():
+            setattr(game, name, value)
+        game.scheduler.rng.setstate(rng_state)
+        if isinstance(e, (LookupError, TypeError, ValueError)):
+            raise SaveError("Sauvegarde illisible.") from e
+        raise
+
+
+def _restore(game, data):
+    world = game.world
+    if data["rooms"] != len(world.rooms) or data["start"] != world.start.name:
+        raise SaveError("Cette sauvegarde a été faite avec un autre monde.")
+
+    game.player_name = data["player"]["name"]
+    game.start_session()
+    state = game.world_state
+    player = game.player
+
+    saved = data["player"]
+    player.current_room = _room(game, saved["room"])
+    player.history = [_room(game, i) for i in saved["history"]]
+    for name, item in _decode_inventory(game, saved["inventory"]).items():
+        player.put_item(name, item)
+    for field in PLAYER_FIELDS:
+        if field in saved:
+            setattr(player, field, saved[field])
+
+    manager = player.quest_manager
+    for i, active, completed, done in data["quests"]:
+        quest = manager.quests[i]
+        quest.is_active = active
+        quest.is_completed = completed
+        quest.completed_objectives = [quest.objectives[j] for j in done]
+        if active and not completed:
+            manager.active_quests.append(quest)
+
+    for room_id, locked, items in data["room_state"]:
+        room = state.mutable(_room(game, room_id))
+        game.routing.set_locked(room, locked)
+        room.inventory = _decode_inventory(game, items)
+        room.touch()
+
+    for i, room_id, changes in data["npcs"]:
+        npc = game.npcs[i]
+        npc.current_room.remove_character(npc)
+        npc.current_room = state.mutable(_room(game, room_id))
+        npc.current_room.add_character(npc)
+        for attribute, value in changes.items():
+            if attribute == "inventory":
+                value = _decode_inventory(game, value)
+            elif attribute == "msgs":
+                value = npc.original_msgs[len(npc.original_msgs) - value:]
+            setattr(npc, attribute, value)
+
+    # Étages matérialisés pour la restauration : on ne garde que ceux proches
+    # du joueur, reliés par leurs escaliers avant la prochaine commande
+    game.prepare_surroundings()
+
+
+def save(game, path):
+    """Écrit la sauvegarde de la partie dans le fichier `path` et renvoie sa taille."""
+    text = json.dumps(snapshot(game), ensure_ascii=False, separators=(",", ":"))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return len(text.encode("utf-8"))
+
+
+def load(game, path):
+    """Restaure la partie depuis le fichier `path`."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise SaveError("Aucune sauvegarde de ce nom.") from None
+    except ValueError:
+        raise SaveError("Sauvegarde illisible.") from None
+    restore(game, data)
@@ -0,0 +1,304 @@
+# Define the Scheduler class.
+
+import math
+import random
+from collections import deque
+
+# Nombre maximal de pas simulés pour rattraper un PNJ gelé
+CATCH_UP_STEPS = 1024
+# À partir de cette probabilité de déplacement par tick, un PNJ est tiré
+# à chaque tick au lieu d'être planifié : un tirage par tick coûte alors
+# moins cher qu'une replanification à chacune de ses actions (voir
+# `benchmark.py npc`)
+DENSE_CHANCE = 0.1
+
+
+class Scheduler:
+    """
+    Registre central des PNJ et moteur de ticks de la simulation.
+
+    Chaque commande réussie du joueur fait avancer l'horloge d'un tick.
+    Au lieu de parcourir toutes les pièces pour faire bouger tous les
+    personnages, le scheduler garde une file de priorité indexée par le
+    tick de la prochaine action de chaque PNJ (un seau par tick) : seuls
+    les PNJ dont l'échéance est atteinte sont réveillés. Les PNJ qui
+    bougent souvent (`move_chance` d'au moins DENSE_CHANCE) sont, eux,
+    parcourus à chaque tick, comme le faisait l'ancienne boucle.
+
+    Attributs :
+    tick : int
+        Le tick courant de la simulation.
+    npcs : dict
+        Registre des PNJ enregistrés, indexé par nom.
+    rng : random.Random
+        Générateur aléatoire utilisé pour tirer les délais et les sorties.
+    radius : int or None
+        Rayon d'intérêt, en nombre de sorties : seuls les PNJ à cette
+        distance au plus d'une pièce suivie (`focus`) sont simulés à
+        chaque tick. None : tous les PNJ sont simulés.
+
+    Gestion de l'intérêt : un PNJ dû hors de la zone suivie est gelé (il
+    n'est plus planifié). Quand la zone atteint sa pièce, il est rattrapé
+    en une fois : le nombre de déplacements qu'il aurait faits pendant
+    son gel suit la même loi binomiale que s'il avait été simulé, et il
+    fait autant de pas d'une marche aléatoire (au plus CATCH_UP_STEPS).
+
+    Méthodes :
+    register(character)
+        Enregistre un PNJ et planifie sa première action.
+    unregister(character)
+        Retire un PNJ du registre (ses échéances deviennent caduques).
+    focus(rooms)
+        Définit les pièces suivies (celles des joueurs) et rattrape les
+        PNJ gelés entrés dans la zone d'intérêt.
+    advance()
+        Avance d'un tick et fait agir les PNJ dus. Renvoie un itérable
+        des couples (personnage, ancienne pièce) qui se sont déplacés, y
+        compris les PNJ rattrapés depuis le dernier tick.
+
+    Exemples :
+    >>> from room import Room
+    >>> from character import Character
+    >>> r1 = Room("Hall", "un hall")
+    >>> r2 = Room("Jardin", "un jardin")
+    >>> r1.exits["N"] = r2
+    >>> r2.exits["S"] = r1
+    >>> c = Character("Bob", "un passant", r1, ["Salut"])
+    >>> c.move_chance = 1.0
+    >>> r1.characters[c.key] = c
+    >>> scheduler = Scheduler()
+    >>> scheduler.register(c)
+    >>> moved = list(scheduler.advance())
+    >>> moved[0][0] is c, moved[0][1] is r1, c.current_room is r2
+    (True, True, True)
+    >>> c.key in r2.characters and c.key not in r1.characters
+    True
+    >>> scheduler.unregister(c)
+    >>> list(scheduler.advance())
+    []
+
+    Avec un rayon d'intérêt de 0, un PNJ hors de la pièce suivie est gelé
+    puis rattrapé quand la zone suivie atteint sa pièce :
+
+    >>> scheduler = Scheduler(random.Random(1), radius=0)
+    >>> scheduler.register(c)
+    >>> scheduler.focus([r1])
+    >>> list(scheduler.advance()), scheduler.frozen_count()
+    ([], 1)
+    >>> for _ in range(5):
+    ...     _ = scheduler.advance()
+    >>> scheduler.focus([r1, r2])
+    >>> scheduler.frozen_count(), c.key in c.current_room.characters
+    (0, True)
+
+    Les rattrapages tirent dans `rng` dans un ordre qui ne dépend pas de
+    PYTHONHASHSEED : une partie rejouée dans un autre processus place les
+    PNJ aux mêmes endroits.
+
+    >>> import os, subprocess, sys
+    >>> script = ("import io; from game import Game; from worldgen import generate_world; "
+    ...           "game = Game('A', io.StringIO(), seed=1, world=generate_world(400, npcs=300, seed=1)); "
+    ...           "game.setup(); [setattr(npc, 'move_chance', 0.5) for npc in game.npcs]; "
+    ...           "game.run_script(['go S', 'go E'] * 10 + ['go N'] * 8); "
+    ...           "print([npc.current_room.name for npc in game.npcs])")
+    >>> runs = {subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+    ...                        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ...                        env=dict(os.environ, PYTHONHASHSEED=seed)).stdout for seed in ("1", "2")}
+    >>> len(runs), runs.pop().startswith("['R")
+    (1, True)
+    """
+
+    # Define the constructor.
+    def __init__(self, rng=None, radius=None):
+        self.tick = 0
+        self.npcs = {}
+        self.rng = rng if rng is not None else random.Random()
+        self.radius = radius
+        # File de priorité à seaux : tick d'échéance -> PNJ à réveiller.
+        # Les échéances étant des entiers, un seau par tick donne un
+        # ajout et un retrait en O(1).
+        self._buckets = {}
+        # Tick de l'échéance valide de chaque PNJ
+        self._due = {}
+        # PNJ tirés à chaque tick (voir DENSE_CHANCE), par nom
+        self._dense = {}
+        # Zone d'intérêt : noms des pièces suivies et de leurs voisines
+        self._focus = None
+        self._interest = None
+        # PNJ gelés : nom -> (personnage, tick du gel), et noms par pièce.
+        # Des dict plutôt que des ensembles : les rattrapages tirent dans
+        # `rng` dans leur ordre d'insertion, qui ne dépend pas de
+        # PYTHONHASHSEED (une partie rejouée dans un autre processus
+        # refait les mêmes tirages)
+        self._frozen = {}
+        self._frozen_rooms = {}
+        # Déplacements des PNJ rattrapés, rendus par le prochain `advance` :
+        # personnages et anciennes pièces. Deux listes plutôt qu'une liste de
+        # couples, qui créerait un objet suivi par le ramasse-miettes par
+        # déplacement (et des collectes répétées quand des milliers de PNJ
+        # bougent à chaque tick)
+        self._moved = []
+        self._moved_from = []
+
+    def __len__(self):
+        return len(self.npcs)
+
+    def register(self, character):
+        self.npcs[character.name] = character
+        self._schedule(character)
+
+    def unregister(self, character):
+        # Suppression paresseuse : l'entrée restée dans son seau est ignorée
+        self.npcs.pop(character.name, None)
+        self._due.pop(character.name, None)
+        self._dense.pop(character.name, None)
+        self._thaw(character.name)
+
+    def frozen_count(self):
+        """Renvoie le nombre de PNJ gelés."""
+        return len(self._frozen)
+
+    def focus(self, rooms):
+        if self.radius is None:
+            return
+        names = tuple(room.name for room in rooms)
+        if names == self._focus:
+            return
+        self._focus = names
+        interest = self._area(rooms)
+        old = self._interest or {}
+        self._interest = interest
+        # Rattrape les PNJ gelés dans les pièces qui entrent dans la zone, dans
+        # l'ordre du parcours (ou du gel, s'il y a moins de pièces gelées)
+        frozen_rooms = self._frozen_rooms
+        candidates = frozen_rooms if len(frozen_rooms) < len(interest) else interest
+        entered = [name for name in candidates if name in interest and name not in old]
+        for name in entered:
+            for character_name in list(frozen_rooms.get(name, ())):
+                self._catch_up(character_name)
+
+    def _area(self, rooms):
+        # Pièces à au plus `radius` sorties des pièces suivies (parcours en
+        # largeur), dans l'ordre du parcours
+        seen = dict.fromkeys(room.name for room in rooms)
+        queue = deque((room, 0) for room in rooms)
+        while queue:
+            room, distance = queue.popleft()
+            if distance == self.radius:
+                continue
+            for next_room in room.exits.values():
+                if next_room is not None and next_room.name not in seen:
+                    seen[next_room.name] = None
+                    queue.append((next_room, distance + 1))
+        return seen
+
+    def _freeze(self, character):
+        self._due.pop(character.name, None)
+        self._dense.pop(character.name, None)
+        self._frozen[character.name] = (character, self.tick)
+        self._frozen_rooms.setdefault(character.current_room.name, {})[character.name] = None
+
+    def _thaw(self, name):
+        entry = self._frozen.pop(name, None)
+        if entry is None:
+            return None
+        character, tick = entry
+        names = self._frozen_rooms.get(character.current_room.name)
+        if names is not None:
+            names.pop(name, None)
+            if not names:
+                del self._frozen_rooms[character.current_room.name]
+        return entry
+
+    def _catch_up(self, name):
+        character, tick = self._thaw(name)
+        rng = self.rng
+        # Nombre de déplacements tentés pendant le gel : loi binomiale
+        # B(ticks, move_chance), approchée par une loi normale si elle est grande
+        n = self.tick - tick
+        p = min(max(character.move_chance, 0.0), 1.0)
+        if n * p * (1 - p) > 25:
+            moves = round(rng.gauss(n * p, math.sqrt(n * p * (1 - p))))
+        else:
+            moves = sum(1 for _ in range(n) if rng.random() < p)
+        moves = min(max(moves, 0), CATCH_UP_STEPS)
+        old_room = character.current_room
+        # Marche aléatoire sur les sorties, sans passer par les pièces intermédiaires
+        room = old_room
+        for _ in range(moves):
+            exits = [next_room for next_room in room.exits.values() if next_room is not None]
+            if not exits:
+                break
+            room = rng.choice(exits)
+        if room.name != old_room.name:
+            if character.world_state is not None:
+                room = character.world_state.mutable(room)
+            old_room.remove_character(character)
+            character.current_room = room
+            room.add_character(character)
+            self._moved.append(character)
+            self._moved_from.append(old_room)
+        if self._interest is not None and room.name not in self._interest:
+            self._freeze(character)
+        else:
+            self._schedule(character)
+
+    def _schedule(self, character):
+        if character.move_chance >= DENSE_CHANCE:
+            self._due.pop(character.name, None)
+            self._dense[character.name] = character
+            return
+        delay = character.next_delay(self.rng)
+        if delay == math.inf:
+            # PNJ immobile : jamais réveillé
+            self._due.pop(character.name, None)
+            return
+        due = self.tick + delay
+        self._due[character.name] = due
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            self._buckets[due] = [character]
+        else:
+            bucket.append(character)
+
+    def advance(self):
+        self.tick += 1
+        moved = self._moved
+        moved_from = self._moved_from
+        self._moved = []
+        self._moved_from = []
+        rng = self.rng
+        interest = self._interest
+        if self._dense:
+            random_ = rng.random
+            leaving = []
+            for character in self._dense.values():
+                old_room = character.current_room
+                if interest is not None and old_room.name not in interest:
+                    leaving.append(character)
+                # Même tirage que Character.move, sans l'appel de méthode
+                elif random_() < character.move_chance and character.wander(rng):
+                    moved.append(character)
+                    moved_from.append(old_room)
+            # Gelés après le parcours, qui ne doit pas modifier le dict
+            for character in leaving:
+                self._freeze(character)
+        bucket = self._buckets.pop(self.tick, None)
+        if bucket is None:
+            return zip(moved, moved_from)
+        due = self._due
+        tick = self.tick
+        for character in bucket:
+            # Échéance périmée (PNJ retiré ou replanifié)
+            if due.get(character.name) != tick:
+                continue
+            if interest is not None and character.current_room.name not in interest:
+                # Hors de la zone d'intérêt : gelé jusqu'à ce qu'elle l'atteigne
+                self._freeze(character)
+                continue
+            old_room = character.current_room
+            if character.wander(rng):
+                moved.append(character)
+                moved_from.append(old_room)
+            self._schedule(character)
+        return zip(moved, moved_from)
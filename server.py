@@ -0,0 +1,221 @@
+# Description: serveur multi-joueurs (protocole texte ligne par ligne).
+#
+# Usage : python server.py [--host 127.0.0.1] [--port 4000] [--db parties.db]
+#
+# Chaque connexion TCP est une session avec sa propre partie (Player,
+# QuestManager, PNJ). Le client envoie une commande par ligne et reçoit
+# la sortie de la commande suivie de l'invite PROMPT. Avec --db, les
+# parties sont enregistrées dans une base SQLite (voir store.py) et un
+# joueur qui se reconnecte sous le même nom reprend sa partie.
+
+import argparse
+import asyncio
+import time
+
+from game import Game
+from metrics import Metrics
+from store import PlayerStore, probe
+from sessions import SessionManager
+
+PROMPT = "> "
+NAME_PROMPT = "\nEntrez votre nom: "
+NAME_TAKEN = "\nCe nom est déjà celui d'un joueur connecté."
+ENCODING = "utf-8"
+
+
+class GameServer:
+    """
+    Classe représentant un serveur hébergeant plusieurs sessions de jeu.
+
+    Les commandes sont exécutées directement dans la boucle d'événements :
+    `Game.run_script` ne fait aucune entrée/sortie bloquante (la sortie
+    est collectée dans un tampon en mémoire) et traite une commande
+    en quelques microsecondes. Ce qui touche au disque ou recrée une
+    partie se fait dans un thread : mises en sommeil et réveils des
+    sessions (`SessionManager.get_async`), écritures de la base. Les écritures réseau, elles, sont
+    attendues avec `drain()` : un client lent qui ne lit plus sa sortie
+    bloque uniquement sa propre session, et il est déconnecté au bout de
+    `drain_timeout` secondes.
+
+    Attributs :
+    host : str
+        Adresse d'écoute.
+    port : int
+        Port d'écoute (0 pour un port libre choisi par le système).
+    sessions : SessionManager
+        Les parties en cours, indexées par le flux d'écriture du client ;
+        au-delà de `max_hot_sessions`, les moins récemment utilisées sont
+        mises en sommeil sur disque.
+    metrics : Metrics or None
+        Les mesures communes à toutes les sessions, None si désactivées.
+    clock : callable or None
+        L'horloge du temps de jeu des parties (voir Game.now), None pour
+        un temps qui avance par commande.
+    store : PlayerStore or None
+        La base des parties, None si elles ne sont pas enregistrées. Les
+        parties modifiées sont écrites par lots toutes les
+        `store.interval` secondes, l'écriture se faisant hors de la
+        boucle d'événements, comme la lecture d'une partie à la connexion.
+        Les parties y sont rangées par nom : un nom déjà utilisé par un
+        joueur connecté est refusé.
+    """
+
+    # Define the constructor.
+    def __init__(self, host="127.0.0.1", port=4000, world_file=None,
+                 max_line=4096, write_buffer_limit=64 * 1024, drain_timeout=30.0, metrics=None, store=None,
+                 max_hot_sessions=None, hibernate_dir=None, clock=None):
+        self.host = host
+        self.port = port
+        self.world_file = world_file
+        self.max_line = max_line
+        self.write_buffer_limit = write_buffer_limit
+        self.drain_timeout = drain_timeout
+        self.clock = clock
+        self.sessions = SessionManager(max_hot_sessions, hibernate_dir, world_file, metrics, clock)
+        self.metrics = metrics
+        self.store = store
+        self._server = None
+        self._flusher = None
+        self._handlers = set()
+        # Noms des joueurs connectés (avec une base seulement)
+        self._names = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self.handle_client, self.host, self.port, limit=self.max_line, backlog=1024)
+        # Récupère le port effectif (utile avec port=0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.store is not None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return self._server
+
+    async def _flush_loop(self):
+        store = self.store
+        while True:
+            await asyncio.sleep(store.interval)
+            # Les parties sont lues dans la boucle, la base est écrite à côté
+            await asyncio.to_thread(store.write, store.collect())
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Laisse les sessions en cours se terminer proprement
+            if self._handlers:
+                await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+            self.store.flush()
+        await self.sessions.drain()
+        self.sessions.close()
+
+    async def _send(self, writer, text):
+        writer.write(text.encode(ENCODING))
+        # Contre-pression : on attend que le tampon d'écriture redescende
+        await asyncio.wait_for(writer.drain(), self.drain_timeout)
+
+    async def _read_line(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        return line.decode(ENCODING, errors="replace").rstrip("\r\n")
+
+    async def handle_client(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_limit)
+        name = None
+        try:
+            while True:
+                await self._send(writer, NAME_PROMPT)
+                line = await self._read_line(reader)
+                if line is None:
+                    return
+                line = line.strip() or "Voyageur"
+                if self.store is None or line not in self._names:
+                    break
+                # Deux sessions du même nom s'écraseraient dans la base
+                await self._send(writer, NAME_TAKEN)
+            if self.store is not None:
+                name = line
+                self._names.add(name)
+            game = Game(line, world_file=self.world_file, metrics=self.metrics, clock=self.clock)
+            game.setup()
+            if self.store is not None:
+                # La lecture attend la fin d'une écriture en cours : hors de la boucle
+                await asyncio.to_thread(self.store.restore, game)
+            await self.sessions.add_async(writer, game)
+            await self._send(writer, game.get_welcome() + "\n" + PROMPT)
+            # Pas de référence à la partie pendant l'attente : elle peut être mise en sommeil
+            game = None
+
+            while True:
+                line = await self._read_line(reader)
+                if line is None:
+                    break
+                game = await self.sessions.get_async(writer)
+                store = self.store
+                # Les commandes sans effet (look, help, commande inconnue...) ne
+                # font pas réécrire la partie
+                before = probe(game) if store is not None else None
+                output = game.run_script([line])
+                if store is not None and probe(game) != before:
+                    store.mark_dirty(game)
+                finished = game.finished
+                game = None
+                await self._send(writer, output if finished else output + PROMPT)
+                if finished:
+                    break
+        except (ConnectionError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError):
+            # Client parti, trop lent, ou ligne trop longue : on ferme la session
+            pass
+        finally:
+            self.sessions.remove(writer)
+            if name is not None:
+                self._names.discard(name)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._handlers.discard(handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de jeu TBA")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--world", default=None, help="fichier de définition du monde")
+    parser.add_argument("--metrics", metavar="FICHIER", help="exporter les mesures au format Prometheus")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="délai entre deux exports (s)")
+    parser.add_argument("--db", metavar="FICHIER", help="enregistrer les parties dans une base SQLite")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="délai entre deux écritures de la base (s)")
+    parser.add_argument("--max-hot-sessions", type=int, help="nombre maximal de parties gardées en mémoire")
+    parser.add_argument("--hibernate-dir", help="répertoire des sessions mises en sommeil (par défaut temporaire)")
+    parser.add_argument("--wall-clock", action="store_true",
+                        help="faire passer le temps de jeu (récupération de l'endurance) en secondes réelles")
+    args = parser.parse_args()
+
+    metrics = Metrics(args.metrics, args.metrics_interval) if args.metrics else None
+    store = PlayerStore(args.db, args.flush_interval) if args.db else None
+    server = GameServer(args.host, args.port, args.world, metrics=metrics, store=store,
+                        max_hot_sessions=args.max_hot_sessions, hibernate_dir=args.hibernate_dir,
+                        clock=time.monotonic if args.wall_clock else None)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
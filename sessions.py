@@ -0,0 +1,260 @@
+# Define the SessionManager class.
+#
+# Un serveur peut compter bien plus de joueurs connectés que de joueurs
+# actifs : une session inactive garde pourtant en mémoire sa partie
+# (Player, QuestManager, PNJ, pièces modifiées). Le gestionnaire ne garde
+# en mémoire que les `max_hot` sessions utilisées le plus récemment ; les
+# autres sont mises en sommeil dans une sauvegarde compacte (savegame.py)
+# et réveillées à leur prochaine commande.
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import savegame
+from game import Game
+
+logger = logging.getLogger(__name__)
+
+
+class SessionManager:
+    """
+    Classe gérant les parties des sessions d'un serveur.
+
+    Les sessions sont désignées par une clé quelconque (le flux du client
+    pour server.py). `get` renvoie la partie d'une session en la
+    réveillant si besoin : l'appelant ne doit pas garder de référence à la
+    partie entre deux commandes, sans quoi elle ne quitte jamais la mémoire.
+
+    La partie réveillée est une nouvelle instance de `Game` restaurée par
+    savegame.py : les générateurs aléatoires repartent de la graine de la
+    session et les PNJ reçoivent de nouvelles échéances.
+
+    Dans une boucle d'événements (server.py), `add_async` et `get_async`
+    font les mises en sommeil et les réveils dans un thread : l'écriture
+    ou la lecture du disque et la recréation de la partie (`Game.setup`)
+    ne bloquent pas les autres sessions. Une session dont la mise en
+    sommeil est en cours est réveillée une fois celle-ci terminée.
+
+    Attributs :
+    max_hot : int or None
+        Le nombre maximal de parties gardées en mémoire (None : pas de limite).
+    directory : str or None
+        Le répertoire des sessions en sommeil.
+    world_file : str or None
+        Le fichier de définition du monde, pour recréer les parties.
+    metrics : Metrics or None
+        Les mesures transmises aux parties recréées.
+    clock : callable or None
+        L'horloge du temps de jeu des parties recréées (voir Game.now) :
+        le temps passé en sommeil est rendu à la partie réveillée.
+    hibernations : int
+        Le nombre de mises en sommeil.
+    wakeups : int
+        Le nombre de réveils.
+
+    Exemples :
+    >>> sessions = SessionManager(max_hot=1)
+    >>> for key in ("a", "b"):
+    ...     game = Game(key.upper(), seed=1)
+    ...     game.setup()
+    ...     sessions.add(key, game)
+    >>> _ = sessions.get("b").run_script(["take Boussole en argent"])
+    >>> len(sessions), sessions.hot_count(), sessions.hibernations
+    (2, 1, 1)
+    >>> sessions.get("a").player.name, sessions.hibernations, sessions.wakeups
+    ('A', 2, 1)
+    >>> list(sessions.get("b").player.inventory)
+    ['Boussole en argent']
+    >>> sessions.close()
+
+    >>> async def play(sessions):
+    ...     for key in ("a", "b"):
+    ...         game = Game(key.upper(), seed=1)
+    ...         game.setup()
+    ...         await sessions.add_async(key, game)
+    ...     game = await sessions.get_async("a")
+    ...     await sessions.drain()
+    ...     return game.player.name, sessions.hot_count(), sessions.hibernations, sessions.wakeups
+    >>> sessions = SessionManager(max_hot=1)
+    >>> asyncio.run(play(sessions))
+    ('A', 1, 2, 1)
+    >>> sessions.close()
+    """
+
+    # Define the constructor.
+    def __init__(self, max_hot=None, directory=None, world_file=None, metrics=None, clock=None):
+        self.max_hot = max_hot
+        # Sans répertoire donné, un répertoire temporaire créé à la première
+        # mise en sommeil et supprimé par `close`
+        self._own_directory = directory is None
+        self.directory = directory
+        self.world_file = world_file
+        self.metrics = metrics
+        self.clock = clock
+        self.hibernations = 0
+        self.wakeups = 0
+        # Parties en mémoire, de la moins à la plus récemment utilisée
+        self._hot = OrderedDict()
+        # Sessions en sommeil : clé -> (fichier, graine, sortie, instant de la mise en sommeil)
+        self._cold = {}
+        # Mises en sommeil en cours dans un thread : clé -> tâche
+        self._pending = {}
+        self._next_file = 0
+
+    def __len__(self):
+        return len(self._hot) + len(self._cold)
+
+    def __contains__(self, key):
+        return key in self._hot or key in self._cold
+
+    def hot_count(self):
+        """Renvoie le nombre de parties en mémoire."""
+        return len(self._hot)
+
+    def add(self, key, game):
+        """Ajoute la partie `game` de la session `key`."""
+        self.remove(key)
+        self._hot[key] = game
+        self._evict()
+
+    def get(self, key):
+        """Renvoie la partie de la session `key` (réveillée si besoin), ou None."""
+        game = self._hot.get(key)
+        if game is not None:
+            self._hot.move_to_end(key)
+            return game
+        if key not in self._cold:
+            return None
+        game = self._wake(key)
+        self._hot[key] = game
+        self._evict()
+        return game
+
+    async def add_async(self, key, game):
+        """Comme `add`, les mises en sommeil se faisant dans un thread."""
+        self.remove(key)
+        self._hot[key] = game
+        self._evict_async()
+
+    async def get_async(self, key):
+        """Comme `get`, la mise en sommeil et le réveil se faisant dans un thread."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            await asyncio.wait({pending})
+        game = self._hot.get(key)
+        if game is not None:
+            self._hot.move_to_end(key)
+            return game
+        cold = self._cold.pop(key, None)
+        if cold is None:
+            return None
+        try:
+            game = await asyncio.to_thread(self._restore, cold)
+        except BaseException:
+            self._cold[key] = cold
+            raise
+        self.wakeups += 1
+        self._hot[key] = game
+        self._evict_async()
+        return game
+
+    async def drain(self):
+        """Attend la fin des mises en sommeil en cours."""
+        if self._pending:
+            await asyncio.wait(list(self._pending.values()))
+
+    def remove(self, key):
+        """Oublie la session `key` (fin de la connexion)."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            # La session sera oubliée une fois sa mise en sommeil terminée
+            pending.add_done_callback(lambda _task: self.remove(key))
+            return
+        self._hot.pop(key, None)
+        cold = self._cold.pop(key, None)
+        if cold is not None:
+            try:
+                os.remove(cold[0])
+            except OSError:
+                pass
+
+    def close(self):
+        """Oublie toutes les sessions et supprime les sessions en sommeil."""
+        for key in list(self._cold):
+            self.remove(key)
+        self._hot.clear()
+        if self._own_directory and self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def _evict(self):
+        if self.max_hot is None:
+            return
+        while len(self._hot) > self.max_hot:
+            key, game = self._hot.popitem(last=False)
+            self._hibernate(key, game)
+
+    def _evict_async(self):
+        if self.max_hot is None:
+            return
+        while len(self._hot) > self.max_hot:
+            key, game = self._hot.popitem(last=False)
+            self._pending[key] = asyncio.create_task(self._hibernate_async(key, game, self._new_path()))
+
+    async def _hibernate_async(self, key, game, path):
+        try:
+            cold = await asyncio.to_thread(self._save, game, path)
+        except Exception:
+            # Écriture impossible (disque, partie non sérialisable...) : la
+            # partie reste en mémoire plutôt que d'être perdue
+            logger.exception("Mise en sommeil impossible, la session reste en mémoire")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._hot[key] = game
+            self._hot.move_to_end(key, last=False)
+        else:
+            self._cold[key] = cold
+            self.hibernations += 1
+        finally:
+            del self._pending[key]
+
+    def _hibernate(self, key, game):
+        self._cold[key] = self._save(game, self._new_path())
+        self.hibernations += 1
+
+    def _new_path(self):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="tba-sessions-")
+        path = os.path.join(self.directory, f"{self._next_file}{savegame.SAVE_SUFFIX}")
+        self._next_file += 1
+        return path
+
+    def _save(self, game, path):
+        # Peut s'exécuter dans un thread : ne touche qu'à `game` et au fichier
+        savegame.save(game, path)
+        asleep = self.clock() if self.clock is not None else None
+        return (path, game.seed, game.output.target, asleep)
+
+    def _wake(self, key):
+        game = self._restore(self._cold.pop(key))
+        self.wakeups += 1
+        return game
+
+    def _restore(self, cold):
+        # Peut s'exécuter dans un thread : crée une nouvelle partie depuis le fichier
+        path, seed, output, asleep = cold
+        # Le nom du joueur est restauré avec la partie
+        game = Game("", output, world_file=self.world_file, seed=seed, metrics=self.metrics, clock=self.clock)
+        game.setup()
+        savegame.load(game, path)
+        if asleep is not None:
+            # L'endurance a continué de remonter pendant le sommeil
+            game.wait(self.clock() - asleep)
+        os.remove(path)
+        return game
@@ -0,0 +1,205 @@
+# Define the PlayerStore class.
+#
+# Stockage des parties de plusieurs joueurs dans une base SQLite locale.
+#
+# Écrire la base après chaque commande imposerait une transaction (et une
+# synchronisation du disque) par commande et par joueur. Le magasin tient
+# à la place un cache d'écriture différée (write-behind) : `mark_dirty`
+# note qu'une partie a changé, une partie modifiée plusieurs fois n'est
+# écrite qu'une fois, et `flush` écrit toutes les parties modifiées en une
+# seule transaction, au plus toutes les `interval` secondes. La base est
+# en mode WAL : les lectures ne bloquent pas les écritures.
+#
+# Chaque ligne contient l'état d'une partie au format de savegame.py
+# (attributs du joueur, inventaire, récompenses, quêtes, pièces modifiées).
+
+import json
+import sqlite3
+import threading
+import time
+
+import savegame
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+UPSERT = ("INSERT INTO players (name, data, updated) VALUES (?, ?, ?) "
+          "ON CONFLICT(name) DO UPDATE SET data = excluded.data, updated = excluded.updated")
+
+
+def probe(game):
+    """
+    Renvoie un relevé peu coûteux de ce qu'une commande peut changer dans
+    la sauvegarde de `game` : deux relevés différents avant et après une
+    commande indiquent que la partie doit être réécrite.
+
+    L'endurance n'en fait pas partie : elle remonte d'elle-même avec le
+    temps de jeu, même pendant un `look`, et elle est écrite avec le
+    prochain vrai changement. Il en va de même des PNJ qui se promènent.
+    """
+    player = game.player
+    room = player.current_room
+    fields = []
+    for field in savegame.PLAYER_FIELDS:
+        if field != "stamina":
+            value = getattr(player, field)
+            fields.append(list(value) if isinstance(value, list) else value)
+    return (player, room.name, savegame.inventory_probe(player.inventory), fields, len(player.history),
+            [(quest.is_active, quest.is_completed, len(quest.completed_objectives))
+             for quest in player.quest_manager.quests],
+            room.locked, savegame.inventory_probe(room.inventory),
+            # Parler à un PNJ fait avancer ses messages
+            [len(npc.msgs) for npc in room.characters.values()])
+
+
+class PlayerStore:
+    """
+    Classe représentant la base des parties des joueurs.
+
+    `collect` (qui lit les parties) doit être appelée depuis le fil qui
+    exécute les commandes ; `write` (qui écrit la base) peut l'être depuis
+    un autre fil, pour ne pas bloquer les sessions pendant l'écriture.
+    `flush` enchaîne les deux. `load` et `restore` attendent la fin d'une
+    écriture en cours : un serveur les appelle lui aussi depuis un autre fil.
+
+    Les parties sont rangées par nom de joueur : deux parties en cours
+    sous le même nom s'écraseraient l'une l'autre.
+
+    Attributs :
+    path : str
+        Le fichier de la base (":memory:" pour une base en mémoire).
+    interval : float
+        Le délai minimal entre deux écritures de `maybe_flush`, en secondes.
+    writes : int
+        Le nombre de parties écrites.
+    transactions : int
+        Le nombre de transactions d'écriture.
+
+    Exemples :
+    >>> from game import Game
+    >>> store = PlayerStore(":memory:")
+    >>> game = Game("Alice", seed=3)
+    >>> game.setup()
+    >>> for command in ("take Boussole en argent", "go N", "look"):
+    ...     _ = game.run_script([command])
+    ...     store.mark_dirty(game)
+    >>> store.flush()
+    1
+    >>> store.writes, store.transactions
+    (1, 1)
+    >>> other = Game("Alice", seed=3)
+    >>> other.setup()
+    >>> store.restore(other)
+    True
+    >>> other.player.current_room.name, list(other.player.inventory)
+    ('Tower', ['Boussole en argent'])
+
+    Seules les commandes qui changent la partie (voir `probe`) la
+    marquent comme modifiée :
+
+    >>> before = probe(other)
+    >>> _ = other.run_script(["look"])
+    >>> probe(other) == before
+    True
+    >>> _ = other.run_script(["drop Boussole en argent"])
+    >>> probe(other) == before
+    False
+    >>> store.close()
+    """
+
+    # Define the constructor.
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self.writes = 0
+        self.transactions = 0
+        # Parties modifiées depuis la dernière écriture, par nom de joueur
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+        # Une seule connexion, partagée entre le fil des sessions et celui
+        # des écritures : le verrou sérialise son utilisation
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # En mode WAL, NORMAL ne synchronise le disque qu'aux points de contrôle
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def mark_dirty(self, game):
+        """Note que la partie `game` a changé ; elle sera écrite au prochain `flush`."""
+        self._dirty[game.player.name] = game
+
+    def collect(self):
+        """
+        Renvoie les lignes à écrire pour les parties modifiées et vide la
+        liste des parties modifiées.
+        """
+        dirty = self._dirty
+        self._dirty = {}
+        now = time.time()
+        return [(name, json.dumps(savegame.snapshot(game), ensure_ascii=False, separators=(",", ":")), now)
+                for name, game in dirty.items()]
+
+    def write(self, rows):
+        """Écrit les lignes `rows` (voir `collect`) en une seule transaction."""
+        if rows:
+            with self._lock:
+                db = self._db
+                db.execute("BEGIN")
+                try:
+                    db.executemany(UPSERT, rows)
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+                db.execute("COMMIT")
+                self.writes += len(rows)
+                self.transactions += 1
+
+    def flush(self):
+        """Écrit les parties modifiées et renvoie leur nombre."""
+        self._last_flush = time.monotonic()
+        rows = self.collect()
+        self.write(rows)
+        return len(rows)
+
+    def maybe_flush(self):
+        """Écrit les parties modifiées si le délai `interval` est écoulé."""
+        if self._dirty and time.monotonic() - self._last_flush >= self.interval:
+            return self.flush()
+        return 0
+
+    def load(self, name):
+        """Renvoie la partie enregistrée du joueur `name` (dict), ou None."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM players WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def restore(self, game):
+        """
+        Restaure la partie enregistrée du joueur de `game`, si elle existe
+        et correspond au monde chargé. Renvoie True si une partie a été
+        restaurée.
+        """
+        data = self.load(game.player.name)
+        if data is None:
+            return False
+        try:
+            savegame.restore(game, data)
+        except savegame.SaveError:
+            return False
+        return True
+
+    def close(self):
+        """Écrit les parties modifiées et ferme la base."""
+        self.flush()
+        with self._lock:
+            self._db.close()
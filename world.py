@@ -0,0 +1,380 @@
+# Description: chargement du monde depuis un fichier de définition.
+#
+# Le monde (pièces, sorties, objets, PNJ et quêtes) est décrit dans un
+# fichier JSON. Au premier chargement, le fichier est compilé en un
+# instantané binaire (pickle) écrit à côté de la source ; les chargements
+# suivants lisent directement cet instantané tant que la source n'a pas
+# changé.
+
+import copy
+import json
+import os
+import pickle
+import sys
+
+from room import Room
+from character import Character
+from item import Item, Beamer
+from quest import Quest
+from dungeon import Dungeon, MAX_FLOORS
+from routing import RoutingTable
+import crowd
+
+# Fichier de définition par défaut, à côté des modules du jeu
+DEFAULT_WORLD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "world.json")
+# Extension de l'instantané compilé
+SNAPSHOT_SUFFIX = ".snapshot"
+# À incrémenter à chaque changement du format compilé
+SNAPSHOT_VERSION = 3
+
+# Objets spéciaux, désignés par le champ "type" dans le fichier de définition
+ITEM_TYPES = {"beamer": Beamer}
+
+
+class World:
+    """
+    Classe représentant un monde chargé.
+
+    Les pièces sont créées et reliées par le chargeur ; les PNJ et les
+    quêtes sont conservés sous forme de définitions pour que chaque
+    partie crée ses propres instances.
+
+    Attributs :
+    rooms : list
+        Les pièces du monde, dans l'ordre du fichier de définition.
+    start : Room
+        La pièce de départ du joueur.
+    characters : list
+        Les définitions des PNJ (dict).
+    quests : list
+        Les définitions des quêtes (dict).
+    crowds : list
+        Les foules d'ambiance (dict : pièce, nombre de passants).
+    dungeon : dict or None
+        Le donjon généré (dict : pièce d'entrée, nombre d'étages en mémoire).
+
+    Exemples :
+    >>> world = load_world(use_snapshot=False)
+    >>> world.start.name
+    'Swamp'
+    >>> world.get_room("Forest").exits["N"].name
+    'Cave'
+    >>> [npc.key for npc in world.spawn_characters()]
+    ['gandalf', 'ziegfried', 'germain']
+    >>> world.create_quests()[0].title
+    'La Boussole de Germain'
+    """
+
+    # Define the constructor.
+    def __init__(self, rooms, start, characters=None, quests=None, crowds=None, dungeon=None):
+        self.rooms = rooms
+        self.start = start
+        self.characters = characters if characters is not None else []
+        self.quests = quests if quests is not None else []
+        self.crowds = crowds if crowds is not None else []
+        self.dungeon = dungeon
+        self._rooms_by_name = {room.name: room for room in rooms}
+        # Identifiants entiers (sauvegardes) : indice de la pièce / de l'objet
+        self._room_ids = {room.name: i for i, room in enumerate(rooms)}
+        self._items = None
+        self._crowd_graph = None
+        self._routing_topology = None
+        self._directions = None
+
+    def get_room(self, name):
+        return self._rooms_by_name.get(name)
+
+    def room_id(self, room):
+        room_id = self._room_ids.get(room.name)
+        if room_id is None:
+            # Pièce du donjon : numérotée après les pièces du monde
+            return len(self.rooms) + room.ordinal
+        return room_id
+
+    def item_table(self):
+        """
+        Renvoie les objets définis par le monde : (liste des objets modèles,
+        dictionnaire clé de l'objet -> identifiant). Construite au premier appel.
+        """
+        if self._items is None:
+            items = []
+            ids = {}
+            specs = [item for room in self.rooms for item in room.inventory.values()]
+            specs += [_make_item(spec) for npc in self.characters for spec in npc.get("inventory", [])]
+            for item in specs:
+                if item.key() not in ids:
+                    ids[item.key()] = len(items)
+                    items.append(item)
+            self._items = (items, ids)
+        return self._items
+
+    def spawn_characters(self, state=None):
+        """
+        Crée les PNJ et les place dans leur pièce de départ.
+
+        Si `state` (WorldState) est donné, les PNJ sont placés dans les
+        pièces de la session et non dans celles, partagées, du monde.
+        """
+        characters = []
+        for spec in self.characters:
+            room = self.get_room(spec["room"])
+            if state is not None:
+                room = state.mutable(room)
+            npc = Character(spec["name"], spec["description"], room, list(spec["msgs"]))
+            npc.world_state = state
+            for attribute, value in spec.items():
+                if attribute in ("name", "description", "room", "msgs"):
+                    continue
+                if attribute == "inventory":
+                    value = {item["name"]: _make_item(item) for item in value}
+                setattr(npc, attribute, value)
+            room.add_character(npc)
+            characters.append(npc)
+        return characters
+
+    def create_crowd(self, seed=None):
+        """
+        Crée la foule d'ambiance d'une partie, ou renvoie None si le monde
+        n'en définit pas ou si numpy n'est pas installé.
+        """
+        if not self.crowds or not crowd.available():
+            return None
+        if self._crowd_graph is None:
+            self._crowd_graph = crowd.Crowd.build_graph(self.rooms)
+        population = crowd.Crowd(self.rooms, seed=seed, graph=self._crowd_graph)
+        for spec in self.crowds:
+            population.add(self.get_room(spec["room"]), spec["count"])
+        return population
+
+    def directions(self):
+        """Renvoie l'ensemble des directions des sorties du monde (calculé une fois)."""
+        if self._directions is None:
+            self._directions = frozenset().union(*(room.exits.keys() for room in self.rooms))
+        return self._directions
+
+    def create_routing(self, state):
+        """
+        Crée la table de routage de la session `state` ; la topologie des
+        pièces est construite au premier appel et partagée ensuite.
+        """
+        if self._routing_topology is None:
+            self._routing_topology = RoutingTable.build_topology(self.rooms)
+        return RoutingTable(self.rooms, state, topology=self._routing_topology)
+
+    def create_dungeon(self, state, seed):
+        """
+        Crée le donjon d'une partie et le rattache à `state`, ou renvoie
+        None si le monde n'en définit pas.
+        """
+        if self.dungeon is None:
+            return None
+        return Dungeon(state, self.get_room(self.dungeon["entrance"]), seed,
+                       self.dungeon.get("max_floors", MAX_FLOORS))
+
+    def create_quests(self):
+        """Crée de nouvelles instances des quêtes du monde."""
+        return [Quest(spec["title"], spec["description"], list(spec.get("objectives", [])), spec.get("reward"))
+                for spec in self.quests]
+
+
+class WorldState:
+    """
+    Classe représentant l'état propre à une session au-dessus d'un monde partagé.
+
+    Les pièces du monde partagé (noms, descriptions, sorties) ne sont
+    jamais modifiées. Dès qu'une session doit modifier une pièce
+    (inventaire, verrou, PNJ présents), `mutable` en crée une copie
+    réservée à la session ; `room` renvoie ensuite cette copie à la place
+    de la pièce partagée. Seules les pièces modifiées sont donc dupliquées.
+
+    Sans monde partagé (`world` à None), la session possède ses pièces et
+    `mutable` les renvoie telles quelles. Il en va de même des pièces du
+    donjon (`dungeon`), qui appartiennent à la session : `room` renvoie
+    leur version matérialisée.
+
+    Exemples :
+    >>> world = get_world()
+    >>> a, b = WorldState(world), WorldState(world)
+    >>> forest = world.get_room("Forest")
+    >>> mine = a.mutable(forest)
+    >>> del mine.inventory["Décoction de souci"]
+    >>> "Décoction de souci" in a.room(forest).inventory
+    False
+    >>> "Décoction de souci" in b.room(forest).inventory
+    True
+    >>> b.room(forest) is forest, len(a), len(b)
+    (True, 1, 0)
+    """
+
+    # Define the constructor.
+    def __init__(self, world=None):
+        self.world = world
+        # Pièces matérialisées par la session, indexées par nom
+        self._rooms = {}
+        # Donjon de la session (voir dungeon.py), rattaché par Dungeon
+        self.dungeon = None
+        # Table de routage de la session (voir routing.py), rattachée par RoutingTable
+        self.routing = None
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def own_rooms(self):
+        """Renvoie les pièces matérialisées par la session."""
+        return self._rooms.values()
+
+    def room(self, room):
+        """Renvoie la version de `room` vue par la session."""
+        if room is None:
+            return room
+        if room.generated:
+            return self.dungeon.resolve(room)
+        if self.world is None:
+            return room
+        return self._rooms.get(room.name, room)
+
+    def mutable(self, room):
+        """Renvoie une version de `room` modifiable par la session."""
+        if room.generated:
+            return self.dungeon.resolve(room)
+        if self.world is None:
+            return room
+        own = self._rooms.get(room.name)
+        if own is None:
+            own = copy.copy(room)
+            # Les objets à état (Beamer...) sont aussi copiés
+            own.inventory = {name: copy.copy(item) if item.stateful else item
+                             for name, item in room.inventory.items()}
+            own.characters = dict(room.characters)
+            own.containers = dict(room.containers)
+            # Une sortie modifiée (escalier du donjon...) ne vaut que pour la session
+            own.exits = dict(room.exits)
+            # Les rendus en cache appartiennent à la pièce partagée
+            own._cache = None
+            self._rooms[room.name] = own
+        return own
+
+
+def _make_item(spec):
+    item_type = spec.get("type")
+    if item_type is not None:
+        return ITEM_TYPES[item_type]()
+    # Objet sans état : prototype partagé
+    return Item.prototype(spec["name"], spec["description"], spec["weight"])
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def compile_world(data):
+    """
+    Compile une définition de monde (dict) en une forme compacte.
+
+    Les références entre pièces deviennent des indices entiers et les
+    chaînes répétées (noms, directions) sont internées pour n'être
+    stockées qu'une fois dans l'instantané.
+    """
+    intern = sys.intern
+    index = {spec["name"]: i for i, spec in enumerate(data["rooms"])}
+    rooms = []
+    for spec in data["rooms"]:
+        exits = tuple((intern(direction), index[name] if name is not None else -1)
+                      for direction, name in spec.get("exits", {}).items())
+        items = tuple((intern(item["name"]), item.get("type"), item.get("description"), item.get("weight"))
+                      for item in spec.get("items", []))
+        rooms.append((intern(spec["name"]), spec["description"], exits, items,
+                      spec.get("locked", False), spec.get("difficulty", 0)))
+    return {
+        "start": index[data["start"]],
+        "rooms": rooms,
+        "characters": data.get("characters", []),
+        "quests": data.get("quests", []),
+        "crowds": data.get("crowds", []),
+        "dungeon": data.get("dungeon"),
+    }
+
+
+def build_world(compiled):
+    """Reconstruit un `World` à partir de sa forme compilée."""
+    rooms = []
+    for name, description, _, items, locked, difficulty in compiled["rooms"]:
+        room = Room(name, description)
+        for item_name, item_type, item_description, weight in items:
+            room.inventory[item_name] = _make_item({"name": item_name, "type": item_type,
+                                                    "description": item_description, "weight": weight})
+        room.locked = locked
+        room.difficulty = difficulty
+        rooms.append(room)
+    # Les sorties sont des indices : un seul passage linéaire suffit
+    for room, row in zip(rooms, compiled["rooms"]):
+        room.exits = {direction: rooms[i] if i >= 0 else None for direction, i in row[2]}
+    return World(rooms, rooms[compiled["start"]], compiled["characters"], compiled["quests"],
+                 compiled["crowds"], compiled["dungeon"])
+
+
+# Mondes partagés entre les sessions : chemin -> (empreinte de la source, World)
+_shared_worlds = {}
+
+
+def get_world(path=None):
+    """
+    Renvoie le monde partagé décrit par `path`, chargé une seule fois par
+    processus (et rechargé si le fichier source a changé).
+
+    Ce monde ne doit pas être modifié : chaque session passe par un
+    `WorldState`.
+    """
+    path = path or DEFAULT_WORLD_FILE
+    stamp = _source_stamp(path)
+    cached = _shared_worlds.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, load_world(path))
+        _shared_worlds[path] = cached
+    return cached[1]
+
+
+def load_world(path=None, use_snapshot=True):
+    """
+    Charge le monde décrit par le fichier `path` (JSON).
+
+    Si `use_snapshot` est vrai, l'instantané compilé voisin est réutilisé
+    lorsqu'il correspond à la source, et régénéré sinon.
+    """
+    path = path or DEFAULT_WORLD_FILE
+    if not use_snapshot:
+        with open(path, encoding="utf-8") as f:
+            return build_world(compile_world(json.load(f)))
+
+    snapshot_path = path + SNAPSHOT_SUFFIX
+    stamp = _source_stamp(path)
+    compiled = _read_snapshot(snapshot_path, stamp)
+    if compiled is None:
+        with open(path, encoding="utf-8") as f:
+            compiled = compile_world(json.load(f))
+        _write_snapshot(snapshot_path, stamp, compiled)
+    return build_world(compiled)
+
+
+def _read_snapshot(snapshot_path, stamp):
+    try:
+        with open(snapshot_path, "rb") as f:
+            # L'en-tête est lu seul pour rejeter un instantané périmé sans le décoder
+            if pickle.load(f) != (SNAPSHOT_VERSION, stamp):
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _write_snapshot(snapshot_path, stamp, compiled):
+    tmp_path = snapshot_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump((SNAPSHOT_VERSION, stamp), f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(compiled, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except OSError:
+        # Répertoire en lecture seule : on se passe simplement du cache
+        pass
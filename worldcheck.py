@@ -0,0 +1,280 @@
+# Description: analyse hors ligne du graphe d'un monde.
+#
+# Lit un fichier de monde (world.json, ou un monde produit par worldgen.py)
+# et signale, en un temps linéaire en nombre de pièces et de sorties :
+#   - les sorties vers des pièces inexistantes ;
+#   - les pièces inaccessibles depuis la pièce de départ ;
+#   - les pièces accessibles d'où l'on ne peut plus revenir au départ ;
+#   - les sorties à sens unique (pas de sortie retour vers la pièce d'origine) ;
+#   - les culs-de-sac (une seule pièce voisine) et les pièces sans sortie ;
+#   - les objets cités par une quête qui ne sont accessibles qu'en passant
+#     par une pièce verrouillée ;
+#   - les composantes fortement connexes du graphe (algorithme de Tarjan).
+#
+# Le rapport est un dict JSON : "summary" donne le nombre de cas de chaque
+# sorte, les autres clés le détail (tronqué à --limit éléments).
+#
+# Le statut de sortie vaut 1 si le monde a des pièces inaccessibles, des
+# objets de quête hors d'atteinte, ou des sorties vers des pièces
+# inexistantes (le jeu ne peut alors pas charger le monde), 0 sinon.
+#
+# Usage : python worldcheck.py [monde.json] [-o rapport.json] [--limit 100]
+
+import argparse
+import gc
+import json
+import sys
+from collections import deque
+
+from world import DEFAULT_WORLD_FILE
+
+
+def strongly_connected_components(adjacency):
+    """
+    Renvoie les composantes fortement connexes du graphe `adjacency`
+    (liste, pour chaque sommet, des indices de ses successeurs).
+
+    Algorithme de Tarjan en version itérative (sans récursion, donc sans
+    limite de profondeur). Les composantes sont renvoyées dans l'ordre où
+    elles sont terminées : une composante n'a de sorties que vers des
+    composantes qui la précèdent.
+
+    Exemples :
+    >>> strongly_connected_components([[1], [2], [0, 3], []])
+    [[3], [2, 1, 0]]
+    """
+    n = len(adjacency)
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack = []
+    components = []
+    counter = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        # Pile d'appels explicite : (sommet, itérateur sur ses successeurs)
+        work = [(root, iter(adjacency[root]))]
+        while work:
+            v, successors = work[-1]
+            for w in successors:
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, iter(adjacency[w])))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == index[v]:
+                    members = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        members.append(w)
+                        if w == v:
+                            break
+                    components.append(members)
+    return components
+
+
+def _reach(adjacency, start, blocked=None):
+    # Recherche en largeur depuis `start` ; renvoie les prédécesseurs (-1 pour
+    # `start`, -2 pour une pièce non atteinte). Les pièces de `blocked`
+    # sont atteintes mais pas traversées.
+    parents = [-2] * len(adjacency)
+    parents[start] = -1
+    queue = deque([start])
+    while queue:
+        v = queue.popleft()
+        if blocked is not None and blocked[v] and v != start:
+            continue
+        for w in adjacency[v]:
+            if parents[w] == -2:
+                parents[w] = v
+                queue.append(w)
+    return parents
+
+
+def _quest_items(quests, item_rooms):
+    # Objets cités par les objectifs des quêtes : les noms d'objets (sans
+    # tenir compte de la casse) sont cherchés parmi les suites de mots de
+    # chaque objectif, ce qui reste linéaire en la longueur des textes.
+    names = {name.lower(): name for name in item_rooms}
+    longest = max((len(name.split()) for name in names), default=0)
+    found = []
+    for quest in quests:
+        for objective in quest.get("objectives", []):
+            words = objective.lower().replace(".", " ").replace(",", " ").split()
+            seen = set()
+            for i in range(len(words)):
+                for k in range(1, min(longest, len(words) - i) + 1):
+                    name = names.get(" ".join(words[i:i + k]))
+                    if name is not None and name not in seen:
+                        seen.add(name)
+                        found.append((quest["title"], objective, name))
+    return found
+
+
+def analyze(data, limit=None):
+    """
+    Analyse la définition de monde `data` (dict au format de world.json)
+    et renvoie le rapport (dict sérialisable en JSON).
+
+    Les listes du rapport sont tronquées à `limit` éléments ; les nombres
+    de "summary" restent exacts.
+
+    Exemples :
+    >>> with open(DEFAULT_WORLD_FILE, encoding="utf-8") as f:
+    ...     report = analyze(json.load(f))
+    >>> report["summary"]["unreachable_rooms"], report["summary"]["components"]
+    (0, 1)
+    >>> [(e["from"], e["direction"], e["to"]) for e in report["one_way_exits"]]
+    [('Tower', 'O', 'Forest'), ('Swamp', 'N', 'Tower')]
+    >>> report["dead_ends"]
+    ['Sous_sol', 'Tower-Top', 'Chambre du Tavernier', 'Cave de Beikovetz']
+
+    Un objet de quête derrière une pièce verrouillée, une pièce isolée et
+    une sortie vers une pièce inconnue :
+
+    >>> report = analyze({"start": "A", "quests": [{"title": "Q", "objectives": ["prendre Clé"]}],
+    ...     "rooms": [{"name": "A", "description": "", "exits": {"N": "B", "E": "X"}},
+    ...               {"name": "B", "description": "", "exits": {"S": "A", "N": "C"}, "locked": True},
+    ...               {"name": "C", "description": "", "exits": {"S": "B"},
+    ...                "items": [{"name": "Clé", "description": "", "weight": 0.1}]},
+    ...               {"name": "D", "description": "", "exits": {}}]})
+    >>> report["gated_quest_items"]
+    [{'quest': 'Q', 'objective': 'prendre Clé', 'item': 'Clé', 'room': 'C', 'reachable': True, 'locked_rooms': ['B']}]
+    >>> report["unreachable_rooms"], report["no_exits"], report["dangling_exits"]
+    (['D'], ['D'], [{'from': 'A', 'direction': 'E', 'to': 'X'}])
+    """
+    specs = data["rooms"]
+    n = len(specs)
+    names = [spec["name"] for spec in specs]
+    index = {name: i for i, name in enumerate(names)}
+    report = {"rooms": n, "exits": 0, "start": data["start"]}
+    summary = report["summary"] = {}
+
+    def record(key, values):
+        summary[key] = len(values)
+        report[key] = values if limit is None else values[:limit]
+
+    # Sorties : liste d'adjacence (successeurs distincts) et sorties nommées
+    adjacency = []
+    exits = []
+    dangling = []
+    locked = bytearray(n)
+    item_rooms = {}
+    n_exits = 0
+    for i, spec in enumerate(specs):
+        successors = []
+        for direction, target in spec.get("exits", {}).items():
+            if target is None:
+                continue
+            j = index.get(target)
+            if j is None:
+                dangling.append({"from": names[i], "direction": direction, "to": target})
+                continue
+            n_exits += 1
+            exits.append((i, direction, j))
+            if j not in successors:
+                successors.append(j)
+        adjacency.append(successors)
+        if spec.get("locked"):
+            locked[i] = 1
+        for item in spec.get("items", []):
+            item_rooms.setdefault(item["name"], []).append(i)
+    report["exits"] = n_exits
+    record("dangling_exits", dangling)
+
+    start = index[data["start"]]
+    parents = _reach(adjacency, start)
+    record("unreachable_rooms", [names[i] for i in range(n) if parents[i] == -2])
+
+    # Pièces accessibles d'où le départ n'est plus accessible
+    reverse = [[] for _ in range(n)]
+    for i, successors in enumerate(adjacency):
+        for j in successors:
+            reverse[j].append(i)
+    back = _reach(reverse, start)
+    record("no_return_rooms", [names[i] for i in range(n) if parents[i] != -2 and back[i] == -2])
+
+    # Une sortie i -> j est à sens unique si aucune sortie ne mène de j à i
+    record("one_way_exits", [{"from": names[i], "direction": direction, "to": names[j]}
+                             for i, direction, j in exits if i not in adjacency[j]])
+    record("dead_ends", [names[i] for i in range(n) if len(adjacency[i]) == 1])
+    record("no_exits", [names[i] for i in range(n) if not adjacency[i]])
+
+    # Objets de quête : un objet est bloqué si aucun exemplaire n'est
+    # accessible sans passer par une pièce verrouillée
+    open_parents = _reach(adjacency, start, locked)
+    gated = []
+    for title, objective, item in _quest_items(data.get("quests", []), item_rooms):
+        rooms = item_rooms[item]
+        if any(open_parents[i] != -2 and not (locked[i] and i != start) for i in rooms):
+            continue
+        reachable = [i for i in rooms if parents[i] != -2]
+        i = reachable[0] if reachable else rooms[0]
+        # Pièces verrouillées d'un plus court chemin depuis le départ
+        path_locked = []
+        j = i
+        while j >= 0:
+            if locked[j] and j != start:
+                path_locked.append(names[j])
+            j = parents[j]
+        path_locked.reverse()
+        gated.append({"quest": title, "objective": objective, "item": item, "room": names[i],
+                      "reachable": bool(reachable), "locked_rooms": path_locked})
+    record("gated_quest_items", gated)
+    summary["unreachable_quest_items"] = sum(not entry["reachable"] for entry in gated)
+
+    components = strongly_connected_components(adjacency)
+    components.sort(key=len, reverse=True)
+    summary["components"] = len(components)
+    report["largest_component"] = len(components[0]) if components else 0
+    # Détail des composantes autres que la plus grande
+    others = components[1:] if limit is None else components[1:limit + 1]
+    report["other_components"] = [[names[i] for i in (members if limit is None else members[:limit])]
+                                  for members in others]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse du graphe d'un monde TBA")
+    parser.add_argument("world", nargs="?", default=DEFAULT_WORLD_FILE, help="fichier de définition du monde")
+    parser.add_argument("-o", "--output", metavar="FICHIER", help="fichier du rapport JSON (par défaut la sortie standard)")
+    parser.add_argument("--limit", type=int, default=None, help="nombre maximal d'éléments par liste du rapport")
+    args = parser.parse_args()
+
+    # Le JSON chargé et les listes d'adjacence restent vivants jusqu'à la
+    # fin : les collectes de la génération 2 les reparcourraient sans rien
+    # libérer. Le processus se termine après le rapport.
+    gc.disable()
+    with open(args.world, encoding="utf-8") as f:
+        report = analyze(json.load(f), args.limit)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    # Statut d'erreur si une pièce ou un objet de quête est hors d'atteinte, ou
+    # si une sortie mène à une pièce inexistante (compile_world la refuserait)
+    summary = report["summary"]
+    if summary["unreachable_rooms"] or summary["dangling_exits"] or summary["unreachable_quest_items"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# Description: générateur de mondes de test.
+#
+# Produit des mondes de taille et de forme choisies pour les tests de
+# charge : pièces reliées par des sorties N/E/S/O/U/D, objets, pièces
+# verrouillées, PNJ et quêtes. Le monde est généré directement sous la
+# forme compilée de world.py (indices entiers, chaînes partagées), ce qui
+# permet d'obtenir un million de pièces en quelques secondes, soit en
+# objets (`generate_world`), soit au format du fichier de monde
+# (`to_definition`).
+#
+# Formes disponibles :
+#   grid         grille de `levels` étages (N/E/S/O dans un étage, U/D entre étages) ;
+#   tree         arbre aléatoire : un seul chemin entre deux pièces ;
+#   small-world  grille à un étage plus des raccourcis U/D vers des pièces
+#                tirées au hasard (monde « petit monde » : chemins courts).
+#
+# Usage : python worldgen.py --rooms 1000000 --topology small-world --items 0.5
+#                            --locked 0.01 --npcs 10000 --quests 100 -o monde.json
+#         python game.py --world monde.json
+
+import argparse
+import contextlib
+import gc
+import json
+import math
+import random
+import sys
+
+from world import build_world
+
+TOPOLOGIES = ("grid", "tree", "small-world")
+DIRECTIONS = ("N", "S", "E", "O", "U", "D")
+# Indice de la direction opposée dans DIRECTIONS
+OPPOSITE = (1, 0, 3, 2, 5, 4)
+DESCRIPTIONS = (
+    "une salle aux murs blanchis à la chaux",
+    "un couloir dallé de pierre",
+    "une cour envahie par les herbes",
+    "une chambre poussiéreuse",
+    "un entrepôt encombré de caisses",
+    "une chapelle silencieuse",
+)
+# Objets générés : (nom, description, poids)
+ITEM_KINDS = tuple((f"Objet{k}", f"un objet de test ({k})", round(0.1 + 0.1 * (k % 20), 1))
+                   for k in range(50))
+NPC_MESSAGES = ["Bonjour !", "Belle journée."]
+
+
+@contextlib.contextmanager
+def _without_gc():
+    # Chaque seuil d'allocations franchi relance une collecte, et les plus
+    # anciennes parcourent tous les objets déjà créés : pendant la création
+    # en masse des pièces, ces parcours répétés doublent la durée. Il ne
+    # s'agit que d'éviter ces parcours : le monde, cycles compris, reste vivant.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _grid(n_rooms, levels):
+    # Sorties d'une grille de `levels` étages : listes de (direction, indice) et
+    # masque des directions utilisées (bit i : DIRECTIONS[i])
+    per_level = math.ceil(n_rooms / levels)
+    width = math.ceil(math.sqrt(per_level))
+    exits = []
+    masks = bytearray(n_rooms)
+    for i in range(n_rooms):
+        level_end = min(n_rooms, (i // per_level + 1) * per_level)
+        x = i % per_level % width
+        y = i % per_level // width
+        room = []
+        mask = 0
+        if y > 0:
+            room.append(("N", i - width))
+            mask |= 1
+        if i + width < level_end:
+            room.append(("S", i + width))
+            mask |= 2
+        if x < width - 1 and i + 1 < level_end:
+            room.append(("E", i + 1))
+            mask |= 4
+        if x > 0:
+            room.append(("O", i - 1))
+            mask |= 8
+        if i >= per_level:
+            room.append(("U", i - per_level))
+            mask |= 16
+        if i + per_level < n_rooms:
+            room.append(("D", i + per_level))
+            mask |= 32
+        exits.append(room)
+        masks[i] = mask
+    return exits, masks
+
+
+def _tree(n_rooms, rng):
+    # Chaque pièce est reliée à une pièce déjà placée, par une direction libre
+    exits = [[] for _ in range(n_rooms)]
+    masks = bytearray(n_rooms)
+    randrange = rng.randrange
+    for i in range(1, n_rooms):
+        while True:
+            parent = randrange(i)
+            if masks[parent] == 63:
+                continue
+            d = randrange(6)
+            while masks[parent] & (1 << d):
+                d = randrange(6)
+            break
+        back = OPPOSITE[d]
+        exits[parent].append((DIRECTIONS[d], i))
+        exits[i].append((DIRECTIONS[back], parent))
+        masks[parent] |= 1 << d
+        masks[i] |= 1 << back
+    return exits, masks
+
+
+def _shortcuts(exits, masks, fraction, rng):
+    # Raccourcis U -> D entre pièces tirées au hasard, si ces sorties sont libres
+    n_rooms = len(exits)
+    randrange = rng.randrange
+    for _ in range(int(n_rooms * fraction)):
+        a = randrange(n_rooms)
+        b = randrange(n_rooms)
+        if a == b or masks[a] & 16 or masks[b] & 32:
+            continue
+        exits[a].append(("U", b))
+        exits[b].append(("D", a))
+        masks[a] |= 16
+        masks[b] |= 32
+
+
+def generate(n_rooms, topology="grid", levels=1, items=0.0, locked=0.0, npcs=0, quests=0,
+             shortcuts=0.05, item_kinds=ITEM_KINDS, seed=0):
+    """
+    Génère un monde et le renvoie sous la forme compilée de world.py
+    (voir `world.compile_world`).
+
+    Paramètres :
+    n_rooms : int
+        Le nombre de pièces (nommées R0, R1... ; R0 est la pièce de départ).
+    topology : str
+        La forme du monde (voir TOPOLOGIES).
+    levels : int
+        Le nombre d'étages d'une grille.
+    items : float
+        Le nombre moyen d'objets par pièce, tirés parmi `item_kinds`.
+    locked : float
+        La proportion de pièces verrouillées (difficulté de 1 à 5).
+    npcs, quests : int
+        Le nombre de PNJ et de quêtes.
+    shortcuts : float
+        Le nombre de raccourcis d'un monde small-world, par pièce.
+
+    Exemples :
+    >>> compiled = generate(10, "grid", levels=2)
+    >>> [(name, exits) for name, _, exits, *_ in compiled["rooms"][:2]]
+    [('R0', (('S', 3), ('E', 1), ('D', 5))), ('R1', (('S', 4), ('E', 2), ('O', 0), ('D', 6)))]
+    >>> world = generate_world(1000, "tree", items=0.5, locked=0.1, npcs=20, quests=3, seed=1)
+    >>> len(world.rooms), sum(len(room.exits) for room in world.rooms)
+    (1000, 1998)
+    >>> world.start.locked, len(world.spawn_characters()), len(world.create_quests())
+    (False, 20, 3)
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Forme de monde inconnue : '{topology}'.")
+    with _without_gc():
+        return _generate(n_rooms, topology, levels, items, locked, npcs, quests, shortcuts, item_kinds, seed)
+
+
+def _generate(n_rooms, topology, levels, items, locked, npcs, quests, shortcuts, item_kinds, seed):
+    rng = random.Random(seed)
+    if topology == "tree":
+        exits, masks = _tree(n_rooms, rng)
+    else:
+        exits, masks = _grid(n_rooms, levels if topology == "grid" else 1)
+        if topology == "small-world":
+            _shortcuts(exits, masks, shortcuts, rng)
+
+    intern = sys.intern
+    kinds = [(intern(name), None, description, weight) for name, description, weight in item_kinds]
+    whole, fraction = divmod(items, 1)
+    whole = int(whole)
+    random_ = rng.random
+    randrange = rng.randrange
+    rooms = []
+    for i, room_exits in enumerate(exits):
+        room_items = ()
+        if items:
+            count = whole + (random_() < fraction)
+            if count:
+                room_items = tuple(kinds[randrange(len(kinds))] for _ in range(count))
+        is_locked = False
+        difficulty = 0
+        if locked and i and random_() < locked:
+            is_locked = True
+            difficulty = randrange(1, 6)
+        rooms.append((f"R{i}", DESCRIPTIONS[i % len(DESCRIPTIONS)],
+                      tuple(room_exits),
+                      room_items, is_locked, difficulty))
+
+    characters = [{"name": f"PNJ{i}", "description": "un passant", "room": f"R{randrange(n_rooms)}",
+                   "msgs": list(NPC_MESSAGES)} for i in range(npcs)]
+    quest_specs = []
+    for i in range(quests):
+        objectives = [f"Visiter R{randrange(n_rooms)}", f"Se déplacer {10 * (1 + i % 10)} fois"]
+        if kinds:
+            objectives.append(f"prendre {kinds[i % len(kinds)][0]}")
+        quest_specs.append({"title": f"Quête {i}", "description": "quête générée", "objectives": objectives,
+                            "reward": f"{10 * (1 + i % 10)} groschens"})
+    return {"start": 0, "rooms": rooms, "characters": characters, "quests": quest_specs,
+            "crowds": [], "dungeon": None}
+
+
+def generate_world(n_rooms, topology="grid", **options):
+    """Génère un monde (voir `generate`) et renvoie ses objets (World)."""
+    with _without_gc():
+        return build_world(generate(n_rooms, topology, **options))
+
+
+def to_definition(compiled):
+    """
+    Renvoie le monde compilé `compiled` au format du fichier de monde (dict).
+
+    >>> definition = to_definition(generate(4, "grid"))
+    >>> definition["start"], definition["rooms"][3]["exits"]
+    ('R0', {'N': 'R1', 'O': 'R2'})
+    """
+    rooms = compiled["rooms"]
+    names = [room[0] for room in rooms]
+    specs = []
+    for name, description, exits, items, locked, difficulty in rooms:
+        spec = {"name": name, "description": description,
+                "exits": {direction: names[j] if j >= 0 else None for direction, j in exits}}
+        if items:
+            spec["items"] = [{"name": item_name, "description": item_description, "weight": weight}
+                             for item_name, _, item_description, weight in items]
+        if locked:
+            spec["locked"] = True
+            spec["difficulty"] = difficulty
+        specs.append(spec)
+    definition = {"start": names[compiled["start"]], "rooms": specs,
+                  "characters": compiled["characters"], "quests": compiled["quests"]}
+    if compiled.get("crowds"):
+        definition["crowds"] = compiled["crowds"]
+    if compiled.get("dungeon"):
+        definition["dungeon"] = compiled["dungeon"]
+    return definition
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générateur de mondes de test TBA")
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="grid")
+    parser.add_argument("--levels", type=int, default=1, help="étages d'une grille")
+    parser.add_argument("--items", type=float, default=0.0, help="nombre moyen d'objets par pièce")
+    parser.add_argument("--locked", type=float, default=0.0, help="proportion de pièces verrouillées")
+    parser.add_argument("--npcs", type=int, default=0)
+    parser.add_argument("--quests", type=int, default=0)
+    parser.add_argument("--shortcuts", type=float, default=0.05, help="raccourcis par pièce (small-world)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", metavar="FICHIER", help="fichier de monde à écrire (par défaut la sortie standard)")
+    args = parser.parse_args()
+
+    compiled = generate(args.rooms, args.topology, levels=args.levels, items=args.items, locked=args.locked,
+                        npcs=args.npcs, quests=args.quests, shortcuts=args.shortcuts, seed=args.seed)
+    definition = to_definition(compiled)
+    if args.output is None:
+        json.dump(definition, sys.stdout, ensure_ascii=False, separators=(",", ":"))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(definition, f, ensure_ascii=False, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    main()